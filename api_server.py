@@ -20,7 +20,6 @@ import json
 import os
 import shutil
 import time
-import pandas as pd
 from pathlib import Path
 import sqlite3
 import traceback
@@ -39,19 +38,10 @@ import logging
 import re
 import glob
 
-try:
-    import pyautogui
-    PYAUTOGUI_AVAILABLE = True
-    # Set a safety pause to give user time to take control if needed
-    pyautogui.PAUSE = 0.5
-except ImportError:
-    PYAUTOGUI_AVAILABLE = False
-
-
-from flask import Flask, jsonify, request, send_from_directory, abort, make_response, render_template
+from flask import Flask, jsonify, request, send_from_directory, abort, make_response, render_template, Response
 from flask_cors import CORS
 try:
-    from flask_socketio import SocketIO, emit, disconnect
+    from flask_socketio import SocketIO, emit, disconnect, join_room, leave_room
     SOCKETIO_AVAILABLE = True
 except ImportError:
     print("Running without WebSocket support (temporarily disabled for debugging)")
@@ -59,6 +49,13 @@ except ImportError:
 
 # Import shared utilities
 from src.utils import load_system_config, archive_existing_file
+from src.config_service import get_config_service, validate_config
+from src.data_metadata import DataMetadataCache, sidecar_path
+from src.disk_usage import DiskUsageIndexer
+from src.log_reader import tail, read_since
+from src.status_broadcaster import StatusBroadcaster
+from src.response_cache import ResponseCache, file_version, sqlite_version
+from src.job_runner import JobRunner, JobNotCancellable
 
 # --- Setup Logging ---
 log_file = 'logs/api_server.log'
@@ -98,30 +95,41 @@ else:
 
 # --- Authentication ---
 # Default password hash (will be updated if password file exists)
-PASSWORD_HASH = "8c6976e5b5410415bde908bd4dee15dfb167a9c873fc4bb8a81f6f2ab448a918"  # SHA-256 of 'admin'
+DEFAULT_PASSWORD_HASH = "8c6976e5b5410415bde908bd4dee15dfb167a9c873fc4bb8a81f6f2ab448a918"  # SHA-256 of 'admin'
+_password_hash = None
+
+def get_password_hash():
+    """Resolves the dashboard password hash on first authentication (env var, then password file)."""
+    global _password_hash
+    if _password_hash is not None:
+        return _password_hash
+
+    password_hash = DEFAULT_PASSWORD_HASH
+    # Try to read password from environment variable first
+    dashboard_password = os.getenv("DASHBOARD_PASSWORD")
+    if dashboard_password:
+        password_hash = hashlib.sha256(dashboard_password.encode()).hexdigest()
+        logging.info("Using dashboard password from environment variable")
+    else:
+        # Try to read password from file
+        password_file = "dashboard_password.txt"
+        if os.path.exists(password_file):
+            try:
+                with open(password_file, 'r', encoding='utf-8') as f:
+                    password = f.read().strip()
+                    if password:
+                        password_hash = hashlib.sha256(password.encode()).hexdigest()
+                        logging.info(f"Loaded password from {password_file}")
+            except Exception as e:
+                logging.error(f"Error reading password file: {e}")
 
-# Try to read password from environment variable first
-dashboard_password = os.getenv("DASHBOARD_PASSWORD")
-if dashboard_password:
-    PASSWORD_HASH = hashlib.sha256(dashboard_password.encode()).hexdigest()
-    logging.info("Using dashboard password from environment variable")
-else:
-    # Try to read password from file
-    password_file = "dashboard_password.txt"
-    if os.path.exists(password_file):
-        try:
-            with open(password_file, 'r', encoding='utf-8') as f:
-                password = f.read().strip()
-                if password:
-                    PASSWORD_HASH = hashlib.sha256(password.encode()).hexdigest()
-                    logging.info(f"Loaded password from {password_file}")
-        except Exception as e:
-            logging.error(f"Error reading password file: {e}")
+    _password_hash = password_hash
+    return _password_hash
 
 def check_auth(password):
     """Check if the password matches the stored hash"""
     password_hash = hashlib.sha256(password.encode()).hexdigest()
-    return password_hash == PASSWORD_HASH
+    return password_hash == get_password_hash()
 
 def requires_auth(f):
     @wraps(f)
@@ -193,10 +201,14 @@ def safe_write_json(file_path, data):
         logging.error(f"Error writing JSON file {file_path}: {e}")
         return False
 
+def get_model_info_paths():
+    """(champion config, training summary) paths."""
+    model_config_path = config.get('system_paths', {}).get('champion_config', 'models/champion_model_config.json')
+    return model_config_path, os.path.join(os.path.dirname(model_config_path), 'training_summary.json')
+
 def get_model_info():
     """Get information about the current champion model."""
-    model_config_path = config.get('system_paths', {}).get('champion_config', 'models/champion_model_config.json')
-    model_summary_path = os.path.join(os.path.dirname(model_config_path), 'training_summary.json')
+    model_config_path, model_summary_path = get_model_info_paths()
     
     model_config = safe_read_json(model_config_path)
     model_summary = safe_read_json(model_summary_path)
@@ -219,18 +231,20 @@ def get_agent_state():
     
     # Get last few lines of log
     log_lines = []
+    log_offset = None
     if os.path.exists(log_path):
         try:
-            with open(log_path, 'r', encoding='utf-8') as f:
-                # Get last 20 lines
-                log_lines = f.readlines()[-20:]
+            # Get last 20 lines (reads backwards from EOF, not the whole file)
+            recent = tail(log_path, 20)
+            log_lines, log_offset = recent['lines'], recent['offset']
         except Exception as e:
             logging.error(f"Error reading log file {log_path}: {e}")
     
     return {
         'state': state,
         'command': command,
-        'log_lines': log_lines
+        'log_lines': log_lines,
+        'log_offset': log_offset
     }
 
 def send_command_to_agent(command_data):
@@ -242,9 +256,11 @@ def send_command_to_agent(command_data):
     
     return safe_write_json(command_path, command_data)
 
+BACKTEST_DB_PATH = 'spy_strategy_optimization.db'
+
 def get_backtest_results():
     """Get backtest results from the database."""
-    db_path = 'spy_strategy_optimization.db'
+    db_path = BACKTEST_DB_PATH
     results = []
     
     if not os.path.exists(db_path):
@@ -284,27 +300,40 @@ def get_backtest_results():
         if conn:
             conn.close()
 
-def get_data_status():
-    """Get status of data files."""
-    data_files = {
+# metadata של קובצי הנתונים, מתבטל לפי mtime - סטטוס ב-O(1) במקום קריאת ה-CSV
+data_metadata_cache = DataMetadataCache()
+
+def get_data_files():
+    """Data file paths by name, as shown in the data status."""
+    return {
         'raw_spy': config.get('system_paths', {}).get('raw_data', 'data/raw/SPY_ibkr.csv'),
         'raw_vix': config.get('system_paths', {}).get('vix_data', 'data/raw/VIX_ibkr.csv'),
         'processed': config.get('system_paths', {}).get('processed_data', 'data/processed/SPY_processed.csv'),
         'features': config.get('system_paths', {}).get('feature_data', 'data/processed/SPY_features.csv')
     }
+
+def get_data_status():
+    """Get status of data files."""
+    data_files = get_data_files()
     
     status = {}
     
     for name, path in data_files.items():
         if os.path.exists(path):
             try:
-                df = pd.read_csv(path, parse_dates=['date'] if 'date' in pd.read_csv(path, nrows=1).columns else None)
+                # metadata מה-sidecar (נכתב ע"י שלב הייצור), נשמר בזיכרון עד שהקובץ משתנה
+                metadata = data_metadata_cache.get(path)
+                if metadata is None:
+                    status[name] = {'exists': False}
+                    continue
                 status[name] = {
                     'exists': True,
-                    'size_mb': round(os.path.getsize(path) / (1024 * 1024), 2),
-                    'rows': len(df),
-                    'date_range': f"{df['date'].min()} to {df['date'].max()}" if 'date' in df.columns else 'N/A',
-                    'last_modified': datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+                    'size_mb': round(metadata['size_bytes'] / (1024 * 1024), 2),
+                    'rows': metadata['rows'],
+                    'columns': len(metadata['columns']),
+                    'date_range': f"{metadata['min_date']} to {metadata['max_date']}" if metadata.get('date_column') else 'N/A',
+                    'checksum': metadata.get('sha256'),
+                    'last_modified': datetime.fromtimestamp(metadata['mtime_ns'] / 1e9).strftime('%Y-%m-%d %H:%M:%S')
                 }
             except Exception as e:
                 status[name] = {
@@ -354,6 +383,10 @@ def update_system_config(new_config):
     """Update the system configuration."""
     config_path = 'system_config.json'
     
+    errors = validate_config(new_config)
+    if errors:
+        return {'status': 'error', 'message': 'Invalid configuration', 'errors': errors}
+    
     try:
         # Backup the existing config
         archive_existing_file(config_path)
@@ -361,6 +394,8 @@ def update_system_config(new_config):
         # Write new config
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(new_config, f, indent=2, ensure_ascii=False)
+        get_config_service(config_path).invalidate()
+        response_cache.invalidate('config')
         
         return {'status': 'success', 'message': 'Configuration updated successfully'}
     
@@ -374,6 +409,8 @@ def run_backtest():
     try:
         from src.backtester import run_backtest_from_api
         results = run_backtest_from_api()
+        if isinstance(results, dict) and results.get('error'):
+            return {'status': 'error', 'message': results['error']}
         return {'status': 'success', 'results': results}
     except Exception as e:
         logging.error(f"Error running backtest: {e}")
@@ -391,19 +428,24 @@ def train_model():
         logging.error(traceback.format_exc())
         return {'status': 'error', 'message': f'Failed to start model training: {str(e)}'}
 
-def get_recent_logs(log_name, max_lines=100):
-    """Get recent lines from a log file."""
+def get_recent_logs(log_name, max_lines=100, since=None):
+    """
+    Get recent lines from a log file.
+    With `since` (a byte offset returned by a previous call) only lines written after it are returned.
+    """
     log_path = f"logs/{log_name}.log"
     
     if not os.path.exists(log_path):
         return {'status': 'error', 'message': f'Log file not found: {log_path}', 'lines': []}
     
     try:
-        with open(log_path, 'r', encoding='utf-8') as f:
-            # Get last max_lines
-            lines = f.readlines()[-max_lines:]
+        if since is not None:
+            # follow mode: רק בתים חדשים מאז ה-offset הקודם
+            result = read_since(log_path, since, fallback_lines=max_lines)
+            return {'status': 'success', **result}
         
-        return {'status': 'success', 'lines': lines}
+        # Get last max_lines (reads backwards from EOF)
+        return {'status': 'success', **tail(log_path, max_lines)}
     
     except Exception as e:
         logging.error(f"Error reading log file {log_path}: {e}")
@@ -437,31 +479,12 @@ def get_running_processes():
     
     return {'status': 'success', 'processes': processes}
 
+# אינדקס גודל/מספר קבצים בזיכרון: סריקה ראשונית ועדכונים מ-watchdog
+disk_usage_indexer = DiskUsageIndexer(['data', 'models', 'logs', 'reports', 'archive'])
+
 def get_disk_usage():
     """Get disk usage for important folders."""
-    folders = ['data', 'models', 'logs', 'reports', 'archive']
-    usage = {}
-    
-    for folder in folders:
-        if os.path.exists(folder):
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(folder):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    total_size += os.path.getsize(file_path)
-            
-            usage[folder] = {
-                'size_mb': round(total_size / (1024 * 1024), 2),
-                'file_count': len([f for f in glob.glob(f'{folder}/**/*', recursive=True) if os.path.isfile(f)])
-            }
-        else:
-            usage[folder] = {
-                'size_mb': 0,
-                'file_count': 0,
-                'exists': False
-            }
-    
-    return usage
+    return disk_usage_indexer.usage()
 
 def start_ibkr_gateway():
     """Start the IBKR Gateway process."""
@@ -491,6 +514,67 @@ def start_trading_agent():
         logging.error(traceback.format_exc())
         return {'status': 'error', 'message': f'Failed to start trading agent: {str(e)}'}
 
+# --- Background jobs ---
+
+def _emit_job_event(event, job):
+    if socketio:
+        socketio.emit(event, job)
+
+# איסוף, עיבוד מקדים ובקטסט רצים ב-pool מוגבל; נתיבי /api/run/* מחזירים מיד מזהה משימה
+_jobs_settings = config.get('api_settings', {}).get('jobs', {})
+os.makedirs('data', exist_ok=True)
+job_runner = JobRunner(
+    os.path.join('data', 'jobs.sqlite'),
+    max_workers=int(_jobs_settings.get('max_workers', 2)),
+    history=int(_jobs_settings.get('history', 500)),
+    on_event=_emit_job_event
+)
+
+JOB_TASKS = {
+    'collect': ('Data collection', run_collection_process),
+    'preprocess': ('Preprocessing', run_preprocessing_process),
+    'backtest': ('Backtest', run_backtest)
+}
+
+def submit_job(kind):
+    """Queues one of JOB_TASKS and returns the 202 response with the job id."""
+    label, task = JOB_TASKS[kind]
+
+    def run(ctx):
+        # נקודת הבדיקה האחרונה; מכאן המשימה רצה עד הסוף (היא כותבת קבצי נתונים)
+        ctx.progress(0.0, f"{label} started")
+        return task()
+
+    job = job_runner.submit(kind, run, cancellable=False)
+    return jsonify({
+        'status': 'success',
+        'message': f"{label} job {job['status']}",
+        'job_id': job['id'],
+        'job': job
+    }), 202
+
+# --- Response caching ---
+
+# תשובות JSON נשמרות לפי גרסת המקור (mtime / מונה שינויים של SQLite); ETag נגזר מהגרסה
+response_cache = ResponseCache()
+
+def conditional_json(key, version, compute):
+    """
+    JSON response with an ETag derived from `version`.
+    Returns 304 when If-None-Match already has it; compute() runs only when the version changed.
+    """
+    etag = response_cache.etag(key, version)
+    if request.if_none_match.contains(etag.strip('"')):
+        response_cache.record_not_modified()
+        response = Response(status=304)
+    else:
+        etag, body = response_cache.get(key, version, lambda: app.json.dumps(compute()).encode('utf-8'))
+        response = Response(body, mimetype='application/json')
+    response.headers['ETag'] = etag
+    # הדפדפן שומר את התשובה אבל מאמת אותה בכל בקשה
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # --- Routes ---
 
 @app.route('/')
@@ -510,13 +594,14 @@ def api_status():
         'config': {
             'api_host': API_HOST,
             'api_port': API_PORT
-        }
+        },
+        'response_cache': response_cache.stats()
     })
 
 @app.route('/api/model')
 @requires_auth
 def api_model():
-    return jsonify(get_model_info())
+    return conditional_json('model', file_version(*get_model_info_paths()), get_model_info)
 
 @app.route('/api/agent')
 @requires_auth
@@ -539,37 +624,66 @@ def api_agent_command():
 @app.route('/api/backtest')
 @requires_auth
 def api_backtest():
-    return jsonify(get_backtest_results())
+    return conditional_json('backtest', sqlite_version(BACKTEST_DB_PATH), get_backtest_results)
 
 @app.route('/api/data')
 @requires_auth
 def api_data():
-    return jsonify(get_data_status())
+    paths = list(get_data_files().values())
+    return conditional_json('data', file_version(*paths, *[sidecar_path(p) for p in paths]), get_data_status)
 
 @app.route('/api/run/collect', methods=['POST'])
 @requires_auth
 def api_run_collect():
-    return jsonify(run_collection_process())
+    return submit_job('collect')
 
 @app.route('/api/run/preprocess', methods=['POST'])
 @requires_auth
 def api_run_preprocess():
-    return jsonify(run_preprocessing_process())
+    return submit_job('preprocess')
 
 @app.route('/api/run/backtest', methods=['POST'])
 @requires_auth
 def api_run_backtest():
-    return jsonify(run_backtest())
+    return submit_job('backtest')
 
 @app.route('/api/run/train', methods=['POST'])
 @requires_auth
 def api_run_train():
     return jsonify(train_model())
 
+@app.route('/api/jobs')
+@requires_auth
+def api_jobs():
+    return jsonify(job_runner.list(
+        kind=request.args.get('kind'),
+        status=request.args.get('status'),
+        limit=request.args.get('limit', default=50, type=int)
+    ))
+
+@app.route('/api/jobs/<job_id>')
+@requires_auth
+def api_job(job_id):
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Job not found: {job_id}'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@requires_auth
+def api_cancel_job(job_id):
+    try:
+        job = job_runner.cancel(job_id)
+    except JobNotCancellable as e:
+        return jsonify({'status': 'error', 'message': str(e), 'job': job_runner.get(job_id)}), 409
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Job not found: {job_id}'}), 404
+    return jsonify(job)
+
 @app.route('/api/config')
 @requires_auth
 def api_config():
-    return jsonify(get_system_config())
+    return conditional_json('config', file_version('system_config.json'), get_system_config)
 
 @app.route('/api/config', methods=['POST'])
 @requires_auth
@@ -584,7 +698,8 @@ def api_update_config():
 @requires_auth
 def api_logs(log_name):
     max_lines = request.args.get('max_lines', default=100, type=int)
-    return jsonify(get_recent_logs(log_name, max_lines))
+    since = request.args.get('since', default=None, type=int)
+    return jsonify(get_recent_logs(log_name, max_lines, since))
 
 @app.route('/api/processes')
 @requires_auth
@@ -609,12 +724,25 @@ def api_run_agent():
 # --- WebSocket API (if available) ---
 
 if socketio:
+    # משימת רקע אחת מחשבת את הסטטוס ומשדרת רק שינויים לכל המנויים
+    status_broadcaster = StatusBroadcaster(
+        socketio,
+        sources={
+            'agent': get_agent_state,
+            'processes': get_running_processes,
+            'data': get_data_status
+        },
+        interval=float(config.get('api_settings', {}).get('status_push_interval', 2.0)),
+        watch_paths=[p for p in ('agent',) if os.path.isdir(p)]
+    )
+
     @socketio.on('connect')
     def socket_connect():
         logging.info(f"Client connected: {request.sid}")
     
     @socketio.on('disconnect')
     def socket_disconnect():
+        status_broadcaster.unsubscribe(request.sid)
         logging.info(f"Client disconnected: {request.sid}")
     
     @socketio.on('auth')
@@ -625,18 +753,49 @@ if socketio:
         else:
             emit('auth_response', {'status': 'success', 'message': 'Authentication successful'})
     
-    @socketio.on('get_status')
-    def socket_get_status():
+    def _emit_status_update(current):
         emit('status_update', {
-            'server_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'agent': get_agent_state(),
-            'data': get_data_status()
+            'server_time': current['server_time'],
+            'version': current['version'],
+            **current['status']
         })
+    
+    @socketio.on('get_status')
+    def socket_get_status():
+        # תמונת מצב משותפת (מחושבת לכל היותר פעם ב-interval), לא חישוב לכל לקוח
+        _emit_status_update(status_broadcaster.current())
+    
+    @socketio.on('subscribe_status')
+    def socket_subscribe_status():
+        join_room(status_broadcaster.room)
+        # רישום לפני לקיחת התמונה, כדי ששינוי שקורה ביניהם לא יאבד
+        _emit_status_update(status_broadcaster.subscribe(request.sid))
+    
+    @socketio.on('unsubscribe_status')
+    def socket_unsubscribe_status():
+        leave_room(status_broadcaster.room)
+        status_broadcaster.unsubscribe(request.sid)
+
+# --- Configuration reloads ---
+
+def on_config_change(new_config, old_config):
+    """config_service subscriber: swaps the module config; host/port changes need a restart."""
+    global config
+    config = new_config
+    response_cache.invalidate('config')
+    if socketio:
+        status_broadcaster.interval = float(new_config.get('api_settings', {}).get('status_push_interval', 2.0))
+    if new_config.get('api_settings', {}).get('port') != old_config.get('api_settings', {}).get('port'):
+        logging.warning("api_settings.port changed; restart the API server to apply")
+
+get_config_service('system_config.json').subscribe(on_config_change)
 
 # --- Main function ---
 
 def main():
     logging.info(f"Starting API server on {API_HOST}:{API_PORT}")
+    disk_usage_indexer.start()
+    get_config_service('system_config.json').watch(float(config.get('api_settings', {}).get('config_poll_seconds', 2.0)))
     
     # Check if we have WebSocket support
     if socketio:
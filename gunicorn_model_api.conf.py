@@ -0,0 +1,32 @@
+"""
+gunicorn_model_api.conf.py - הגדרות gunicorn ל-model_api
+
+    gunicorn -c gunicorn_model_api.conf.py src.model_api_wsgi:app
+
+ההגדרות נקראות מ-api_settings ב-system_config.json (host, port, serving).
+"""
+
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+with open(os.path.join(BASE_DIR, 'system_config.json'), 'r', encoding='utf-8') as _f:
+    _api_settings = json.load(_f).get('api_settings', {})
+_serving = _api_settings.get('serving', {})
+
+bind = f"{_api_settings.get('host', '0.0.0.0')}:{_api_settings.get('port', 5000)}"
+workers = int(os.environ.get('MODEL_API_WORKERS', _serving.get('workers', 4)))
+# gthread: כמה בקשות במקביל לכל worker, חיזוי עצמו רץ על thread אחד (OMP_NUM_THREADS)
+worker_class = 'gthread'
+threads = int(_serving.get('threads', 4))
+# טעינת המודל לפני ה-fork - ה-workers חולקים את הזיכרון copy-on-write
+preload_app = True
+timeout = int(_serving.get('timeout_seconds', 60))
+chdir = BASE_DIR
+raw_env = [f"OMP_NUM_THREADS={_serving.get('model_threads', 1)}"]
+
+
+def post_fork(server, worker):
+    from src.model_api_wsgi import post_fork as _post_fork
+    _post_fork(server, worker)
@@ -0,0 +1,186 @@
+"""
+load_test_model_api.py - בדיקת עומס ל-model_api
+
+שולח בקשות חיזוי במקביל ומדווח latency (p50/p90/p99/max) ובקשות לשנייה.
+
+דוגמאות:
+    python scripts/load_test_model_api.py --requests 500 --concurrency 16
+    python scripts/load_test_model_api.py --endpoint session --symbol SPY
+    python scripts/load_test_model_api.py --endpoint batch --symbols 20
+    python scripts/load_test_model_api.py --binary   # גוף Arrow IPC במקום JSON
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+ARROW_STREAM_MIME = 'application/vnd.apache.arrow.stream'
+
+
+def default_url():
+    try:
+        with open(os.path.join(BASE_DIR, 'system_config.json'), 'r', encoding='utf-8') as f:
+            api_settings = json.load(f).get('api_settings', {})
+    except Exception:
+        api_settings = {}
+    host = api_settings.get('host', '127.0.0.1')
+    if host == '0.0.0.0':
+        host = '127.0.0.1'
+    return f"http://{host}:{api_settings.get('port', 5000)}"
+
+
+def synthetic_bars(n_bars, seed=0):
+    """random walk של נרות יומיים (כמו החלון שה-agent שולח)"""
+    rng = np.random.default_rng(seed)
+    close = 400 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    start = datetime(2024, 1, 1)
+    bars = []
+    for i, c in enumerate(close):
+        high = c * (1 + abs(rng.normal(0, 0.005)))
+        low = c * (1 - abs(rng.normal(0, 0.005)))
+        bars.append({
+            "date": (start + timedelta(days=i)).strftime('%Y-%m-%dT00:00:00'),
+            "open": float(c * (1 + rng.normal(0, 0.002))),
+            "high": float(high),
+            "low": float(low),
+            "close": float(c),
+            "volume": float(rng.integers(5e7, 1.5e8))
+        })
+    return bars
+
+
+def post_arrow(session, url, bars, timeout):
+    from src.bar_codec import encode_bars
+    return session.post(url, data=encode_bars(bars), headers={'Content-Type': ARROW_STREAM_MIME}, timeout=timeout)
+
+
+def make_request_factory(args, session):
+    bars = synthetic_bars(args.bars)
+
+    if args.endpoint == 'predict':
+        url = f"{args.url}/predict"
+
+        def call(i):
+            payload = bars
+            if not args.allow_cache:
+                # שינוי זעיר בנר האחרון כדי לעקוף את מטמון התוצאות
+                payload = bars[:-1] + [dict(bars[-1], close=bars[-1]['close'] * (1 + i * 1e-9))]
+            if args.binary:
+                return post_arrow(session, url, payload, args.timeout)
+            return session.post(url, json={"historical": payload}, timeout=args.timeout)
+        return call
+
+    if args.endpoint == 'session':
+        session.post(f"{args.url}/session/{args.symbol}/bars", json={"bars": bars, "reset": True}, timeout=args.timeout)
+        url = f"{args.url}/session/{args.symbol}/predict"
+
+        def call(i):
+            bar = dict(bars[-1], close=bars[-1]['close'] * (1 + i * 1e-9))
+            if args.binary and not args.allow_cache:
+                return post_arrow(session, url, [bar], args.timeout)
+            return session.post(url, json={} if args.allow_cache else {"bars": [bar]}, timeout=args.timeout)
+        return call
+
+    url = f"{args.url}/predict_batch"
+    payload = {"symbols": {f"SYM{k}": synthetic_bars(args.bars, seed=k) for k in range(args.symbols)}}
+
+    def call(i):
+        return session.post(url, json=payload, timeout=args.timeout)
+    return call
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(args):
+    http = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency)
+    http.mount('http://', adapter)
+    call = make_request_factory(args, http)
+
+    for i in range(args.warmup):
+        call(-1 - i)
+
+    latencies, errors = [], 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            response = call(i)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for elapsed, ok in executor.map(timed, range(args.requests)):
+            latencies.append(elapsed * 1000)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "endpoint": args.endpoint,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "requests_per_second": args.requests / wall if wall else float('nan'),
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) if latencies else float('nan'),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else float('nan')
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the model API")
+    parser.add_argument('--url', default=default_url())
+    parser.add_argument('--endpoint', choices=['predict', 'session', 'batch'], default='predict')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--bars', type=int, default=63, help="bars per window (90 calendar days ~ 63 trading days)")
+    parser.add_argument('--symbols', type=int, default=10, help="symbols per request for --endpoint batch")
+    parser.add_argument('--symbol', default='SPY', help="session symbol for --endpoint session")
+    parser.add_argument('--allow-cache', action='store_true', help="send identical windows (measures cache hits)")
+    parser.add_argument('--binary', action='store_true', help="send bars as Arrow IPC instead of JSON")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    lat = report['latency_ms']
+    print(f"{report['endpoint']}: {report['requests']} requests, concurrency {report['concurrency']}, "
+          f"{report['errors']} errors")
+    print(f"  throughput: {report['requests_per_second']:.1f} req/s")
+    print(f"  latency ms: mean {lat['mean']:.1f} | p50 {lat['p50']:.1f} | p90 {lat['p90']:.1f} | "
+          f"p99 {lat['p99']:.1f} | max {lat['max']:.1f}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
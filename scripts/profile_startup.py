@@ -0,0 +1,168 @@
+"""
+profile_startup.py - פרופיל זמני ייבוא ובנצ'מרק זמן עלייה של השרתים
+
+לכל מודול (ברירת מחדל: src.model_api ו-api_server):
+1. מריץ `python -X importtime -c "import <module>"` וכותב תקציר (digest):
+   זמן כולל, החבילות הכבדות ביותר והמודולים עם זמן self הגבוה ביותר.
+2. בודק שמודולים כבדים שאמורים להיטען בעצלות לא נטענו בזמן ה-import.
+3. מודד את זמן הייבוא (חציון של כמה הרצות) ומשווה ל-baseline שנשמר.
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --update-baseline
+    python scripts/profile_startup.py --modules src.model_api --runs 10 --tolerance 0.2
+
+קוד יציאה 1 אם יש רגרסיה או ייבוא מוקדם של מודול כבד.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# מודולים שאסור שייטענו בזמן ה-import של השרת
+DEFERRED_MODULES = {
+    'src.model_api': ['pandas', 'pandas_ta', 'lightgbm', 'sklearn', 'src.feature_calculator'],
+    'api_server': ['pandas', 'pyautogui'],
+}
+
+
+def _run_python(args, env_extra=None):
+    env = dict(os.environ, PYTHONPATH=BASE_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.update(env_extra or {})
+    return subprocess.run([sys.executable] + args, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+
+
+def parse_importtime(stderr):
+    """מפרק את הפלט של -X importtime לרשומות (self_us, cumulative_us, depth, name)"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        records.append({
+            "name": name.strip(),
+            "depth": depth,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return records
+
+
+def importtime_digest(module, top=15):
+    result = _run_python(['-X', 'importtime', '-c', f"import {module}"])
+    records = parse_importtime(result.stderr)
+    top_level = [r for r in records if r['depth'] == 0]
+    return {
+        "module": module,
+        "import_ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode != 0 and result.stderr.strip() else None,
+        "total_ms": sum(r['cumulative_ms'] for r in top_level),
+        "modules_imported": len(records),
+        "top_packages": sorted(top_level, key=lambda r: r['cumulative_ms'], reverse=True)[:top],
+        "top_self": sorted(records, key=lambda r: r['self_ms'], reverse=True)[:top]
+    }
+
+
+def eager_heavy_modules(module):
+    """מחזיר את המודולים מ-DEFERRED_MODULES שנטענו בפועל (מודול עצל שלא הורץ לא נחשב)"""
+    deferred = DEFERRED_MODULES.get(module, [])
+    # מודול של LazyLoader שעוד לא הורץ הוא מטיפוס _LazyModule (type() לא מפעיל את הטעינה)
+    code = (
+        "import sys, json\n"
+        f"import {module}\n"
+        f"loaded = [n for n in {deferred!r} if n in sys.modules and type(sys.modules[n]).__name__ != '_LazyModule']\n"
+        "print(json.dumps(loaded))\n"
+    )
+    result = _run_python(['-c', code])
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_import(module, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = _run_python(['-c', f"import {module}"])
+        timings.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            return None
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "runs": runs}
+
+
+def write_digest(digest, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"importtime_{digest['module'].replace('.', '_')}")
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(digest, f, indent=2)
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(f"{digest['module']}: {digest['total_ms']:.1f} ms, {digest['modules_imported']} modules\n\n")
+        f.write("Top packages (cumulative ms):\n")
+        for r in digest['top_packages']:
+            f.write(f"  {r['cumulative_ms']:9.1f}  {r['name']}\n")
+        f.write("\nTop modules (self ms):\n")
+        for r in digest['top_self']:
+            f.write(f"  {r['self_ms']:9.1f}  {r['name']}\n")
+    return base + '.txt'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile and startup benchmark")
+    parser.add_argument('--modules', nargs='+', default=list(DEFERRED_MODULES))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output-dir', default=os.path.join(BASE_DIR, 'reports', 'startup'))
+    parser.add_argument('--baseline', default=None, help="baseline JSON (default: <output-dir>/baseline.json)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown over baseline (0.25 = 25%%)")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(args.output_dir, 'baseline.json')
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    failures = []
+    results = {}
+    for module in args.modules:
+        digest = importtime_digest(module)
+        report_path = write_digest(digest, args.output_dir)
+        if not digest['import_ok']:
+            failures.append(f"{module}: import failed ({digest['error']})")
+            print(f"{module}: import failed - {digest['error']}")
+            continue
+
+        eager = eager_heavy_modules(module)
+        bench = benchmark_import(module, args.runs)
+        results[module] = bench
+        print(f"{module}: import {bench['median_ms']:.0f} ms (median of {args.runs}), digest: {report_path}")
+
+        if eager:
+            failures.append(f"{module}: heavy modules imported eagerly: {eager}")
+        previous = baseline.get(module, {}).get('median_ms')
+        if previous and bench['median_ms'] > previous * (1 + args.tolerance):
+            failures.append(f"{module}: {bench['median_ms']:.0f} ms vs baseline {previous:.0f} ms "
+                            f"(+{bench['median_ms'] / previous - 1:.0%})")
+
+    if args.update_baseline or not baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
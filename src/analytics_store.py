@@ -0,0 +1,411 @@
+"""
+analytics_store.py - מאגר ניתוח של ריצות אימון ובדיקות אחוריות (SQLite)
+
+קולט לטבלאות עם אינדקסים:
+- training_runs: models/training_summary.json והעותקים שלו ב-models/archive/
+- candidates: models/candidate_model_config_*.json ו-champion_model_config.json
+- backtests: טבלת strategy_results מ-spy_strategy_optimization.db
+
+הקליטה מצטברת: קובץ JSON נקרא מחדש רק אם ה-mtime שלו השתנה, ומה-DB של
+הבדיקות האחוריות נקראות רק שורות עם id גדול מהאחרון שנקלט.
+סיכומי אימון נקראים בשני הפורמטים: של main_trainer (accuracy, training_date, params,
+מדדי backtest) והפורמט הישן (training_run_timestamp, test_accuracy, classification_report).
+השאילתות מחזירות עמודים ממוינים בצד השרת ואגרגציות לפי תקופה (למשל שארפ מקסימלי לשבוע).
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Optional
+
+# ה-DB הוא מטמון של קבצי המקור: שינוי סכמה מוחק אותו והכל נקלט מחדש
+SCHEMA_VERSION = 2
+TABLES = ('training_runs', 'candidates', 'backtests', 'ingested_files')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS training_runs (
+    run_key TEXT PRIMARY KEY,
+    timestamp TEXT,
+    study_name TEXT,
+    objective TEXT,
+    test_accuracy REAL,
+    test_f1_score REAL,
+    test_precision REAL,
+    test_recall REAL,
+    test_auc REAL,
+    total_return REAL,
+    sharpe_ratio REAL,
+    max_drawdown REAL,
+    win_rate REAL,
+    profit_factor REAL,
+    num_trades INTEGER,
+    data_start TEXT,
+    data_end TEXT,
+    feature_count INTEGER,
+    is_champion INTEGER NOT NULL DEFAULT 0,
+    params TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS training_runs_timestamp ON training_runs(timestamp);
+CREATE INDEX IF NOT EXISTS training_runs_accuracy ON training_runs(test_accuracy);
+CREATE INDEX IF NOT EXISTS training_runs_sharpe ON training_runs(sharpe_ratio);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    run_key TEXT PRIMARY KEY,
+    timestamp TEXT,
+    study_name TEXT,
+    feature_count INTEGER,
+    is_champion INTEGER NOT NULL DEFAULT 0,
+    params TEXT,
+    risk_params TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS candidates_timestamp ON candidates(timestamp);
+
+CREATE TABLE IF NOT EXISTS backtests (
+    source_id INTEGER PRIMARY KEY,
+    run_timestamp TEXT,
+    strategy_name TEXT,
+    total_return REAL,
+    annualized_return REAL,
+    sharpe_ratio REAL,
+    max_drawdown REAL,
+    win_rate REAL,
+    profit_factor REAL,
+    total_trades INTEGER,
+    threshold REAL,
+    stop_loss_pct REAL,
+    take_profit_pct REAL,
+    risk_per_trade REAL
+);
+CREATE INDEX IF NOT EXISTS backtests_timestamp ON backtests(run_timestamp);
+CREATE INDEX IF NOT EXISTS backtests_sharpe ON backtests(sharpe_ratio);
+CREATE INDEX IF NOT EXISTS backtests_strategy ON backtests(strategy_name, run_timestamp);
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL
+);
+"""
+
+# מדדי ה-backtest ש-main_trainer מעתיק לשורש הסיכום (backtest_* של הניסוי הטוב ביותר)
+SUMMARY_BACKTEST_METRICS = ('total_return', 'sharpe_ratio', 'max_drawdown', 'win_rate', 'profit_factor', 'num_trades')
+
+TRAINING_COLUMNS = ('run_key', 'timestamp', 'study_name', 'objective', 'test_accuracy', 'test_f1_score',
+                    'test_precision', 'test_recall', 'test_auc', *SUMMARY_BACKTEST_METRICS, 'data_start',
+                    'data_end', 'feature_count', 'is_champion', 'params', 'source')
+
+BACKTEST_COLUMNS = ('run_timestamp', 'strategy_name', 'total_return', 'annualized_return', 'sharpe_ratio',
+                    'max_drawdown', 'win_rate', 'profit_factor', 'total_trades', 'threshold', 'stop_loss_pct',
+                    'take_profit_pct', 'risk_per_trade')
+
+# עמודות שמותר למיין ולצבור לפיהן (שמות עמודות לא עוברים כפרמטר ב-SQL)
+SORTABLE = {
+    'training_runs': ('timestamp', 'test_accuracy', 'test_f1_score', 'test_auc', 'feature_count', 'total_return',
+                      'sharpe_ratio', 'max_drawdown', 'win_rate', 'profit_factor', 'num_trades'),
+    'candidates': ('timestamp', 'feature_count'),
+    'backtests': ('run_timestamp', 'sharpe_ratio', 'total_return', 'annualized_return', 'max_drawdown',
+                  'win_rate', 'profit_factor', 'total_trades'),
+}
+TIME_COLUMN = {'training_runs': 'timestamp', 'candidates': 'timestamp', 'backtests': 'run_timestamp'}
+PERIOD_FORMATS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+JSON_COLUMNS = ('params', 'risk_params')
+
+
+def _run_timestamp_to_iso(value: Optional[str]) -> Optional[str]:
+    """'20250718_083840' -> '2025-07-18 08:38:40'"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return value
+
+
+def _date_to_run_timestamp(value: Optional[str]) -> Optional[str]:
+    """'2025-07-18 08:38:40' -> '20250718_083840'"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').strftime('%Y%m%d_%H%M%S')
+    except (TypeError, ValueError):
+        return None
+
+
+def _params_signature(params) -> Optional[str]:
+    """JSON קנוני של פרמטרים, להשוואה בין סיכום אימון לקונפיגורציית ה-champion"""
+    return json.dumps(params, sort_keys=True) if params else None
+
+
+class AnalyticsStore:
+    """SQLite-backed, incrementally refreshed store of training and backtest runs."""
+
+    def __init__(self, db_path: str, models_dir: str, backtest_db_path: Optional[str] = None):
+        self.db_path = os.path.abspath(db_path)
+        self.models_dir = os.path.abspath(models_dir)
+        self.backtest_db_path = os.path.abspath(backtest_db_path) if backtest_db_path else None
+        self._write_lock = threading.Lock()
+        self._last_refresh = 0.0
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(''.join(f"DROP TABLE IF EXISTS {table};" for table in TABLES))
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    # --- קליטה ---
+    @staticmethod
+    def _changed_files(conn, paths):
+        known = {row['path']: row['mtime'] for row in conn.execute("SELECT path, mtime FROM ingested_files")}
+        changed = []
+        for path in paths:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if known.get(path) != mtime:
+                changed.append((path, mtime))
+        return changed
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Analytics store: cannot read {path}: {e}")
+            return None
+
+    def _ingest_training(self, conn) -> int:
+        current = os.path.join(self.models_dir, 'training_summary.json')
+        paths = [current] + sorted(glob.glob(os.path.join(self.models_dir, 'archive', 'training_summary.json.*')))
+        count = 0
+        for path, mtime in self._changed_files(conn, paths):
+            summary = self._read_json(path)
+            if isinstance(summary, dict):
+                conn.execute(
+                    f"INSERT OR REPLACE INTO training_runs ({', '.join(TRAINING_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(TRAINING_COLUMNS))})",
+                    self._training_row(summary, os.path.relpath(path, self.models_dir))
+                )
+                count += 1
+            conn.execute("INSERT OR REPLACE INTO ingested_files (path, mtime) VALUES (?, ?)", (path, mtime))
+        return count
+
+    @staticmethod
+    def _training_row(summary: dict, source: str) -> tuple:
+        """שורת training_runs מסיכום אימון, בפורמט של main_trainer או בפורמט הישן"""
+        params = summary.get('params') if isinstance(summary.get('params'), dict) else {}
+        report = summary.get('classification_report', {})
+        macro = report.get('macro avg', {}) if isinstance(report, dict) else {}
+        run_timestamp = (summary.get('training_run_timestamp') or params.get('training_run_timestamp')
+                         or _date_to_run_timestamp(summary.get('training_date')))
+        features = (summary.get('selected_features_list') or summary.get('selected_features')
+                    or params.get('selected_features') or list(summary.get('feature_importances') or {}))
+        row = {
+            'run_key': run_timestamp or source,
+            'timestamp': _run_timestamp_to_iso(run_timestamp) or summary.get('training_date') or summary.get('timestamp'),
+            'study_name': summary.get('optuna_study_name'),
+            'objective': summary.get('objective_function'),
+            'test_accuracy': summary.get('test_accuracy', summary.get('accuracy')),
+            'test_f1_score': macro.get('f1-score'),
+            'test_precision': macro.get('precision'),
+            'test_recall': macro.get('recall'),
+            'test_auc': summary.get('test_auc'),
+            'data_start': summary.get('data_start'),
+            'data_end': summary.get('data_end'),
+            'feature_count': len(features),
+            'is_champion': 0,
+            'params': _params_signature(summary.get('best_params') or summary.get('all_params') or params) or '{}',
+            'source': source
+        }
+        for metric in SUMMARY_BACKTEST_METRICS:
+            value = summary.get(metric)
+            row[metric] = value if isinstance(value, (int, float)) else None
+        return tuple(row[column] for column in TRAINING_COLUMNS)
+
+    def _ingest_candidates(self, conn) -> int:
+        paths = sorted(glob.glob(os.path.join(self.models_dir, 'candidate_model_config_*.json')) +
+                       glob.glob(os.path.join(self.models_dir, 'archive', 'candidate_model_config_*.json*')))
+        count = 0
+        for path, mtime in self._changed_files(conn, paths):
+            candidate = self._read_json(path)
+            if isinstance(candidate, dict):
+                match = re.search(r'(\d{8}_\d{6})', os.path.basename(path))
+                run_key = candidate.get('training_run_timestamp') or (match.group(1) if match else os.path.basename(path))
+                conn.execute(
+                    "INSERT OR REPLACE INTO candidates (run_key, timestamp, study_name, feature_count, "
+                    "params, risk_params, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_key, _run_timestamp_to_iso(run_key), candidate.get('optuna_study_name'),
+                     len(candidate.get('selected_features') or []),
+                     _params_signature(candidate.get('params')) or '{}', json.dumps(candidate.get('risk_params') or {}),
+                     os.path.relpath(path, self.models_dir))
+                )
+                count += 1
+            conn.execute("INSERT OR REPLACE INTO ingested_files (path, mtime) VALUES (?, ?)", (path, mtime))
+        return count
+
+    def _mark_champion(self, conn, force: bool = False):
+        """
+        is_champion לפי champion_model_config.json; רץ רק כשהקובץ השתנה או שנקלטו ריצות חדשות.
+        ההתאמה לפי training_run_timestamp אם נכתב, אחרת לפי הפרמטרים: main_trainer כותב
+        לקונפיגורציה את אותו מילון שנשמר ב-params של סיכום האימון.
+        """
+        champion_path = os.path.join(self.models_dir, 'champion_model_config.json')
+        changed = self._changed_files(conn, [champion_path])
+        if not changed and not force:
+            return
+        champion = self._read_json(champion_path) if os.path.exists(champion_path) else None
+        champion = champion if isinstance(champion, dict) else {}
+        run_key = champion.get('training_run_timestamp')
+        nested = champion.get('params') if isinstance(champion.get('params'), dict) else None
+        signatures = [s for s in (_params_signature(champion), _params_signature(nested)) if s]
+        params_match = f"params IN ({', '.join('?' * len(signatures))})" if signatures else "0"
+        for table in ('training_runs', 'candidates'):
+            conn.execute(f"UPDATE {table} SET is_champion = (run_key IS ? OR {params_match})", (run_key, *signatures))
+        for path, mtime in changed:
+            conn.execute("INSERT OR REPLACE INTO ingested_files (path, mtime) VALUES (?, ?)", (path, mtime))
+
+    def _ingest_backtests(self, conn) -> int:
+        if not self.backtest_db_path or not os.path.exists(self.backtest_db_path):
+            return 0
+        last_id = conn.execute("SELECT COALESCE(MAX(source_id), 0) FROM backtests").fetchone()[0]
+        source = sqlite3.connect(f"file:{self.backtest_db_path}?mode=ro", uri=True, timeout=30)
+        source.row_factory = sqlite3.Row
+        with closing(source):
+            exists = source.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='strategy_results'").fetchone()
+            if not exists:
+                return 0
+            max_id = source.execute("SELECT COALESCE(MAX(id), 0) FROM strategy_results").fetchone()[0]
+            if max_id < last_id:
+                # ה-DB נוצר מחדש: קולטים הכל מההתחלה
+                conn.execute("DELETE FROM backtests")
+                last_id = 0
+            available = {row[1] for row in source.execute("PRAGMA table_info(strategy_results)")}
+            columns = [c for c in BACKTEST_COLUMNS if c in available]
+            rows = source.execute(
+                f"SELECT id, {', '.join(columns)} FROM strategy_results WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO backtests (source_id, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+            [tuple(row) for row in rows]
+        )
+        return len(rows)
+
+    def refresh(self, max_age: float = 0.0) -> dict:
+        """Ingests new or changed sources. With max_age, skips if the last refresh is more recent."""
+        if max_age and time.monotonic() - self._last_refresh < max_age:
+            return {}
+        with self._write_lock, closing(self._connect()) as conn:
+            with conn:
+                counts = {
+                    'training_runs': self._ingest_training(conn),
+                    'candidates': self._ingest_candidates(conn),
+                    'backtests': self._ingest_backtests(conn)
+                }
+                self._mark_champion(conn, force=bool(counts['training_runs'] or counts['candidates']))
+        self._last_refresh = time.monotonic()
+        if any(counts.values()):
+            logging.info(f"Analytics store ingested {counts}")
+        return counts
+
+    # --- שאילתות ---
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        item = dict(row)
+        for column in JSON_COLUMNS:
+            if isinstance(item.get(column), str):
+                item[column] = json.loads(item[column])
+        if 'is_champion' in item:
+            item['is_champion'] = bool(item['is_champion'])
+        return item
+
+    def _filters(self, table, since=None, until=None, strategy=None):
+        clauses, params = [], []
+        time_column = TIME_COLUMN[table]
+        if since:
+            clauses.append(f"{time_column} >= ?")
+            params.append(since.replace('T', ' '))
+        if until:
+            clauses.append(f"{time_column} <= ?")
+            params.append(until.replace('T', ' '))
+        if strategy and table == 'backtests':
+            clauses.append("strategy_name LIKE ?")
+            params.append(strategy.replace('*', '%'))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def page(self, table: str, sort: Optional[str] = None, order: str = 'desc', page: int = 1,
+             page_size: int = 50, since: Optional[str] = None, until: Optional[str] = None,
+             strategy: Optional[str] = None) -> dict:
+        """One sorted page of a table: {"items", "total", "page", "page_size"}."""
+        if table not in SORTABLE:
+            raise ValueError(f"Unknown table '{table}'")
+        sort = sort if sort in SORTABLE[table] else TIME_COLUMN[table]
+        direction = 'ASC' if str(order).lower() == 'asc' else 'DESC'
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), 500))
+        where, params = self._filters(table, since, until, strategy)
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM {table}{where} ORDER BY {sort} IS NULL, {sort} {direction} LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+        return {"items": [self._row_to_dict(r) for r in rows], "total": total, "page": page, "page_size": page_size}
+
+    def best_per_period(self, table: str, metric: str, period: str = 'week', since: Optional[str] = None,
+                        until: Optional[str] = None, strategy: Optional[str] = None) -> list:
+        """
+        Best run per period by metric (e.g. best Sharpe per week), with run count and average.
+        For max_drawdown "best" is the largest value (drawdowns are stored as negative numbers).
+        """
+        if table not in SORTABLE or metric not in SORTABLE[table]:
+            raise ValueError(f"Cannot aggregate '{metric}' of '{table}'")
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"Unknown period '{period}', expected one of {list(PERIOD_FORMATS)}")
+        time_column = TIME_COLUMN[table]
+        where, params = self._filters(table, since, until, strategy)
+        where = (where + ' AND ' if where else ' WHERE ') + f"{metric} IS NOT NULL AND {time_column} IS NOT NULL"
+
+        # ב-SQLite, עמודות לא מצטברות לצד MAX() נלקחות מהשורה שבה נמצא המקסימום
+        sql = (
+            f"SELECT strftime('{PERIOD_FORMATS[period]}', {time_column}) AS period, "
+            f"MAX({metric}) AS best, AVG({metric}) AS average, COUNT(*) AS runs, * "
+            f"FROM {table}{where} GROUP BY period ORDER BY period DESC"
+        )
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        result = []
+        for row in rows:
+            item = self._row_to_dict(row)
+            result.append({
+                "period": item.pop('period'),
+                "metric": metric,
+                "best": item.pop('best'),
+                "average": item.pop('average'),
+                "runs": item.pop('runs'),
+                "best_run": item
+            })
+        return result
+
+    def latest_backtest(self, strategy_name: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT * FROM backtests WHERE strategy_name = ? ORDER BY run_timestamp DESC, source_id DESC LIMIT 1",
+                (strategy_name,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
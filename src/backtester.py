@@ -12,6 +12,7 @@ from src.feature_calculator import FeatureCalculator
 from src.utils import load_system_config
 from sklearn.preprocessing import StandardScaler
 from src.simulation_engine import run_trading_simulation
+from src.fast_predictor import load_predictor
 from src.utils.project_organizer import ProjectOrganizer
 import argparse
 
@@ -48,6 +49,7 @@ def run_backtest(data_path, config_path, model_path, scaler_path, output_suffix)
         risk_params = model_config.get('risk_params', config['risk_params'])
         
         model = joblib.load(model_path)
+        predictor = load_predictor(model, config['system_paths'].get('champion_compiled_model'))
         # scaler_template loading removed (unused)
         
         # Get prediction thresholds from model config
@@ -67,7 +69,7 @@ def run_backtest(data_path, config_path, model_path, scaler_path, output_suffix)
         logging.info(f"Generating predictions for {len(X)} samples")
         
         # Predict
-        pred_proba = model.predict_proba(X)[:, 1]
+        pred_proba = predictor.predict_proba(X)[:, 1]
         df_raw['prediction_proba'] = pred_proba
         
         # Run simulation
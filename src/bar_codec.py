@@ -0,0 +1,86 @@
+"""
+bar_codec.py - קידוד בינארי של נרות (Arrow IPC) עבור model_api
+
+במקום רשימת JSON של dicts, הלקוח יכול לשלוח Arrow record batch עם עמודות
+date, open, high, low, close, volume (ועמודות נוספות כמו vix_close).
+העמודות המספריות נקראות ישירות כמערכי NumPy בלי parsing של טקסט.
+מטא-דאטה אופציונלית ב-schema: symbol, reset.
+
+JSON ממשיך לעבוד - הבחירה לפי Content-Type של הבקשה.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+ARROW_STREAM_MIME = 'application/vnd.apache.arrow.stream'
+
+
+def is_arrow_request(request) -> bool:
+    """האם גוף הבקשה הוא Arrow IPC stream"""
+    return request.mimetype == ARROW_STREAM_MIME
+
+
+def _read_table(payload: bytes):
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+    except pa.ArrowException as e:
+        raise ValueError(f"Invalid Arrow IPC payload: {e}") from e
+    if 'date' not in table.column_names:
+        raise ValueError("Arrow payload is missing the 'date' column")
+    metadata = {k.decode('utf-8'): v.decode('utf-8') for k, v in (table.schema.metadata or {}).items()}
+    return table, metadata
+
+
+def decode_bars_frame(payload: bytes) -> Tuple[pd.DataFrame, dict]:
+    """
+    Decodes an Arrow IPC stream of bars into a DataFrame indexed by date.
+
+    Returns:
+        (DataFrame, schema metadata dict)
+    """
+    import pandas as pd
+
+    table, metadata = _read_table(payload)
+    columns = {}
+    for name in table.column_names:
+        if name == 'date':
+            continue
+        # עמודה בלי nulls ובחתיכה אחת מוחזרת כ-view על ה-buffer של Arrow
+        columns[name] = table.column(name).combine_chunks().to_numpy(zero_copy_only=False)
+    dates = pd.to_datetime(table.column('date').combine_chunks().to_numpy(zero_copy_only=False))
+    df = pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name='date'))
+    return df.sort_index(), metadata
+
+
+def decode_bars_records(payload: bytes) -> Tuple[list, dict]:
+    """Decodes an Arrow IPC stream of bars into a list of bar dicts (for session pushes)."""
+    table, metadata = _read_table(payload)
+    return table.to_pylist(), metadata
+
+
+def encode_bars(bars, **metadata) -> bytes:
+    """
+    Encodes bars (list of dicts or DataFrame with a 'date' column/index) as an Arrow IPC stream.
+    Used by clients and tests.
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    df = pd.DataFrame(bars) if not isinstance(bars, pd.DataFrame) else bars
+    if 'date' not in df.columns:
+        df = df.rename_axis('date').reset_index()
+    df = df.assign(date=pd.to_datetime(df['date']))
+    for name in df.columns:
+        if name != 'date' and df[name].dtype.kind in 'iu':
+            df[name] = df[name].astype(np.float64)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({k: str(v) for k, v in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,81 @@
+"""
+batch_prediction.py - חיזוי של הרבה סימבולים ותאריכים בקריאה אחת (/predict_batch)
+
+הפיצ'רים מחושבים פעם אחת לכל סימבול, השורות המבוקשות נערמות למטריצה אחת,
+וה-scaler והמודל רצים פעם אחת על כולה. התשובה עמודתית: מערכי JSON או Arrow IPC.
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+
+try:
+    from src.lazy_import import lazy_import
+except ImportError:
+    from lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+BATCH_COLUMNS = ['symbol', 'date', 'prediction', 'probability_buy', 'atr_value']
+
+
+def select_rows(features: pd.DataFrame, dates) -> pd.DataFrame:
+    """Selects the rows to predict: the requested dates, all rows ('all'), or only the latest row."""
+    if dates == 'all':
+        return features
+    if dates:
+        wanted = pd.DatetimeIndex(pd.to_datetime(dates))
+        return features[features.index.isin(wanted)]
+    return features.iloc[[-1]]
+
+
+def predict_stacked(bundle, frames: List[Tuple[str, pd.DataFrame]],
+                    stage: Callable[[str], object] = lambda name: nullcontext()) -> Dict[str, list]:
+    """
+    Runs the model once over the stacked feature rows of every symbol.
+
+    Args:
+        bundle: Model bundle with alignment (AlignmentPlan) and predictor
+        frames: (symbol, feature rows indexed by date) pairs
+        stage: Context-manager factory used to time the align/scale/predict stages
+
+    Returns:
+        dict: Column name -> list, one entry per predicted row
+    """
+    columns = {name: [] for name in BATCH_COLUMNS}
+    frames = [(symbol, rows) for symbol, rows in frames if len(rows)]
+    if not frames:
+        return columns
+
+    with stage('align'):
+        features = pd.concat([rows for _, rows in frames], sort=False)
+        X = bundle.alignment.align(features.columns, features.to_numpy(dtype=np.float64))
+    with stage('scale'):
+        X_scaled = bundle.alignment.scale_rows(X)
+    with stage('predict'):
+        proba_buy = bundle.predictor.predict_proba(X_scaled)[:, 1]
+
+    atr_col_name = next((col for col in features.columns if 'ATR_' in col.upper()), None)
+    atr_values = features[atr_col_name] if atr_col_name else pd.Series(np.nan, index=features.index)
+
+    columns['symbol'] = [symbol for symbol, rows in frames for _ in range(len(rows))]
+    columns['date'] = [ts.isoformat() for _, rows in frames for ts in rows.index]
+    columns['prediction'] = ["Buy" if p > 0.5 else "Hold" for p in proba_buy]
+    columns['probability_buy'] = [float(p) for p in proba_buy]
+    columns['atr_value'] = [float(v) if pd.notna(v) else None for v in atr_values]
+    return columns
+
+
+def encode_arrow(columns: Dict[str, list], errors: Dict[str, str]) -> bytes:
+    """Arrow IPC stream of the batch columns; per-symbol errors go in the schema metadata."""
+    import pyarrow as pa
+
+    table = pa.table(columns)
+    table = table.replace_schema_metadata({"errors": json.dumps(errors)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
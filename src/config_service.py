@@ -0,0 +1,249 @@
+"""
+config_service.py - שירות תצורה יחיד לתהליך (system_config.json)
+
+הקובץ נקרא ומפוענח פעם אחת, נבדק מול CONFIG_SCHEMA (jsonschema), ונקרא מחדש רק
+כשה-mtime או הגודל שלו משתנים. בדיקת השינוי היא stat בלבד, כך שקריאות תכופות
+(get_system_path, load_system_config) כמעט לא עולות דבר.
+
+- קובץ שנשבר אחרי הטעינה הראשונה (JSON לא תקין / לא עומד בסכמה) לא מחליף את
+  התצורה האחרונה התקינה; השגיאה נרשמת בלוג ונשמרת ב-last_error.
+- subscribe(callback) מקבל callback(new_config, old_config) אחרי כל טעינה מחדש.
+- watch(interval) מפעיל thread שבודק את הקובץ ברקע, כדי שמנויים יקבלו עדכון גם בלי קריאה.
+- accessors טיפוסיים: get_int('api_settings.port', 5000), get_str, get_float, get_bool, section.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import jsonschema
+
+REQUIRED_SECTIONS = ('training_params', 'backtest_params', 'contract', 'api_settings')
+
+_PORT = {"type": "integer", "minimum": 1, "maximum": 65535}
+_POSITIVE = {"type": "number", "exclusiveMinimum": 0}
+
+CONFIG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "training_params": {
+            "type": "object",
+            "properties": {
+                "n_trials": {"type": "integer", "minimum": 1},
+                "cv_splits": {"type": "integer", "minimum": 2},
+                "test_size_split": {"type": "number", "exclusiveMinimum": 0},
+                "years_of_data": {"type": "integer", "minimum": 1}
+            }
+        },
+        "backtest_params": {
+            "type": "object",
+            "properties": {
+                "initial_balance": _POSITIVE,
+                "commission": {"type": "number", "minimum": 0},
+                "slippage": {"type": "number", "minimum": 0}
+            }
+        },
+        "contract": {
+            "type": "object",
+            "properties": {"symbol": {"type": "string", "minLength": 1}}
+        },
+        "api_settings": {
+            "type": "object",
+            "properties": {
+                "host": {"type": "string"},
+                "port": _PORT,
+                "status_push_interval": _POSITIVE,
+                "config_poll_seconds": _POSITIVE
+            }
+        },
+        "ibkr_settings": {
+            "type": "object",
+            "properties": {
+                "host": {"type": "string"},
+                "port": _PORT,
+                "clientId": {"type": "integer"}
+            }
+        },
+        "system_paths": {
+            "type": "object",
+            "additionalProperties": {"type": "string"}
+        }
+    }
+}
+
+
+class ConfigValidationError(ValueError):
+    """The configuration file does not match CONFIG_SCHEMA."""
+
+
+def validate_config(config_data: dict, schema: Optional[dict] = None) -> List[str]:
+    """Schema errors as 'path: message' strings (empty if valid)."""
+    validator = jsonschema.Draft7Validator(schema or CONFIG_SCHEMA)
+    errors = sorted(validator.iter_errors(config_data), key=lambda e: list(e.absolute_path))
+    return [f"{'.'.join(str(p) for p in e.absolute_path) or '<root>'}: {e.message}" for e in errors]
+
+
+class ConfigService:
+    """Parsed, validated and mtime-invalidated view of one config file."""
+
+    def __init__(self, path: str, schema: Optional[dict] = None):
+        self.path = os.path.abspath(path)
+        self.schema = schema or CONFIG_SCHEMA
+        self._config: Optional[dict] = None
+        self._signature = None
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[dict, Optional[dict]], None]] = []
+        self._watch_thread = None
+        self.loads = 0
+        self.last_error: Optional[str] = None
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self) -> dict:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+        if not isinstance(config_data, dict):
+            raise ConfigValidationError("Configuration root must be a JSON object")
+        errors = validate_config(config_data, self.schema)
+        if errors:
+            raise ConfigValidationError("Invalid configuration: " + "; ".join(errors))
+        missing = [section for section in REQUIRED_SECTIONS if section not in config_data]
+        if missing:
+            logging.warning(f"Configuration is missing required sections: {', '.join(missing)}")
+        return config_data
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-reads the file if its mtime/size changed (or force). Returns True if a new config was loaded.
+        The first load raises on a missing/invalid file; later failures keep the last good config.
+        """
+        with self._lock:
+            try:
+                signature = self._file_signature()
+            except FileNotFoundError:
+                if self._config is None:
+                    raise FileNotFoundError(f"Configuration file not found: {self.path}")
+                return False
+            if not force and signature == self._signature:
+                return False
+
+            old = self._config
+            try:
+                new = self._parse()
+            except (ValueError, OSError) as e:
+                self.last_error = str(e)
+                if old is None:
+                    logging.error(f"Error loading configuration: {e}")
+                    raise
+                # נשמרת התצורה האחרונה התקינה; לא מנסים שוב עד שהקובץ ישתנה
+                self._signature = signature
+                logging.error(f"Configuration reload failed, keeping the previous configuration: {e}")
+                return False
+
+            self._config = new
+            self._signature = signature
+            self.loads += 1
+            self.last_error = None
+            subscribers = list(self._subscribers)
+
+        if old is not None:
+            logging.info(f"Configuration reloaded from {self.path}")
+            for callback in subscribers:
+                try:
+                    callback(new, old)
+                except Exception as e:
+                    logging.error(f"Configuration subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+        return True
+
+    def get(self) -> dict:
+        """The current config. Shared and read-only: use copy() before modifying it."""
+        self.reload()
+        return self._config
+
+    def copy(self) -> dict:
+        return copy.deepcopy(self.get())
+
+    def invalidate(self):
+        """Forces a re-read on the next access (e.g. right after writing the file)."""
+        with self._lock:
+            self._signature = None
+
+    # --- accessors ---
+    def value(self, dotted_key: str, default: Any = None) -> Any:
+        node = self.get()
+        for part in dotted_key.split('.'):
+            if not isinstance(node, dict) or part not in node:
+                return default
+            node = node[part]
+        return node
+
+    def section(self, name: str) -> dict:
+        section = self.value(name, {})
+        return section if isinstance(section, dict) else {}
+
+    def get_str(self, dotted_key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.value(dotted_key, default)
+        return None if value is None else str(value)
+
+    def get_int(self, dotted_key: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.value(dotted_key, default)
+        return None if value is None else int(value)
+
+    def get_float(self, dotted_key: str, default: Optional[float] = None) -> Optional[float]:
+        value = self.value(dotted_key, default)
+        return None if value is None else float(value)
+
+    def get_bool(self, dotted_key: str, default: Optional[bool] = None) -> Optional[bool]:
+        value = self.value(dotted_key, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return None if value is None else bool(value)
+
+    # --- מנויים ---
+    def subscribe(self, callback: Callable[[dict, Optional[dict]], None]) -> Callable[[], None]:
+        """Registers callback(new_config, old_config) for reloads; returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def watch(self, interval: float = 2.0):
+        """Background thread that checks the file every interval seconds (idempotent)."""
+        with self._lock:
+            if self._watch_thread is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.reload()
+                    except Exception as e:
+                        logging.error(f"Configuration watch failed: {e}")
+
+            self._watch_thread = threading.Thread(target=run, name='config-watch', daemon=True)
+            self._watch_thread.start()
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path: str = 'system_config.json') -> ConfigService:
+    """The process-wide ConfigService for a config file (relative paths resolve against the cwd)."""
+    key = os.path.abspath(path)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = ConfigService(key)
+        return service
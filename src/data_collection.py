@@ -19,6 +19,11 @@ import yfinance as yf
 import requests
 from pathlib import Path
 
+try:
+    from src.config_service import get_config_service
+except ImportError:
+    from config_service import get_config_service
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,10 +47,8 @@ def load_system_config(config_path='system_config.json'):
         dict: Configuration settings
     """
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        logger.info(f"Successfully loaded system configuration from {config_path}")
-        return config
+        # פענוח ובדיקה פעם אחת לתהליך; קריאה חוזרת רק אחרי שינוי בקובץ
+        return get_config_service(config_path).get()
     except Exception as e:
         logger.error(f"Error loading system configuration: {str(e)}")
         raise
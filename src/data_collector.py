@@ -13,6 +13,7 @@ if BASE_DIR not in sys.path:
     
 # אנחנו מעבירים את הייבואים למעלה כנדרש לפי flake8
 from src.utils import load_system_config
+from src.data_metadata import write_metadata
 
 # --- Logging configuration ---
 os.makedirs('logs', exist_ok=True)
@@ -164,6 +165,7 @@ def fetch_all_historical_data(symbol='SPY', exchange='SMART', currency='USD', du
                     out_path = f'data/raw/{symbol}_ibkr.csv'
                     logging.debug(f"Saving data to {out_path}")
                     df.to_csv(out_path, index=False)
+                    write_metadata(df, out_path, producer='data_collector')
                     
                     logging.info(f"Saved {len(df)} rows to {out_path}")
                 except Exception as e:
@@ -228,6 +230,7 @@ def fetch_all_historical_data(symbol='SPY', exchange='SMART', currency='USD', du
                     vix_out_path = 'data/raw/VIX_ibkr.csv'
                     logging.debug(f"Saving VIX data to {vix_out_path}")
                     vix_df.to_csv(vix_out_path, index=False)
+                    write_metadata(vix_df, vix_out_path, producer='data_collector')
                     
                     logging.info(f"Saved {len(vix_df)} rows to {vix_out_path}")
                 except Exception as e:
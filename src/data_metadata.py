@@ -0,0 +1,179 @@
+"""
+data_metadata.py - קבצי metadata (sidecar) לקובצי הנתונים
+
+כל שלב שכותב CSV (איסוף, עיבוד מקדים, פיצ'רים) כותב לידו <file>.meta.json עם
+מספר שורות, טווח תאריכים, סכמה (עמודות ו-dtypes), sha256, גודל ו-mtime של הקובץ.
+מסכי הסטטוס קוראים את ה-sidecar במקום לקרוא את כל ה-CSV. ה-metadata נשמר גם
+בזיכרון ומתבטל כשה-mtime או הגודל של קובץ הנתונים משתנים.
+
+sidecar חסר או ישן (הקובץ השתנה אחרי שנכתב) נבנה מחדש פעם אחת מתוך הקובץ עצמו.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+SIDECAR_SUFFIX = '.meta.json'
+DATE_COLUMNS = ('date', 'Date', 'datetime', 'timestamp')
+
+
+def sidecar_path(data_path: str) -> str:
+    return f"{data_path}{SIDECAR_SUFFIX}"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _format_date(value) -> Optional[str]:
+    if value is None or value != value:  # None / NaN / NaT
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def describe_frame(df, date_column: Optional[str] = None) -> dict:
+    """
+    rows, schema and date range of a DataFrame as it is written to CSV.
+    A non-default index (e.g. a date index written with to_csv()) is part of the schema.
+    """
+    columns = []
+    index_name = None
+    if type(df.index).__name__ != 'RangeIndex':
+        index_name = df.index.name or 'index'
+        columns.append({"name": index_name, "dtype": str(df.index.dtype)})
+    columns += [{"name": str(name), "dtype": str(dtype)} for name, dtype in df.dtypes.items()]
+
+    if date_column is None:
+        date_column = next((c for c in DATE_COLUMNS if c in df.columns or c == index_name), None)
+    min_date = max_date = None
+    if date_column is not None and len(df):
+        values = df.index if date_column == index_name else df[date_column]
+        min_date, max_date = _format_date(values.min()), _format_date(values.max())
+
+    return {
+        "rows": int(len(df)),
+        "columns": columns,
+        "date_column": date_column,
+        "min_date": min_date,
+        "max_date": max_date
+    }
+
+
+def _write_sidecar(data_path: str, description: dict, producer: Optional[str]) -> dict:
+    mtime_ns, size = _file_signature(data_path)
+    metadata = {
+        "path": data_path,
+        **description,
+        "size_bytes": size,
+        "mtime_ns": mtime_ns,
+        "sha256": file_sha256(data_path),
+        "producer": producer,
+        "written_at": datetime.now().isoformat()
+    }
+    target = sidecar_path(data_path)
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, target)
+    return metadata
+
+
+def write_metadata(df, data_path: str, producer: Optional[str] = None, date_column: Optional[str] = None) -> Optional[dict]:
+    """
+    כותב sidecar לקובץ שנכתב זה עתה מתוך df (לקרוא מיד אחרי to_csv).
+    כישלון לא עוצר את השלב שכתב את הנתונים - רק נרשם בלוג.
+    """
+    try:
+        return _write_sidecar(data_path, describe_frame(df, date_column), producer)
+    except Exception as e:
+        logging.warning(f"Could not write metadata sidecar for {data_path}: {e}")
+        return None
+
+
+def read_metadata(data_path: str) -> Optional[dict]:
+    """Returns the sidecar if it still describes the data file, otherwise None."""
+    try:
+        with open(sidecar_path(data_path), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        mtime_ns, size = _file_signature(data_path)
+    except OSError:
+        return None
+    if metadata.get('mtime_ns') != mtime_ns or metadata.get('size_bytes') != size:
+        return None
+    return metadata
+
+
+def scan_metadata(data_path: str, producer: str = 'scan') -> dict:
+    """Builds (and writes) the sidecar by reading the whole CSV - the slow fallback."""
+    import pandas as pd
+
+    header = pd.read_csv(data_path, nrows=0).columns
+    date_column = next((c for c in DATE_COLUMNS if c in header), None)
+    df = pd.read_csv(data_path, parse_dates=[date_column] if date_column else None)
+    description = describe_frame(df, date_column)
+    try:
+        return _write_sidecar(data_path, description, producer)
+    except OSError as e:
+        # תיקייה לקריאה בלבד: מחזירים את ה-metadata בלי לשמור
+        logging.warning(f"Could not write metadata sidecar for {data_path}: {e}")
+        mtime_ns, size = _file_signature(data_path)
+        return {"path": data_path, **description, "size_bytes": size, "mtime_ns": mtime_ns,
+                "sha256": None, "producer": producer}
+
+
+class DataMetadataCache:
+    """
+    In-memory metadata per data file, invalidated by the file's mtime and size.
+    A cache hit costs one os.stat().
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[int, int], dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, data_path: str) -> Optional[dict]:
+        """Metadata of the file, or None if it does not exist."""
+        try:
+            signature = _file_signature(data_path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(data_path, None)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(data_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        metadata = read_metadata(data_path)
+        if metadata is None:
+            logging.info(f"No valid metadata sidecar for {data_path}, scanning file")
+            metadata = scan_metadata(data_path)
+            signature = (metadata['mtime_ns'], metadata['size_bytes'])
+
+        with self._lock:
+            self._entries[data_path] = (signature, metadata)
+        return metadata
+
+    def invalidate(self, data_path: Optional[str] = None):
+        with self._lock:
+            if data_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(data_path, None)
@@ -0,0 +1,227 @@
+"""
+disk_usage.py - אינדקס גודל ומספר קבצים לתיקיות, מתעדכן בזמן אמת
+
+סריקה ראשונית ב-thread ברקע, ואחריה עדכונים מצטברים מאירועי watchdog
+(יצירה, שינוי, מחיקה, העברה). הגודל של כל קובץ נשמר בזיכרון, כך ששאילתת
+usage() מחזירה סכומים מוכנים בלי לגשת לדיסק.
+
+סריקה מלאה תקופתית (rescan_interval) מתקנת סטיות אם אירועים אבדו, ומוסיפה
+מעקב לתיקיות שנוצרו אחרי ההפעלה. בלי watchdog האינדקס מתעדכן רק בסריקות.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+def _scan_folder(folder: str) -> Dict[str, int]:
+    """path -> size of every file under folder (os.scandir, no symlink following)."""
+    sizes = {}
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            sizes[entry.path] = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return sizes
+
+
+class DiskUsageIndexer:
+    """
+    In-memory per-folder size and file count.
+
+    Folder paths are resolved against base_dir once, so later os.chdir() calls
+    in the server do not affect the index.
+    """
+
+    def __init__(self, folders: Iterable[str], base_dir: Optional[str] = None, rescan_interval: float = 600.0):
+        base_dir = os.path.abspath(base_dir or os.getcwd())
+        self.folders = {name: os.path.join(base_dir, name) for name in folders}
+        self.rescan_interval = rescan_interval
+        self._files: Dict[str, Dict[str, int]] = {name: {} for name in self.folders}
+        self._totals: Dict[str, int] = {name: 0 for name in self.folders}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._started = False
+        self._observer = None
+        self._watched = set()
+        self._watch_lock = threading.Lock()
+        self.last_scan_seconds: Optional[float] = None
+
+    # --- עדכונים ---
+    def _folder_of(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        for name, root in self.folders.items():
+            if path == root or path.startswith(root + os.sep):
+                return name
+        return None
+
+    def _set_file(self, path: str):
+        name = self._folder_of(path)
+        if name is None:
+            return
+        try:
+            size = os.stat(path).st_size if os.path.isfile(path) else None
+        except OSError:
+            size = None
+        if size is None:
+            self._remove_file(path)
+            return
+        with self._lock:
+            files = self._files[name]
+            self._totals[name] += size - files.get(path, 0)
+            files[path] = size
+
+    def _remove_file(self, path: str):
+        name = self._folder_of(path)
+        if name is None:
+            return
+        with self._lock:
+            size = self._files[name].pop(path, None)
+            if size is not None:
+                self._totals[name] -= size
+
+    def _remove_tree(self, path: str):
+        name = self._folder_of(path)
+        if name is None:
+            return
+        prefix = os.path.abspath(path) + os.sep
+        with self._lock:
+            files = self._files[name]
+            for file_path in [p for p in files if p.startswith(prefix)]:
+                self._totals[name] -= files.pop(file_path)
+
+    def _add_tree(self, path: str):
+        for file_path in _scan_folder(os.path.abspath(path)):
+            self._set_file(file_path)
+
+    def handle_event(self, event_type: str, src_path: str, is_directory: bool = False,
+                     dest_path: Optional[str] = None):
+        """Applies one file-system event (watchdog event_type names)."""
+        if event_type == 'moved':
+            self.handle_event('deleted', src_path, is_directory)
+            if dest_path:
+                self.handle_event('created', dest_path, is_directory)
+        elif event_type == 'deleted':
+            if is_directory:
+                self._remove_tree(src_path)
+            else:
+                self._remove_file(src_path)
+        elif event_type in ('created', 'modified', 'closed'):
+            if is_directory:
+                if event_type == 'created':
+                    self._add_tree(src_path)
+            else:
+                self._set_file(src_path)
+
+    # --- סריקה ומעקב ---
+    def rescan(self):
+        """Full scan of every folder; replaces the in-memory index."""
+        start = time.perf_counter()
+        for name, root in self.folders.items():
+            sizes = _scan_folder(root) if os.path.isdir(root) else {}
+            with self._lock:
+                self._files[name] = sizes
+                self._totals[name] = sum(sizes.values())
+        self.last_scan_seconds = time.perf_counter() - start
+        self._ready.set()
+
+    def _watch_new_folders(self) -> list:
+        """Starts watching folders that exist now but were missing before; returns their names."""
+        if self._observer is None:
+            return []
+        added = []
+        with self._watch_lock:
+            for name, root in self.folders.items():
+                if name not in self._watched and os.path.isdir(root):
+                    self._observer.schedule(self._handler, root, recursive=True)
+                    self._watched.add(name)
+                    added.append(name)
+        return added
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logging.warning("watchdog not installed; disk usage is refreshed by periodic rescans only")
+            return
+
+        indexer = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                try:
+                    indexer.handle_event(event.event_type, event.src_path, event.is_directory,
+                                         getattr(event, 'dest_path', None))
+                except Exception as e:
+                    logging.debug(f"Disk usage event failed for {event.src_path}: {e}")
+
+        self._handler = _Handler()
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._watch_new_folders()
+        self._observer.start()
+
+    def _run(self):
+        # ה-observer מופעל לפני הסריקה, כך ששינויים בזמן הסריקה לא הולכים לאיבוד
+        self._start_observer()
+        while True:
+            try:
+                self.rescan()
+                self._watch_new_folders()
+            except Exception as e:
+                logging.error(f"Disk usage scan failed: {e}")
+                self._ready.set()
+            if not self.rescan_interval:
+                return
+            time.sleep(self.rescan_interval)
+
+    def start(self):
+        """Starts the background scan and watcher (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='disk-usage-indexer', daemon=True).start()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+
+    def usage(self, wait: float = 10.0) -> dict:
+        """
+        Size and file count per folder, in the format of api_server.get_disk_usage.
+        The first call waits (up to `wait` seconds) for the initial scan.
+        """
+        self.start()
+        self._ready.wait(wait)
+        if self._ready.is_set():
+            # תיקייה שנוצרה אחרי ההפעלה: מתחילים לעקוב ומוסיפים את מה שכבר נכתב בה
+            for name in self._watch_new_folders():
+                self._add_tree(self.folders[name])
+        usage = {}
+        with self._lock:
+            for name, root in self.folders.items():
+                if os.path.isdir(root):
+                    usage[name] = {
+                        'size_mb': round(self._totals[name] / (1024 * 1024), 2),
+                        'file_count': len(self._files[name])
+                    }
+                else:
+                    usage[name] = {'size_mb': 0, 'file_count': 0, 'exists': False}
+        if not self._ready.is_set():
+            for entry in usage.values():
+                entry['indexing'] = True
+        return usage
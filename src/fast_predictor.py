@@ -0,0 +1,262 @@
+"""
+fast_predictor.py - מודל עצים "מקומפל" לחיזוי מהיר
+
+ממיר מודל LightGBM בינארי (LGBMClassifier או Booster) למערכי NumPy שטוחים
+של צמתים, ומעריך את כל העצים במקביל בלי לעבור דרך עטיפות sklearn/LightGBM.
+הארטיפקט נשמר כקובץ npz שנטען במילישניות.
+"""
+
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+# קודים של missing_type כפי שמופיעים ב-dump_model של LightGBM
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_CODES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+
+# kZeroThreshold של LightGBM
+ZERO_THRESHOLD = 1e-35
+
+
+def _get_booster(model):
+    """מחזיר את ה-Booster מתוך LGBMClassifier או Booster"""
+    return getattr(model, 'booster_', model)
+
+
+def model_fingerprint(model) -> str:
+    """טביעת אצבע של מודל LightGBM, כדי לוודא שהארטיפקט המקומפל תואם למודל"""
+    return hashlib.sha1(_get_booster(model).model_to_string().encode('utf-8')).hexdigest()
+
+
+class CompiledTreeEnsemble:
+    """
+    ייצוג שטוח של אנסמבל עצים בינארי.
+
+    כל צומת מיוצג באינדקס במערכים: feature (-1 לעלה), threshold, left, right,
+    value (ערך העלה), default_left ו-missing_type. עלים מצביעים על עצמם,
+    כך שמעבר של max_depth צעדים מביא כל דגימה לעלה שלה בכל העצים.
+
+    המימוש מיועד לבאצ'ים קטנים (שורה בודדת עד עשרות שורות): כל ההחלטות של כל
+    הצמתים מחושבות בפעולה וקטורית אחת, ואז המעבר בעומק הוא רק אינדוקס.
+    """
+
+    # מספר השורות שמעובדות יחד - מגביל את גודל טבלת ההחלטות (rows x nodes)
+    chunk_rows = 64
+
+    def __init__(self, feature, threshold, left, right, value, default_left, missing_type,
+                 roots, max_depth, sigmoid=1.0, average_output=False, feature_names=None, source_hash=''):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.sigmoid = float(sigmoid)
+        self.average_output = bool(average_output)
+        self.feature_names = list(feature_names) if feature_names is not None else []
+        self.source_hash = source_hash
+        self._feature_index = np.where(self.feature >= 0, self.feature, 0)
+
+    @classmethod
+    def from_lightgbm(cls, model):
+        """
+        בונה אנסמבל מקומפל ממודל LightGBM בינארי.
+
+        Raises:
+            ValueError: אם המודל אינו בינארי, או משתמש בפיצולים קטגוריאליים / linear trees
+        """
+        booster = _get_booster(model)
+        dump = booster.dump_model()
+
+        objective = dump.get('objective', '')
+        if not objective.startswith('binary') or dump.get('num_tree_per_iteration', 1) != 1:
+            raise ValueError(f"Only binary LightGBM models can be compiled (objective: '{objective}')")
+        sigmoid = 1.0
+        for token in objective.split()[1:]:
+            if token.startswith('sigmoid:'):
+                sigmoid = float(token.split(':', 1)[1])
+
+        feature, threshold, left, right = [], [], [], []
+        value, default_left, missing_type = [], [], []
+        roots = []
+        max_depth = 0
+
+        for tree in dump['tree_info']:
+            if tree.get('is_linear', False):
+                raise ValueError("Linear trees are not supported by the compiled predictor")
+
+            # מעבר איטרטיבי על העץ (DFS) עם עומק
+            roots.append(len(feature))
+            stack = [(tree['tree_structure'], None, None, 0)]
+            while stack:
+                node, parent, is_left, depth = stack.pop()
+                idx = len(feature)
+                if parent is not None:
+                    if is_left:
+                        left[parent] = idx
+                    else:
+                        right[parent] = idx
+                max_depth = max(max_depth, depth)
+
+                if 'leaf_value' in node:
+                    feature.append(-1)
+                    threshold.append(0.0)
+                    left.append(idx)
+                    right.append(idx)
+                    value.append(node['leaf_value'])
+                    default_left.append(False)
+                    missing_type.append(MISSING_NONE)
+                    continue
+
+                if node.get('decision_type', '<=') != '<=':
+                    raise ValueError("Categorical splits are not supported by the compiled predictor")
+                feature.append(node['split_feature'])
+                threshold.append(float(node['threshold']))
+                left.append(-1)
+                right.append(-1)
+                value.append(0.0)
+                default_left.append(bool(node.get('default_left', True)))
+                missing_type.append(_MISSING_CODES.get(node.get('missing_type', 'None'), MISSING_NONE))
+                stack.append((node['right_child'], idx, False, depth + 1))
+                stack.append((node['left_child'], idx, True, depth + 1))
+
+        return cls(
+            feature=np.asarray(feature, dtype=np.int32),
+            threshold=np.asarray(threshold, dtype=np.float64),
+            left=np.asarray(left, dtype=np.int32),
+            right=np.asarray(right, dtype=np.int32),
+            value=np.asarray(value, dtype=np.float64),
+            default_left=np.asarray(default_left, dtype=bool),
+            missing_type=np.asarray(missing_type, dtype=np.int8),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            sigmoid=sigmoid,
+            average_output=dump.get('average_output', False),
+            feature_names=dump.get('feature_names', []),
+            source_hash=model_fingerprint(booster)
+        )
+
+    def save(self, path):
+        """שומר את האנסמבל כקובץ npz"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                value=self.value, default_left=self.default_left, missing_type=self.missing_type,
+                roots=self.roots, max_depth=self.max_depth, sigmoid=self.sigmoid,
+                average_output=self.average_output, feature_names=np.asarray(self.feature_names, dtype=str),
+                source_hash=self.source_hash
+            )
+
+    @classmethod
+    def load(cls, path):
+        """טוען אנסמבל שנשמר ב-save"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                feature=data['feature'], threshold=data['threshold'], left=data['left'], right=data['right'],
+                value=data['value'], default_left=data['default_left'], missing_type=data['missing_type'],
+                roots=data['roots'], max_depth=int(data['max_depth']), sigmoid=float(data['sigmoid']),
+                average_output=bool(data['average_output']), feature_names=data['feature_names'].tolist(),
+                source_hash=str(data['source_hash'])
+            )
+
+    def _next_node_table(self, X):
+        """
+        מחליט עבור כל צומת פיצול לאן ממשיכים (שמאל/ימין) עבור כל שורה ב-X.
+        מחזיר מערך (n_rows, n_nodes) של אינדקס הצומת הבא; עלים מצביעים על עצמם.
+        """
+        fval = X[:, self._feature_index]
+        is_nan = np.isnan(fval)
+        # כמו ב-LightGBM: NaN הופך ל-0 אלא אם missing_type הוא NaN
+        fval = np.where(is_nan & (self.missing_type != MISSING_NAN), 0.0, fval)
+        use_default = ((self.missing_type == MISSING_ZERO) & (np.abs(fval) <= ZERO_THRESHOLD)) | \
+                      ((self.missing_type == MISSING_NAN) & is_nan)
+        go_left = np.where(use_default, self.default_left, fval <= self.threshold)
+        return np.where(go_left, self.left, self.right)
+
+    def predict_raw(self, X):
+        """מחזיר את הציון הגולמי (לפני sigmoid) לכל שורה"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        raw = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            next_node = self._next_node_table(chunk)
+            rows = np.arange(chunk.shape[0])[:, None]
+            node = np.tile(self.roots, (chunk.shape[0], 1))
+            for _ in range(self.max_depth):
+                node = next_node[rows, node]
+            raw[start:start + self.chunk_rows] = self.value[node].sum(axis=1)
+
+        if self.average_output:
+            raw /= len(self.roots)
+        return raw
+
+    def predict_proba(self, X):
+        """מחזיר מערך (n, 2) של הסתברויות [hold, buy], כמו LGBMClassifier.predict_proba"""
+        p = 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        """מחזיר תווית 0/1 לכל שורה"""
+        return (self.predict_raw(X) > 0).astype(int)
+
+
+def compile_model(model, path):
+    """
+    מקמפל מודל LightGBM ושומר אותו. מחזיר את האנסמבל המקומפל.
+    """
+    compiled = CompiledTreeEnsemble.from_lightgbm(model)
+    compiled.save(path)
+    logging.info(f"Compiled model with {len(compiled.roots)} trees saved to {path}")
+    return compiled
+
+
+class FastPathPredictor:
+    """
+    משתמש באנסמבל המקומפל לבאצ'ים קטנים (חיזוי חי), וב-LightGBM המקורי
+    לבאצ'ים גדולים (בקטסט), שם המימוש המקבילי של LightGBM מהיר יותר.
+    """
+
+    def __init__(self, model, compiled, max_rows=64):
+        self.model = model
+        self.compiled = compiled
+        self.max_rows = max_rows
+
+    def predict_proba(self, X):
+        if len(X) <= self.max_rows:
+            return self.compiled.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        if len(X) <= self.max_rows:
+            return self.compiled.predict(X)
+        return self.model.predict(X)
+
+
+def load_predictor(model, compiled_path, max_rows=64):
+    """
+    מחזיר FastPathPredictor אם קיים ארטיפקט מקומפל שתואם למודל, אחרת את המודל עצמו.
+    לשניהם יש predict_proba עם אותו ממשק.
+    """
+    if not compiled_path or not os.path.exists(compiled_path):
+        return model
+    try:
+        compiled = CompiledTreeEnsemble.load(compiled_path)
+        if compiled.source_hash != model_fingerprint(model):
+            logging.warning(f"Compiled model at {compiled_path} does not match the loaded model. Using LightGBM.")
+            return model
+        return FastPathPredictor(model, compiled, max_rows=max_rows)
+    except Exception as e:
+        logging.warning(f"Could not load compiled model from {compiled_path}: {e}")
+        return model
@@ -0,0 +1,120 @@
+"""
+feature_alignment.py - יישור פיצ'רים לעמודות המודל ונירמול בלי pandas/sklearn
+
+AlignmentPlan נבנה פעם אחת לכל גרסת מודל (בזמן הטעינה):
+- מיפוי משם פיצ'ר למיקום שלו בוקטור של המודל.
+- לכל סדר עמודות של מקור (frame הפיצ'רים) נשמרים אינדקסי המקור והיעד, כך שיישור
+  של שורה הוא העתקה אחת עם fancy indexing לתוך שורה מוקצית מראש.
+- הנירמול הוא (x - mean_) / scale_ כמערכים, במקום scaler.transform.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class AlignmentPlan:
+    """
+    Maps feature frames onto the model's column order and applies the scaler.
+
+    Matches the previous pandas path: missing columns and NaN values become 0
+    before scaling, and extra columns are ignored.
+    """
+
+    def __init__(self, selected_features: Sequence[str], scaler=None, max_layouts: int = 32):
+        self.features = tuple(selected_features)
+        self.positions = {name: i for i, name in enumerate(self.features)}
+        self.n_features = len(self.features)
+        self.scaler = scaler
+        self.mean, self.scale = self._scaler_arrays(scaler, self.n_features)
+        self.max_layouts = max_layouts
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def _scaler_arrays(scaler, n_features):
+        """mean/scale של StandardScaler; None אם הסקיילר לא ניתן לייצוג כמערכים (נשתמש ב-transform)."""
+        if scaler is None:
+            return np.zeros(n_features), np.ones(n_features)
+        if not (hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_')):
+            return None, None
+        mean = np.zeros(n_features) if scaler.mean_ is None else np.asarray(scaler.mean_, dtype=np.float64)
+        scale = np.ones(n_features) if scaler.scale_ is None else np.asarray(scaler.scale_, dtype=np.float64)
+        if mean.shape != (n_features,) or scale.shape != (n_features,):
+            return None, None
+        return mean, scale
+
+    @property
+    def vectorized(self) -> bool:
+        return self.mean is not None
+
+    def layout(self, columns: Sequence[str]):
+        """(source indices, target positions) for a column order; cached per distinct order."""
+        key = tuple(columns)
+        with self._lock:
+            cached = self._layouts.get(key)
+            if cached is not None:
+                self._layouts.move_to_end(key)
+                return cached
+
+        source, target = [], []
+        for i, name in enumerate(key):
+            position = self.positions.get(name)
+            if position is not None:
+                source.append(i)
+                target.append(position)
+        cached = (np.asarray(source, dtype=np.intp), np.asarray(target, dtype=np.intp))
+
+        with self._lock:
+            self._layouts[key] = cached
+            while len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        return cached
+
+    def _row_buffer(self) -> np.ndarray:
+        # שורה מוקצית מראש לכל thread; התוצאה המנורמלת היא תמיד מערך חדש
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = self._local.row = np.empty(self.n_features, dtype=np.float64)
+        return buffer
+
+    def align_row(self, columns: Sequence[str], values) -> np.ndarray:
+        """Fills the thread's preallocated row with the values in model order (missing/NaN -> 0)."""
+        source, target = self.layout(columns)
+        row = self._row_buffer()
+        row.fill(0.0)
+        row[target] = np.asarray(values, dtype=np.float64)[source]
+        np.nan_to_num(row, copy=False, nan=0.0)
+        return row
+
+    def align(self, columns: Sequence[str], matrix) -> np.ndarray:
+        """Multi-row variant of align_row; returns a new (n_rows, n_features) matrix."""
+        source, target = self.layout(columns)
+        matrix = np.asarray(matrix, dtype=np.float64)
+        aligned = np.zeros((matrix.shape[0], self.n_features), dtype=np.float64)
+        aligned[:, target] = matrix[:, source]
+        np.nan_to_num(aligned, copy=False, nan=0.0)
+        return aligned
+
+    def scale_rows(self, X: np.ndarray) -> np.ndarray:
+        """Applies the scaler to a 2D matrix and returns a new array."""
+        if not self.vectorized:
+            return np.asarray(self.scaler.transform(X), dtype=np.float64)
+        return (X - self.mean) / self.scale
+
+    def transform_row(self, columns: Sequence[str], values) -> np.ndarray:
+        """align_row + scaling, as a (1, n_features) matrix ready for predict_proba."""
+        return self.scale_rows(self.align_row(columns, values)[np.newaxis, :])
+
+    def verify(self, X: Optional[np.ndarray] = None, atol: float = 1e-9):
+        """Checks that the vectorized scaling matches scaler.transform (called on model load)."""
+        if self.scaler is None or not self.vectorized:
+            return
+        if X is None:
+            X = np.random.default_rng(0).normal(size=(4, self.n_features))
+        expected = np.asarray(self.scaler.transform(X), dtype=np.float64)
+        if not np.allclose(self.scale_rows(X), expected, atol=atol):
+            raise ValueError("Vectorized scaler does not match scaler.transform")
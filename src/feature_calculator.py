@@ -18,14 +18,18 @@ class FeatureCalculator:
     באופן אינדיבידואלי כדי לעקוף שגיאות באינדיקטורים ספציפיים.
     """
 
-    def add_all_possible_indicators(self, df: pd.DataFrame, verbose: bool = False, features_to_calculate: list = None) -> tuple[pd.DataFrame, dict]:
+    def add_all_possible_indicators(self, df: pd.DataFrame, verbose: bool = False, features_to_calculate: list = None,
+                                    indicator_names: list = None) -> tuple[pd.DataFrame, dict]:
         """
         הפונקציה המרכזית לחישוב פיצ'רים. מקבלת DataFrame עם עמודות
         'open', 'high', 'low', 'close', 'volume' ומחזירה tuple:
         (DataFrame עם כל האינדיקטורים שחושבו בהצלחה, dict סטטיסטיקות חישוב)
+
+        indicator_names מאפשר לחשב רשימה מדויקת של אינדיקטורים של pandas_ta
+        (למשל מתוך stats['columns_by_indicator'] של הרצה מלאה קודמת).
         """
         if df.empty:
-            stats = {"total_attempted": 0, "succeeded": 0, "failed": 0, "failed_list": []}
+            stats = {"total_attempted": 0, "succeeded": 0, "failed": 0, "failed_list": [], "columns_by_indicator": {}}
             if verbose:
                 logging.warning("Input DataFrame is empty. Returning as is.")
             return df, stats
@@ -36,7 +40,11 @@ class FeatureCalculator:
             missing = required_cols - set(df_with_features.columns)
             raise ValueError(f"Missing required OHLCV columns in DataFrame: {missing}")
 
-        if features_to_calculate:
+        if indicator_names is not None:
+            available_indicators = list(indicator_names)
+            if verbose:
+                logging.info(f"Calculating {len(available_indicators)} requested indicators.")
+        elif features_to_calculate:
             base_indicator_names = sorted(list(set([ind.split('_')[0].upper() for ind in features_to_calculate])))
             available_indicators = [name for name in base_indicator_names if hasattr(ta, name.lower())]
             if verbose:
@@ -50,10 +58,12 @@ class FeatureCalculator:
 
         successful_indicators_count = 0
         failed_indicators_details = []
+        columns_by_indicator = {}
         total_attempted = len(available_indicators)
 
         for indicator_name in available_indicators:
             try:
+                cols_before_set = set(df_with_features.columns)
                 cols_before = len(df_with_features.columns)
                 
                 # תיקון לבעיית append המיושנת - יצירת DataFrame זמני ואיחוד במקום שימוש ב-append
@@ -83,6 +93,7 @@ class FeatureCalculator:
                 cols_after = len(df_with_features.columns)
                 if cols_after > cols_before:
                     successful_indicators_count += 1
+                    columns_by_indicator[indicator_name] = [col for col in df_with_features.columns if col not in cols_before_set]
                 else:
                     failed_indicators_details.append({
                         "indicator": indicator_name,
@@ -113,7 +124,8 @@ class FeatureCalculator:
             "total_attempted": total_attempted,
             "succeeded": successful_indicators_count,
             "failed": len(failed_indicators_details),
-            "failed_list": failed_indicators_details
+            "failed_list": failed_indicators_details,
+            "columns_by_indicator": columns_by_indicator
         }
         if verbose:
             logging.info(f"Calculation summary: {stats['succeeded']} succeeded, {stats['failed']} failed out of {stats['total_attempted']} attempted.")
@@ -21,6 +21,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.utils import load_system_config
 from src.feature_calculator import FeatureCalculator
+from src.data_metadata import write_metadata
 
 # הגדרות לוגר
 log_path = 'all_features_computed.log'
@@ -74,6 +75,7 @@ def main():
         # שמירת הנתונים עם הפיצ'רים
         output_feature_file.parent.mkdir(parents=True, exist_ok=True)
         features_df.to_csv(output_feature_file)
+        write_metadata(features_df, str(output_feature_file), producer='feature_engineering')
         logging.info(f"קובץ פיצ'רים נשמר בהצלחה ב- {output_feature_file}")
         
         # שמירת דוח פיצ'רים שנכשלו
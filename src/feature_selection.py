@@ -0,0 +1,266 @@
+"""
+Fast Feature Selection Module for Algorithmic Trading Bot
+
+Histogram-based mutual information for ranking hundreds of indicator columns.
+Each column is binned once by quantiles, and the MI against the (discrete)
+target is computed from joint histograms with a single bincount per block of
+columns. Blocks run in parallel. Near-duplicate indicators are dropped before
+ranking, and results are cached on disk by data version.
+
+Also provides redundancy pruning (one representative per group of highly
+correlated columns) that runs between feature engineering and training.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+logger = logging.getLogger('feature_selection')
+
+
+def quantile_bin(X, n_bins=32):
+    """
+    Discretize every column of X into quantile bins.
+
+    Args:
+        X (array-like): 2D feature matrix
+        n_bins (int): Number of quantile bins per column
+
+    Returns:
+        np.ndarray: int32 matrix of bin ids in [0, n_bins]. NaN values get their own bin (n_bins).
+    """
+    X = np.asarray(X, dtype=np.float32)
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+
+    with warnings.catch_warnings():
+        # עמודות שכולן NaN מחזירות NaN באזהרה
+        warnings.simplefilter('ignore', RuntimeWarning)
+        edges = np.nanquantile(X, quantiles, axis=0)
+
+    binned = np.empty(X.shape, dtype=np.int32)
+    for j in range(X.shape[1]):
+        col_edges = edges[:, j]
+        if np.isnan(col_edges).any():
+            binned[:, j] = n_bins
+        else:
+            binned[:, j] = np.searchsorted(col_edges, X[:, j], side='right')
+    binned[np.isnan(X)] = n_bins
+    return binned
+
+
+def _mutual_info_block(binned_block, y_codes, n_bins_total, n_classes):
+    """MI (in nats) of each binned column in the block against the target codes."""
+    n_samples, n_cols = binned_block.shape
+    cell_count = n_bins_total * n_classes
+
+    codes = binned_block.astype(np.int64) * n_classes + y_codes[:, None]
+    codes += np.arange(n_cols, dtype=np.int64) * cell_count
+
+    joint = np.bincount(codes.ravel(), minlength=n_cols * cell_count)
+    joint = joint.reshape(n_cols, n_bins_total, n_classes) / n_samples
+    p_x = joint.sum(axis=2, keepdims=True)
+    p_y = joint.sum(axis=1, keepdims=True)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = joint * np.log(joint / (p_x * p_y))
+    return np.nansum(terms, axis=(1, 2))
+
+
+def histogram_mutual_info(X, y, n_bins=32, n_jobs=-1, block_size=64):
+    """
+    Mutual information between each column of X and a discrete target.
+
+    Args:
+        X (array-like): 2D feature matrix
+        y (array-like): Discrete target (e.g. 0/1 labels)
+        n_bins (int): Number of quantile bins per column
+        n_jobs (int): Parallel workers over column blocks (-1 = all cores)
+        block_size (int): Number of columns per block
+
+    Returns:
+        np.ndarray: MI score per column
+    """
+    binned = quantile_bin(X, n_bins)
+    _, y_codes = np.unique(np.asarray(y), return_inverse=True)
+    y_codes = y_codes.astype(np.int64)
+    n_classes = int(y_codes.max()) + 1 if len(y_codes) else 1
+    n_bins_total = n_bins + 1
+
+    starts = range(0, binned.shape[1], block_size)
+    blocks = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_mutual_info_block)(binned[:, s:s + block_size], y_codes, n_bins_total, n_classes)
+        for s in starts
+    )
+    return np.concatenate(blocks) if blocks else np.array([])
+
+
+def _standardize_float32(X_df):
+    """Standardize columns to zero mean / unit variance in float32. NaN -> 0 (mean imputation)."""
+    X = X_df.to_numpy(dtype=np.float32, na_value=np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nan_to_num(np.nanmean(X, axis=0))
+        std = np.nan_to_num(np.nanstd(X, axis=0))
+    Z = (X - mean) / np.where(std > 0, std, 1).astype(np.float32)
+    return np.nan_to_num(Z, copy=False)
+
+
+def correlated_feature_groups(X_df, threshold=0.95, block_size=256):
+    """
+    Group columns whose absolute correlation exceeds the threshold (single linkage).
+
+    The correlation matrix is never materialized: it is computed in float32
+    blocks of block_size x block_size columns and only the pairs above the
+    threshold are kept, so memory is O(rows * cols + block_size^2).
+
+    Args:
+        X_df (pd.DataFrame): Feature matrix
+        threshold (float): Absolute correlation above which two columns are linked
+        block_size (int): Number of columns per block
+
+    Returns:
+        list: Groups of column positions (each a sorted list), in order of first column
+    """
+    Z = _standardize_float32(X_df)
+    n_rows, n_cols = Z.shape
+    parent = list(range(n_cols))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i0 in range(0, n_cols, block_size):
+        Zi = Z[:, i0:i0 + block_size]
+        for j0 in range(i0, n_cols, block_size):
+            corr = np.abs(Zi.T @ Z[:, j0:j0 + block_size]) / max(n_rows, 1)
+            rows, cols = np.nonzero(corr > threshold)
+            for a, b in zip(rows + i0, cols + j0):
+                if a < b:
+                    root_a, root_b = find(a), find(b)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for i in range(n_cols):
+        groups.setdefault(find(i), []).append(i)
+    return [groups[root] for root in sorted(groups)]
+
+
+def prune_redundant_features(df, feature_cols, threshold=0.95, block_size=256):
+    """
+    Keep one representative column per group of highly correlated features.
+
+    The representative is the column with the fewest missing values; ties go to
+    the column that appears first in feature_cols.
+
+    Args:
+        df (pd.DataFrame): Data containing the feature columns
+        feature_cols (list): Candidate feature columns
+        threshold (float): Absolute correlation above which columns are redundant
+        block_size (int): Number of columns per correlation block
+
+    Returns:
+        tuple: (list of kept columns in original order, dict representative -> dropped columns)
+    """
+    if len(feature_cols) < 2:
+        return list(feature_cols), {}
+
+    X_df = df[feature_cols]
+    missing = X_df.isna().sum().to_numpy()
+
+    kept_idx = []
+    dropped = {}
+    for group in correlated_feature_groups(X_df, threshold, block_size):
+        representative = min(group, key=lambda i: (missing[i], i))
+        kept_idx.append(representative)
+        if len(group) > 1:
+            dropped[feature_cols[representative]] = [feature_cols[i] for i in group if i != representative]
+
+    kept = [feature_cols[i] for i in sorted(kept_idx)]
+    logger.info(f"Redundancy pruning kept {len(kept)} of {len(feature_cols)} features "
+                f"({len(dropped)} correlated groups, threshold={threshold})")
+    return kept, dropped
+
+
+def correlation_prefilter(X_df, threshold=0.98):
+    """
+    Drop near-duplicate columns (|corr| > threshold), keeping one per group.
+
+    Args:
+        X_df (pd.DataFrame): Feature matrix
+        threshold (float): Absolute correlation above which a column is redundant
+
+    Returns:
+        list: Names of the columns to keep
+    """
+    kept, _ = prune_redundant_features(X_df, list(X_df.columns), threshold)
+    return kept
+
+
+def data_version(X_df, y):
+    """
+    Content hash of the feature matrix, its column names and the target.
+
+    Returns:
+        str: Hex digest identifying this exact data
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([str(c) for c in X_df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(X_df, index=True).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def rank_features(X_df, y, n_bins=32, corr_threshold=0.98, cache_dir=None, n_jobs=-1):
+    """
+    Rank features by histogram mutual information after dropping near-duplicates.
+
+    Args:
+        X_df (pd.DataFrame): Numeric feature matrix
+        y (pd.Series): Discrete target
+        n_bins (int): Number of quantile bins per column
+        corr_threshold (float): Near-duplicate threshold for the correlation prefilter (None to disable)
+        cache_dir (str, optional): Directory for cached scores keyed by data version
+        n_jobs (int): Parallel workers
+
+    Returns:
+        dict: Feature name -> MI score, sorted from best to worst
+    """
+    cache_path = None
+    if cache_dir:
+        params_key = f"bins{n_bins}_corr{corr_threshold}"
+        cache_path = os.path.join(cache_dir, f"mi_{data_version(X_df, y)}_{params_key}.json")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    scores = json.load(f)
+                logger.info(f"Loaded cached feature scores from {cache_path}")
+                return scores
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable feature score cache {cache_path}: {e}")
+
+    columns = correlation_prefilter(X_df, corr_threshold) if corr_threshold else list(X_df.columns)
+    logger.info(f"Correlation prefilter kept {len(columns)} of {X_df.shape[1]} columns")
+
+    mi = histogram_mutual_info(X_df[columns].to_numpy(dtype=np.float32, na_value=np.nan), y,
+                               n_bins=n_bins, n_jobs=n_jobs)
+    order = np.argsort(-mi, kind='stable')
+    scores = {str(columns[i]): float(mi[i]) for i in order}
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(scores, f)
+        except Exception as e:
+            logger.warning(f"Could not write feature score cache {cache_path}: {e}")
+
+    return scores
@@ -0,0 +1,302 @@
+"""
+health_monitor.py - דגימת בריאות המערכת ברקע
+
+thread אחד דוגם כל interval שניות את האותות האמיתיים של המערכת:
+- data: טריות קובצי הברים ב-data/raw (הבר האחרון וזמן הכתיבה)
+- model: גיל מודל האלוף וזמני החיזוי מ-/status של model_api
+- processes: תהליכים פעילים / שנפלו מתוך ProcessManager
+- gateway: חיבור TCP ל-IBKR Gateway (host/port מ-ibkr_settings)
+
+כל דגימה נשמרת כתמונה אחרונה, וערכים מספריים נכנסים לסדרות זמן בגודל קבוע
+(ring buffer), כך שנתיבי הבריאות רק קוראים מהזיכרון ולא מריצים בדיקות יקרות.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    from src.data_metadata import read_metadata
+    from src.log_reader import tail_lines
+except ImportError:
+    from data_metadata import read_metadata
+    from log_reader import tail_lines
+
+STATUS_ORDER = ('healthy', 'warning', 'error')
+
+
+def worst_status(statuses) -> str:
+    """'error' > 'warning' > 'healthy' (unknown values count as warning)."""
+    worst = 'healthy'
+    for status in statuses:
+        rank = STATUS_ORDER.index(status) if status in STATUS_ORDER else 1
+        if rank > STATUS_ORDER.index(worst):
+            worst = STATUS_ORDER[rank]
+    return worst
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    text = str(value).strip().strip('"')
+    for candidate in (text, text[:19], text[:10]):
+        try:
+            return datetime.fromisoformat(candidate.replace(' ', 'T') if len(candidate) > 10 else candidate)
+        except ValueError:
+            continue
+    return None
+
+
+class TimeSeries:
+    """Bounded ring buffer of (unix time, value)."""
+
+    def __init__(self, maxlen: int):
+        self.points = deque(maxlen=maxlen)
+
+    def append(self, value, at: Optional[float] = None):
+        self.points.append((at if at is not None else time.time(), value))
+
+    def since(self, since: Optional[float] = None) -> List[list]:
+        return [[t, v] for t, v in list(self.points) if since is None or t > since]
+
+
+class HealthMonitor:
+    """
+    Samples health probes in a background thread and keeps the latest result and
+    ring-buffer time series per metric. Reads (snapshot / series) never probe.
+    """
+
+    def __init__(self, base_dir: str, config: dict, process_manager=None,
+                 model_api_url: Optional[str] = None, http_get: Optional[Callable] = None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.config = config
+        self.process_manager = process_manager
+        api_settings = config.get('api_settings', {})
+        health_settings = api_settings.get('health', {})
+        self.interval = float(health_settings.get('interval_seconds', 15))
+        self.history = int(health_settings.get('history', 240))
+        self.max_data_age_hours = float(health_settings.get('max_data_age_hours', 96))
+        self.max_model_age_days = float(health_settings.get('max_model_age_days', 30))
+        self.slow_prediction_ms = float(api_settings.get('metrics', {}).get('slow_request_ms', 250))
+
+        if model_api_url is None:
+            host = api_settings.get('host', '127.0.0.1')
+            host = '127.0.0.1' if host in ('0.0.0.0', '') else host
+            model_api_url = f"http://{host}:{api_settings.get('port', 5000)}"
+        self.model_api_url = model_api_url.rstrip('/')
+        self._http_get = http_get
+
+        self.probes: Dict[str, Callable[[], dict]] = {
+            'data': self.probe_data,
+            'model': self.probe_model,
+            'processes': self.probe_processes,
+            'gateway': self.probe_gateway
+        }
+        self.latest: Dict[str, dict] = {}
+        self.series: Dict[str, TimeSeries] = {}
+        self.started_at = time.time()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _path(self, key: str, default: str) -> str:
+        path = self.config.get('system_paths', {}).get(key, default)
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    # --- בדיקות ---
+    def probe_data(self) -> dict:
+        files = {}
+        errors, warnings = [], []
+        now = datetime.now()
+        for key, default in (('raw_data', 'data/raw/SPY_ibkr.csv'), ('vix_data', 'data/raw/VIX_ibkr.csv')):
+            path = self._path(key, default)
+            name = os.path.basename(path)
+            if not os.path.exists(path):
+                errors.append(f"{name} not found")
+                files[name] = {"exists": False}
+                continue
+            metadata = read_metadata(path) or {}
+            last_bar = metadata.get('max_date')
+            if not last_bar:
+                # בלי sidecar תקף: העמודה הראשונה בשורה האחרונה היא תאריך הבר
+                last_line = tail_lines(path, 1)
+                last_bar = last_line[0].split(',')[0] if last_line else None
+            last_bar_time = _parse_time(last_bar)
+            modified = datetime.fromtimestamp(os.path.getmtime(path))
+            age_hours = (now - (last_bar_time or modified)).total_seconds() / 3600
+            if age_hours > self.max_data_age_hours:
+                warnings.append(f"{name} is stale ({age_hours:.1f}h old)")
+            files[name] = {
+                "exists": True,
+                "rows": metadata.get('rows'),
+                "last_bar": last_bar_time.isoformat() if last_bar_time else last_bar,
+                "modified": modified.isoformat(),
+                "age_hours": round(age_hours, 2),
+                "size_bytes": os.path.getsize(path)
+            }
+        ages = [f['age_hours'] for f in files.values() if f.get('exists')]
+        return {
+            "status": 'error' if errors else ('warning' if warnings else 'healthy'),
+            "files": files,
+            "max_age_hours": max(ages) if ages else None,
+            "errors": errors,
+            "warnings": warnings
+        }
+
+    def _fetch_model_status(self) -> Optional[dict]:
+        if self._http_get is None:
+            import requests
+            self._http_get = requests.get
+        response = self._http_get(f"{self.model_api_url}/status", timeout=2)
+        return response.json() if getattr(response, 'status_code', 200) == 200 else None
+
+    def probe_model(self) -> dict:
+        errors, warnings = [], []
+        model_path = self._path('champion_model', 'models/champion_model.pkl')
+        config_path = self._path('champion_config', 'models/champion_model_config.json')
+
+        age_days = trained_at = None
+        if os.path.exists(model_path):
+            trained_at = datetime.fromtimestamp(os.path.getmtime(model_path))
+            age_days = (datetime.now() - trained_at).total_seconds() / 86400
+            if age_days > self.max_model_age_days:
+                warnings.append(f"Champion model is {age_days:.0f} days old")
+        else:
+            errors.append("Champion model not found")
+
+        champion = {}
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                champion = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        api_status, latency = None, {}
+        try:
+            api_status = self._fetch_model_status()
+        except Exception as e:
+            warnings.append(f"Model API unreachable: {e.__class__.__name__}")
+        if api_status:
+            latency = (api_status.get('latency_ms') or {}).get('predict', {}).get('total', {})
+            if not api_status.get('model_loaded'):
+                errors.append("Model API has no model loaded")
+            p99 = latency.get('p99_ms')
+            if p99 is not None and p99 == p99 and p99 > self.slow_prediction_ms:
+                warnings.append(f"Prediction p99 latency {p99:.0f}ms")
+
+        return {
+            "status": 'error' if errors else ('warning' if warnings else 'healthy'),
+            "model_version": (api_status or {}).get('model_version') or champion.get('training_run_timestamp'),
+            "trained_at": trained_at.isoformat() if trained_at else None,
+            "age_days": round(age_days, 2) if age_days is not None else None,
+            "feature_count": len(champion.get('selected_features') or []),
+            "api_reachable": api_status is not None,
+            "prediction_latency_ms": latency,
+            "errors": errors,
+            "warnings": warnings
+        }
+
+    def probe_processes(self) -> dict:
+        processes = self.process_manager.get_all_processes() if self.process_manager else []
+        running = [p for p in processes if p.get('status') == 'running']
+        failed = [p for p in processes if p.get('status') != 'running' and p.get('exit_code') not in (0, None)]
+        return {
+            "status": 'warning' if failed else 'healthy',
+            "running": len(running),
+            "total": len(processes),
+            "processes": {p['id']: {"status": p.get('status'), "exit_code": p.get('exit_code')} for p in processes},
+            "errors": [],
+            "warnings": [f"{p['id']} exited with code {p['exit_code']}" for p in failed]
+        }
+
+    def probe_gateway(self) -> dict:
+        settings = self.config.get('ibkr_settings', {})
+        host, port = settings.get('host', '127.0.0.1'), int(settings.get('port', 4001))
+        start = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=1.0):
+                connect_ms = (time.perf_counter() - start) * 1000
+            connected, error = True, None
+        except OSError as e:
+            connect_ms, connected, error = None, False, str(e)
+        return {
+            "status": 'healthy' if connected else 'error',
+            "host": host,
+            "port": port,
+            "connected": connected,
+            "connect_ms": round(connect_ms, 2) if connect_ms is not None else None,
+            "errors": [f"Gateway {host}:{port} unreachable: {error}"] if error else [],
+            "warnings": []
+        }
+
+    # --- דגימה ---
+    def _record(self, name: str, value, at: float):
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = TimeSeries(self.history)
+        series.append(value, at)
+
+    def sample(self) -> dict:
+        """Runs every probe once and appends the numeric results to the time series."""
+        results = {}
+        for name, probe in self.probes.items():
+            start = time.perf_counter()
+            try:
+                result = probe()
+            except Exception as e:
+                logging.error(f"Health probe '{name}' failed: {e}")
+                result = {"status": 'error', "errors": [str(e)], "warnings": []}
+            result['checked_at'] = datetime.now().isoformat()
+            result['probe_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            results[name] = result
+
+        now = time.time()
+        with self._lock:
+            self.latest = results
+            self.samples += 1
+            self._record('data.max_age_hours', results['data'].get('max_age_hours'), now)
+            self._record('model.predict_p50_ms', results['model'].get('prediction_latency_ms', {}).get('p50_ms'), now)
+            self._record('model.predict_p99_ms', results['model'].get('prediction_latency_ms', {}).get('p99_ms'), now)
+            self._record('processes.running', results['processes'].get('running'), now)
+            self._record('gateway.connected', 1 if results['gateway'].get('connected') else 0, now)
+            self._record('gateway.connect_ms', results['gateway'].get('connect_ms'), now)
+        return results
+
+    def start(self):
+        """Background sampling thread (idempotent); the first sample is taken immediately."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.sample()
+                except Exception as e:
+                    logging.error(f"Health monitor sample failed: {e}")
+                time.sleep(self.interval)
+
+        self._thread = threading.Thread(target=run, name='health-monitor', daemon=True)
+        self._thread.start()
+
+    # --- קריאה ---
+    def snapshot(self) -> dict:
+        with self._lock:
+            latest = dict(self.latest)
+            samples = self.samples
+        return {
+            "status": worst_status(r.get('status') for r in latest.values()) if latest else 'unknown',
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "samples": samples,
+            "components": latest
+        }
+
+    def get_series(self, names: Optional[List[str]] = None, since: Optional[float] = None) -> dict:
+        with self._lock:
+            return {name: series.since(since) for name, series in self.series.items()
+                    if not names or name in names}
@@ -0,0 +1,316 @@
+"""
+job_runner.py - הרצת משימות ארוכות (איסוף, עיבוד מקדים, בקטסט) ברקע
+
+נתיבי /api/run/* מגישים משימה ל-JobRunner ומחזירים מיד מזהה משימה.
+- מאגר threads מוגבל (ThreadPoolExecutor); משימות מעבר לו ממתינות בתור במצב queued.
+- כל משימה מקבלת JobContext: progress(fraction, message) ו-check_cancelled().
+  הודעות logging שנכתבות מתוך ה-thread של המשימה נרשמות אוטומטית כהודעות התקדמות,
+  כך שגם פונקציות קיימות שלא מכירות את JobContext מדווחות מה הן עושות.
+- ביטול: משימה בתור מתבטלת מיד; משימה רצה מסומנת ונעצרת בנקודת הבדיקה הבאה.
+  משימות שהוגשו עם cancellable=False (פונקציות קיימות בלי נקודות בדיקה, שכותבות קבצים)
+  אי אפשר לעצור אחרי שהתחילו: cancel() זורק JobNotCancellable והן נרשמות לפי התוצאה בפועל.
+- מצב המשימות והתוצאות נשמרים ב-SQLite; משימות שלא הסתיימו לפני הפעלה מחדש מסומנות interrupted.
+- כל שינוי מדווח ל-on_event (למשל socketio.emit של 'job_update').
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ACTIVE_STATES = ('queued', 'running')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL,
+    message TEXT,
+    params TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs(kind, status);
+"""
+
+JOB_FIELDS = ('id', 'kind', 'status', 'progress', 'message', 'params', 'result', 'error',
+              'created_at', 'started_at', 'finished_at')
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at a cancellation checkpoint."""
+
+
+class JobNotCancellable(Exception):
+    """Raised by JobRunner.cancel for a running job that has no cancellation checkpoints."""
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class JobContext:
+    """Handle passed to a running job for progress reports and cancellation checks."""
+
+    def __init__(self, runner: "JobRunner", job_id: str, cancellable: bool = True):
+        self._runner = runner
+        self.job_id = job_id
+        self.cancellable = cancellable
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, fraction: Optional[float] = None, message: Optional[str] = None):
+        """fraction in [0, 1] (None keeps the previous value); also a cancellation checkpoint."""
+        self._runner._update_progress(self.job_id, fraction, message)
+        self.check_cancelled()
+
+
+class _JobLogHandler(logging.Handler):
+    """Routes log records emitted on a job's worker thread to that job's progress message."""
+
+    def __init__(self, runner: "JobRunner"):
+        super().__init__(level=logging.INFO)
+        self.runner = runner
+
+    def emit(self, record):
+        job_id = self.runner._thread_jobs.get(record.thread)
+        if job_id is not None:
+            try:
+                self.runner._update_progress(job_id, None, record.getMessage())
+            except Exception:
+                self.handleError(record)
+
+
+class JobRunner:
+    """Bounded background job pool with persistence, progress and cancellation."""
+
+    def __init__(self, db_path: str, max_workers: int = 2, on_event: Optional[Callable[[str, dict], None]] = None,
+                 event_interval: float = 0.5, history: int = 500):
+        self.db_path = db_path
+        self.on_event = on_event
+        self.event_interval = event_interval
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        self._futures = {}
+        self._thread_jobs: Dict[int, str] = {}
+        self._last_event: Dict[str, float] = {}
+
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            # משימות שרצו כשהשרת נעצר לא ימשיכו לרוץ
+            conn.execute(
+                f"UPDATE jobs SET status = 'interrupted', finished_at = ? "
+                f"WHERE status IN ({','.join('?' * len(ACTIVE_STATES))})",
+                (_now(), *ACTIVE_STATES)
+            )
+
+        self._log_handler = _JobLogHandler(self)
+        logging.getLogger().addHandler(self._log_handler)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- שמירה ודיווח ---
+    def _persist(self, job: dict):
+        row = dict(job)
+        row['params'] = json.dumps(row.get('params'), default=str)
+        row['result'] = json.dumps(row.get('result'), default=str) if row.get('result') is not None else None
+        with closing(self._connect()) as conn, conn:
+            # upsert (לא REPLACE) שומר על ה-rowid, שמשמש לסדר ההגשה בתוך אותה שנייה
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{f} = excluded.{f}' for f in JOB_FIELDS[1:])}",
+                tuple(row.get(field) for field in JOB_FIELDS)
+            )
+            if job['status'] not in ACTIVE_STATES:
+                conn.execute(
+                    "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.history,)
+                )
+
+    def _emit(self, job: dict, force: bool = True):
+        if self.on_event is None:
+            return
+        now = time.monotonic()
+        # עדכוני התקדמות תכופים (שורת לוג לכל עסקה) מאוחדים לאירוע אחד לכל event_interval
+        if not force and now - self._last_event.get(job['id'], 0.0) < self.event_interval:
+            return
+        self._last_event[job['id']] = now
+        try:
+            self.on_event('job_update', dict(job))
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Job event delivery failed: {e}")
+
+    def _set(self, job_id: str, persist: bool = True, **fields) -> dict:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            snapshot = dict(job)
+        if persist:
+            self._persist(snapshot)
+        self._emit(snapshot)
+        return snapshot
+
+    def _update_progress(self, job_id: str, fraction: Optional[float], message: Optional[str]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if fraction is not None:
+                job['progress'] = round(max(0.0, min(1.0, float(fraction))), 4)
+            if message is not None:
+                job['message'] = message[:500]
+            snapshot = dict(job)
+        self._emit(snapshot, force=False)
+
+    # --- הגשה והרצה ---
+    def submit(self, kind: str, func: Callable[[JobContext], object], params: Optional[dict] = None,
+               exclusive: bool = True, cancellable: bool = True) -> dict:
+        """
+        Queues func(ctx). With exclusive=True an already queued/running job of the same
+        kind is returned instead of starting a second one. cancellable=False marks a func
+        that never reaches a checkpoint once started; it can then only be cancelled while queued.
+        """
+        with self._lock:
+            if exclusive:
+                for job in self._jobs.values():
+                    if job['kind'] == kind and job['status'] in ACTIVE_STATES:
+                        return dict(job)
+            job_id = f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            job = {
+                'id': job_id, 'kind': kind, 'status': 'queued', 'progress': 0.0, 'message': None,
+                'params': params or {}, 'result': None, 'error': None,
+                'created_at': _now(), 'started_at': None, 'finished_at': None
+            }
+            self._jobs[job_id] = job
+            self._contexts[job_id] = JobContext(self, job_id, cancellable)
+            snapshot = dict(job)
+        self._persist(snapshot)
+        self._emit(snapshot)
+        future = self._executor.submit(self._run, job_id, func)
+        with self._lock:
+            self._futures[job_id] = future
+        return snapshot
+
+    def _run(self, job_id: str, func: Callable[[JobContext], object]):
+        context = self._contexts.get(job_id)
+        if context is None or context.cancelled:
+            # בוטלה בזמן שהייתה בתור
+            if context is not None:
+                self._set(job_id, status='cancelled', finished_at=_now())
+                self._forget(job_id)
+            return
+        thread_id = threading.get_ident()
+        self._thread_jobs[thread_id] = job_id
+        self._set(job_id, status='running', started_at=_now())
+        try:
+            result = func(context)
+            # פונקציות קיימות מחזירות {'status': 'error', ...} במקום לזרוק חריגה
+            if isinstance(result, dict) and (result.get('status') == 'error' or 'error' in result):
+                self._set(job_id, status='failed', result=result, finished_at=_now(),
+                          error=str(result.get('message') or result.get('error')))
+            else:
+                # ביטול שלא נתפס בנקודת בדיקה: העבודה הושלמה, וכך היא נרשמת
+                self._set(job_id, status='succeeded', progress=1.0, result=result, finished_at=_now())
+        except JobCancelled:
+            self._set(job_id, status='cancelled', finished_at=_now())
+        except Exception as e:
+            logging.getLogger(__name__).exception(f"Job {job_id} failed")
+            self._set(job_id, status='failed', error=f"{e.__class__.__name__}: {e}", finished_at=_now())
+        finally:
+            self._thread_jobs.pop(thread_id, None)
+            self._forget(job_id)
+
+    def _forget(self, job_id: str):
+        """Finished jobs are served from SQLite; only active ones stay in memory."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._contexts.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            self._last_event.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancels a queued job immediately, or asks a running job to stop at its next checkpoint.
+        Raises JobNotCancellable for a running job submitted with cancellable=False.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            context = self._contexts.get(job_id)
+            future = self._futures.get(job_id)
+            queued = job is not None and job['status'] == 'queued'
+            if job is not None and not queued and context is not None and not context.cancellable:
+                raise JobNotCancellable(f"Job {job_id} is already running and cannot be cancelled")
+            if context is not None:
+                context.cancel_event.set()
+        if job is None:
+            # כבר הסתיימה (או לא קיימת)
+            return self.get(job_id)
+        if queued and (future is None or future.cancel()):
+            job = self._set(job_id, status='cancelled', finished_at=_now())
+            self._forget(job_id)
+            return job
+        return self._set(job_id, persist=False, message='Cancellation requested')
+
+    # --- שאילתות ---
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = dict(row)
+        for field in ('params', 'result'):
+            if job.get(field):
+                job[field] = json.loads(job[field])
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            if job_id in self._jobs:
+                return dict(self._jobs[job_id])
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Newest first; live state for jobs of this process, persisted rows for older ones."""
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT * FROM jobs{where} ORDER BY rowid DESC LIMIT ?",
+                                params + [int(limit)]).fetchall()
+        jobs = []
+        with self._lock:
+            for row in rows:
+                live = self._jobs.get(row['id'])
+                jobs.append(dict(live) if live else None)
+        return [job if job is not None else self._row_to_job(row) for job, row in zip(jobs, rows)]
+
+    def shutdown(self, wait: bool = False):
+        logging.getLogger().removeHandler(self._log_handler)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
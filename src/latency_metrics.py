@@ -0,0 +1,179 @@
+"""
+latency_metrics.py - מדידת זמנים לפי שלב בבקשות חיזוי
+
+כל בקשה מקבלת RequestTrace שמודד שלבים (parse, features, align, scale, predict).
+בסוף הבקשה הזמנים נרשמים ב-LatencyMetrics:
+- היסטוגרמות מצטברות בפורמט Prometheus (buckets, sum, count) לכל endpoint ושלב.
+- חלון מתגלגל של המדידות האחרונות, שממנו מחושבים p50/p90/p99.
+בקשות איטיות נכתבות (בדגימה) ללוג נפרד עם פירוק לפי שלבים.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RequestTrace:
+    """Stage timings of one request."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+
+class _Series:
+    """Histogram + rolling window for one (endpoint, stage)."""
+
+    def __init__(self, buckets, window):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, buckets, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, upper in enumerate(buckets):
+            if value <= upper:
+                self.bucket_counts[i] += 1
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class LatencyMetrics:
+    """
+    Collects per-stage latencies and renders them in the Prometheus text format.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1024, slow_request_ms: float = 250,
+                 slow_sample_rate: float = 1.0, slow_log_path: Optional[str] = None, prefix: str = 'model_api'):
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self.slow_request_seconds = slow_request_ms / 1000.0
+        self.slow_sample_rate = slow_sample_rate
+        self.prefix = prefix
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._status_counts: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+        self.slow_logger = logging.getLogger(f'{prefix}.slow_requests')
+        if slow_log_path and not self.slow_logger.handlers:
+            handler = logging.FileHandler(slow_log_path, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self.slow_logger.addHandler(handler)
+            self.slow_logger.propagate = False
+            self.slow_logger.setLevel(logging.INFO)
+
+    @classmethod
+    def from_config(cls, api_settings: dict, slow_log_path: Optional[str] = None) -> "LatencyMetrics":
+        """יוצר אוסף מדדים מתוך api_settings['metrics']"""
+        metrics_config = api_settings.get('metrics', {})
+        return cls(
+            window=int(metrics_config.get('window', 1024)),
+            slow_request_ms=float(metrics_config.get('slow_request_ms', 250)),
+            slow_sample_rate=float(metrics_config.get('slow_sample_rate', 1.0)),
+            slow_log_path=slow_log_path
+        )
+
+    def observe(self, endpoint: str, stage: str, seconds: float):
+        with self._lock:
+            series = self._series.get((endpoint, stage))
+            if series is None:
+                series = self._series[(endpoint, stage)] = _Series(self.buckets, self.window)
+            series.observe(self.buckets, seconds)
+
+    def record(self, trace: RequestTrace, status_code: int = 200, detail: Optional[dict] = None):
+        """Records every stage of a finished request plus its total, and logs it if slow."""
+        total = trace.total()
+        for stage, seconds in trace.stages.items():
+            self.observe(trace.endpoint, stage, seconds)
+        self.observe(trace.endpoint, 'total', total)
+        with self._lock:
+            key = (trace.endpoint, status_code)
+            self._status_counts[key] = self._status_counts.get(key, 0) + 1
+
+        if total >= self.slow_request_seconds and random.random() < self.slow_sample_rate:
+            self.slow_logger.warning(json.dumps({
+                "endpoint": trace.endpoint,
+                "status": status_code,
+                "total_ms": round(total * 1000, 2),
+                "stages_ms": {k: round(v * 1000, 2) for k, v in trace.stages.items()},
+                **(detail or {})
+            }))
+
+    def summary(self) -> dict:
+        """p50/p90/p99 (ms) of the rolling window per endpoint and stage."""
+        with self._lock:
+            snapshot = {key: sorted(series.recent) for key, series in self._series.items()}
+        result = {}
+        for (endpoint, stage), values in snapshot.items():
+            result.setdefault(endpoint, {})[stage] = {
+                f"p{int(q * 100)}_ms": round(_quantile(values, q) * 1000, 3) for q in QUANTILES
+            }
+        return result
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        name = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of each prediction stage in seconds.",
+            f"# TYPE {name} histogram"
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+            windows = {key: sorted(series.recent) for key, series in items}
+            status_counts = sorted(self._status_counts.items())
+
+            for (endpoint, stage), series in items:
+                labels = f'endpoint="{endpoint}",stage="{stage}"'
+                for upper, count in zip(self.buckets, series.bucket_counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{upper}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series.count}')
+                lines.append(f'{name}_sum{{{labels}}} {series.sum:.9f}')
+                lines.append(f'{name}_count{{{labels}}} {series.count}')
+
+        recent = f"{self.prefix}_stage_recent_seconds"
+        lines += [
+            f"# HELP {recent} Quantiles of the last {self.window} observations of each stage.",
+            f"# TYPE {recent} summary"
+        ]
+        for (endpoint, stage), values in windows.items():
+            labels = f'endpoint="{endpoint}",stage="{stage}"'
+            for q in QUANTILES:
+                lines.append(f'{recent}{{{labels},quantile="{q}"}} {_quantile(values, q):.9f}')
+            lines.append(f'{recent}_sum{{{labels}}} {sum(values):.9f}')
+            lines.append(f'{recent}_count{{{labels}}} {len(values)}')
+
+        requests_name = f"{self.prefix}_requests_total"
+        lines += [
+            f"# HELP {requests_name} Requests by endpoint and HTTP status.",
+            f"# TYPE {requests_name} counter"
+        ]
+        for (endpoint, status), count in status_counts:
+            lines.append(f'{requests_name}{{endpoint="{endpoint}",status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
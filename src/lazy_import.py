@@ -0,0 +1,51 @@
+"""
+lazy_import.py - ייבוא עצל של מודולים כבדים
+
+    pd = lazy_import('pandas')
+
+מחזיר אובייקט מודול שהקוד שלו רץ רק בגישה הראשונה לאחד המאפיינים שלו,
+כך ששרתים (model_api, api_server) עולים ומשרתים /status בלי לחכות ל-pandas,
+LightGBM או pandas_ta.
+"""
+
+import importlib.util
+import sys
+import threading
+
+
+def lazy_import(name: str):
+    """
+    Returns the module `name`, deferring its execution until first attribute access.
+    If the module was already imported, the real module is returned.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def warm_imports(*names: str) -> threading.Thread:
+    """
+    מייבא מודולים ב-thread ברקע (אחרי שהשרת כבר עלה), כדי שהבקשה הראשונה
+    לא תשלם את זמן הייבוא.
+    """
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                # מודול שחסר יזרוק שגיאה בשימוש הראשון, במקום המתאים
+                pass
+
+    thread = threading.Thread(target=run, name='warm-imports', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,316 @@
+"""
+log_index.py - אינדקס חיפוש לקבצי הלוג (SQLite FTS5)
+
+כל שורה בקובצי logs/*.log נשמרת עם קובץ, מספר שורה, byte offset, זמן ורמה,
+וטקסט ההודעה נכנס לטבלת FTS5 (אינדקס הפוך של מילים). שורות המשך (traceback)
+יורשות את הזמן והרמה של שורת הכותרת האחרונה באותו קובץ.
+
+העדכון מצטבר: לכל קובץ נשמר ה-offset שאונדקס, ורק בתים חדשים נקראים (read_since).
+קובץ שהתקצר או הוחלף (rotation) מאונדקס מחדש מההתחלה.
+
+המעבר הראשון על logs/ רץ ב-thread הרקע (start); כל בלוק נשמר (commit) בנפרד, כך
+שחיפושים מוגשים ממה שכבר אונדקס. initial_pass_done מסמן שהמעבר הראשון הסתיים.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+try:
+    from src.log_reader import read_since
+except ImportError:
+    from log_reader import read_since
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# תומך בפורמטים של הפרויקט:
+#   2024-01-02 10:00:00,123 INFO msg
+#   [2024-01-02 10:00:00,123] [INFO] msg
+#   2024-01-02 10:00:00,123 [INFO] msg
+#   2024-01-02 10:00:00,123 - name - INFO - msg
+LINE_PATTERN = re.compile(
+    r'^\[?(?P<ts>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[,.]\d+)?)\]?'
+    r'(?:\s+-\s+[\w.]+)?\s*(?:-\s*)?\[?(?P<level>DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL)\]?\s*[-:]?\s?(?P<msg>.*)$'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    inode INTEGER,
+    offset INTEGER NOT NULL DEFAULT 0,
+    lines INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL,
+    last_ts TEXT,
+    last_level TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    ts TEXT,
+    level TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_file ON entries(file_id, id);
+CREATE INDEX IF NOT EXISTS entries_level_ts ON entries(level, ts);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(message, tokenize='unicode61');
+"""
+
+
+def parse_line(line: str):
+    """(timestamp 'YYYY-MM-DD HH:MM:SS[.fff]', level, message) or (None, None, line) for continuation lines."""
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return None, None, line
+    ts = match.group('ts').replace('T', ' ').replace(',', '.')
+    level = match.group('level')
+    return ts, 'WARNING' if level == 'WARN' else level, match.group('msg')
+
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """ISO input ('2024-01-02T10:00') -> the stored 'YYYY-MM-DD HH:MM:SS' form for range comparisons."""
+    if not value:
+        return None
+    return value.strip().replace('T', ' ')
+
+
+def fts_query(text: str) -> str:
+    """User text -> FTS5 query: every word must appear (quoted, so operators in the text are literal)."""
+    words = [w for w in re.split(r'\s+', text.strip()) if w]
+    return ' '.join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+class LogIndexer:
+    """
+    Incremental SQLite FTS5 index of a logs directory.
+    A connection is opened per call, so the indexer can be shared across request threads.
+    """
+
+    def __init__(self, logs_dir: str, db_path: str, patterns: Iterable[str] = ('.log',),
+                 batch_bytes: int = 4 * 1024 * 1024):
+        self.logs_dir = os.path.abspath(logs_dir)
+        self.db_path = os.path.abspath(db_path)
+        self.patterns = tuple(patterns)
+        self.batch_bytes = batch_bytes
+        self._write_lock = threading.Lock()
+        self._last_update = 0.0
+        self._thread = None
+        self.initial_pass_done = threading.Event()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _log_files(self) -> List[str]:
+        if not os.path.isdir(self.logs_dir):
+            return []
+        files = []
+        for name in sorted(os.listdir(self.logs_dir)):
+            path = os.path.join(self.logs_dir, name)
+            # כולל קבצים מסובבים (api_server.log.1)
+            if os.path.isfile(path) and any(p in name for p in self.patterns):
+                files.append(path)
+        return files
+
+    # --- אינדוקס ---
+    def _reset_file(self, conn, file_id: int):
+        conn.execute("DELETE FROM entries_fts WHERE rowid IN (SELECT id FROM entries WHERE file_id = ?)", (file_id,))
+        conn.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+        conn.execute("UPDATE files SET offset = 0, lines = 0, last_ts = NULL, last_level = NULL WHERE id = ?",
+                     (file_id,))
+
+    def _index_file(self, conn, path: str) -> int:
+        stat = os.stat(path)
+        row = conn.execute("SELECT * FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            file_id = conn.execute("INSERT INTO files (path, inode) VALUES (?, ?)", (path, stat.st_ino)).lastrowid
+            offset, line_no, last_ts, last_level = 0, 0, None, None
+        else:
+            file_id = row['id']
+            if row['inode'] != stat.st_ino or stat.st_size < row['offset']:
+                # rotation / truncation: מתחילים את הקובץ מחדש
+                self._reset_file(conn, file_id)
+                conn.execute("UPDATE files SET inode = ? WHERE id = ?", (stat.st_ino, file_id))
+                offset, line_no, last_ts, last_level = 0, 0, None, None
+            else:
+                offset, line_no, last_ts, last_level = row['offset'], row['lines'], row['last_ts'], row['last_level']
+
+        added = 0
+        while offset < stat.st_size:
+            chunk = read_since(path, offset, max_bytes=self.batch_bytes)
+            if chunk['offset'] == offset or chunk['reset']:
+                break
+            position = offset
+            entries, messages = [], []
+            for line in chunk['lines']:
+                ts, level, message = parse_line(line.rstrip('\r\n'))
+                if ts is None:
+                    ts, level = last_ts, last_level
+                else:
+                    last_ts, last_level = ts, level
+                line_no += 1
+                entries.append((file_id, line_no, position, ts, level))
+                messages.append(message)
+                position += len(line.encode('utf-8', errors='replace'))
+
+            first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO entries (id, file_id, line_no, offset, ts, level) VALUES (?, ?, ?, ?, ?, ?)",
+                [(first_id + i, *entry) for i, entry in enumerate(entries)]
+            )
+            conn.executemany("INSERT INTO entries_fts (rowid, message) VALUES (?, ?)",
+                             [(first_id + i, m) for i, m in enumerate(messages)])
+            added += len(entries)
+            offset = chunk['offset']
+            # commit לכל בלוק: חיפושים רואים קובץ גדול מתמלא בהדרגה, והמשך אחרי שגיאה לא משכפל שורות
+            conn.execute("UPDATE files SET offset = ?, lines = ?, last_ts = ?, last_level = ? WHERE id = ?",
+                         (offset, line_no, last_ts, last_level, file_id))
+            conn.commit()
+
+        conn.execute(
+            "UPDATE files SET offset = ?, lines = ?, size = ?, mtime = ?, last_ts = ?, last_level = ? WHERE id = ?",
+            (offset, line_no, stat.st_size, stat.st_mtime, last_ts, last_level, file_id)
+        )
+        return added
+
+    def update(self) -> int:
+        """Indexes new bytes of every log file. Returns the number of new lines."""
+        with self._write_lock:
+            return self._update()
+
+    def _update(self) -> int:
+        added = 0
+        with closing(self._connect()) as conn:
+            paths = self._log_files()
+            for path in paths:
+                try:
+                    with conn:
+                        added += self._index_file(conn, path)
+                except OSError as e:
+                    logging.warning(f"Log index: cannot read {path}: {e}")
+            # קבצים שנמחקו
+            with conn:
+                known = [(r['id'], r['path']) for r in conn.execute("SELECT id, path FROM files")]
+                for file_id, path in known:
+                    if path not in paths:
+                        self._reset_file(conn, file_id)
+                        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self._last_update = time.monotonic()
+        self.initial_pass_done.set()
+        return added
+
+    def refresh(self, max_age: float = 2.0):
+        """
+        Updates the index if the last update is older than max_age seconds.
+        Never waits for an update that is already running (e.g. the initial pass in
+        the background thread) - the caller is served from what is indexed so far.
+        """
+        if self._thread is not None and not self.initial_pass_done.is_set():
+            return
+        if time.monotonic() - self._last_update <= max_age or not self._write_lock.acquire(blocking=False):
+            return
+        try:
+            self._update()
+        finally:
+            self._write_lock.release()
+
+    def start(self, interval: float = 5.0):
+        """Background thread that keeps the index up to date (idempotent)."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.update()
+                except Exception as e:
+                    logging.error(f"Log index update failed: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=run, name='log-indexer', daemon=True)
+        self._thread.start()
+
+    # --- שאילתות ---
+    def list_files(self) -> List[dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM files ORDER BY mtime DESC").fetchall()
+        return [{
+            "path": row['path'],
+            "name": os.path.basename(row['path']),
+            "size": row['size'],
+            "modified": datetime.fromtimestamp(row['mtime']).isoformat() if row['mtime'] else None,
+            "indexed_lines": row['lines'],
+            "indexed_bytes": row['offset']
+        } for row in rows]
+
+    def search(self, text: Optional[str] = None, levels: Optional[Iterable[str]] = None,
+               since: Optional[str] = None, until: Optional[str] = None, filename: Optional[str] = None,
+               limit: int = 200, before_id: Optional[int] = None) -> List[dict]:
+        """
+        Newest-first matching lines. All filters are optional and combined with AND.
+        Paging: pass the smallest returned id as before_id.
+        """
+        clauses, params = [], []
+        text_query = fts_query(text) if text else ''
+        if text_query:
+            # טבלת ה-FTS היא הלולאה החיצונית: היא מחזירה rowid בסדר יורד בלי מיון של כל ההתאמות
+            source = 'entries_fts JOIN entries e ON e.id = entries_fts.rowid'
+            order = 'entries_fts.rowid DESC'
+            message = 'entries_fts.message'
+            clauses.append('entries_fts MATCH ?')
+            params.append(text_query)
+        else:
+            source = 'entries e'
+            order = 'e.id DESC'
+            message = '(SELECT message FROM entries_fts WHERE rowid = e.id)'
+
+        if levels:
+            levels = [level.upper() for level in levels]
+            clauses.append(f"e.level IN ({','.join('?' * len(levels))})")
+            params += levels
+        if since:
+            clauses.append('e.ts >= ?')
+            params.append(normalize_time(since))
+        if until:
+            clauses.append('e.ts <= ?')
+            params.append(normalize_time(until))
+        if filename:
+            clauses.append('f.path = ?')
+            params.append(os.path.join(self.logs_dir, os.path.basename(filename)))
+        if before_id:
+            clauses.append(('entries_fts.rowid' if text_query else 'e.id') + ' < ?')
+            params.append(int(before_id))
+
+        sql = (
+            f"SELECT e.id, e.line_no, e.offset, e.ts, e.level, f.path, {message} AS message "
+            f"FROM {source} JOIN files f ON f.id = e.file_id "
+            f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} "
+            f"ORDER BY {order} LIMIT ?"
+        )
+        params.append(int(limit))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{
+            "id": row['id'],
+            "file": os.path.basename(row['path']),
+            "line": row['line_no'],
+            "offset": row['offset'],
+            "timestamp": row['ts'],
+            "level": row['level'],
+            "message": row['message']
+        } for row in rows]
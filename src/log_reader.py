@@ -0,0 +1,101 @@
+"""
+log_reader.py - קריאת קבצי לוג מהסוף ומעקב לפי byte offset
+
+tail_lines קורא בלוקים אחורה מסוף הקובץ עד שנאספו N שורות, כך שהעלות תלויה
+באורך השורות המבוקשות ולא בגודל הקובץ.
+read_since מחזיר רק את השורות השלמות שנכתבו אחרי offset נתון, יחד עם ה-offset
+הבא - הלקוח שולח אותו בבקשה הבאה (?since=) ומקבל רק בתים חדשים.
+"""
+
+import os
+from typing import List, Tuple
+
+BLOCK_SIZE = 64 * 1024
+MAX_FOLLOW_BYTES = 4 * 1024 * 1024
+
+
+def _decode(data: bytes, encoding: str) -> List[str]:
+    return data.decode(encoding, errors='replace').splitlines(keepends=True)
+
+
+def tail_bytes(path: str, max_lines: int, block_size: int = BLOCK_SIZE) -> Tuple[bytes, int]:
+    """
+    Returns (bytes of the last max_lines lines, end offset).
+    The end offset is the file size at read time, usable as `since` for read_since.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if max_lines <= 0 or end == 0:
+            return b'', end
+
+        position = end
+        chunks = []
+        newlines = 0
+        # שורה אחרונה בלי \n עדיין נחשבת שורה; \n בסוף הקובץ לא פותח שורה חדשה
+        f.seek(end - 1)
+        wanted = max_lines + (1 if f.read(1) == b'\n' else 0)
+        while position > 0 and newlines < wanted:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+
+    data = b''.join(reversed(chunks))
+    if newlines >= wanted:
+        # חיתוך לתחילת השורה ה-max_lines מהסוף
+        cut = len(data)
+        for _ in range(wanted):
+            cut = data.rfind(b'\n', 0, cut)
+        data = data[cut + 1:]
+    return data, end
+
+
+def tail(path: str, max_lines: int, encoding: str = 'utf-8') -> dict:
+    """
+    {"lines": last max_lines complete lines, "offset": end of the last complete line} -
+    same shape as read_since. A last line without a trailing newline is still being
+    written; it is left for the next read_since(offset) instead of being split.
+    """
+    data, end = tail_bytes(path, max_lines + 1)
+    partial = len(data) - (data.rfind(b'\n') + 1)
+    lines = _decode(data[:len(data) - partial], encoding)
+    return {"lines": lines[-max_lines:] if max_lines > 0 else [], "offset": end - partial}
+
+
+def tail_lines(path: str, max_lines: int, encoding: str = 'utf-8', block_size: int = BLOCK_SIZE) -> List[str]:
+    """Last max_lines lines of the file (like readlines()[-max_lines:])."""
+    data, _ = tail_bytes(path, max_lines, block_size)
+    return _decode(data, encoding)
+
+
+def read_since(path: str, offset: int, max_bytes: int = MAX_FOLLOW_BYTES, encoding: str = 'utf-8',
+               fallback_lines: int = 100) -> dict:
+    """
+    Complete lines written after byte offset `offset`.
+
+    Returns {"lines", "offset", "reset"}: `offset` is where the next call should
+    start; a partial last line is left for the next call. If the file is now
+    shorter than `offset` (rotated/truncated), the last fallback_lines lines are
+    returned with reset=True. At most max_bytes are read per call.
+    """
+    size = os.path.getsize(path)
+    if offset is None or offset < 0 or offset > size:
+        return {**tail(path, fallback_lines, encoding), "reset": True}
+    if offset == size:
+        return {"lines": [], "offset": size, "reset": False}
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(min(size - offset, max_bytes))
+
+    last_newline = data.rfind(b'\n')
+    if last_newline == -1:
+        # שורה ארוכה מ-max_bytes מוחזרת כמו שהיא, אחרת מחכים לסיום השורה
+        if len(data) < max_bytes:
+            return {"lines": [], "offset": offset, "reset": False}
+        return {"lines": _decode(data, encoding), "offset": offset + len(data), "reset": False}
+    complete = data[:last_newline + 1]
+    return {"lines": _decode(complete, encoding), "offset": offset + len(complete), "reset": False}
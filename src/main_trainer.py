@@ -19,6 +19,12 @@ from lightgbm import LGBMClassifier
 from src.feature_calculator import FeatureCalculator
 from src.utils import archive_existing_file, load_system_config
 from src.simulation_engine import run_trading_simulation
+from src.multi_fidelity import SuccessiveHalvingScheduler
+from src.warm_start import build_search_space, seed_study
+from src.feature_selection import prune_redundant_features
+from src.fast_predictor import compile_model
+from src.model_registry import write_manifest
+from src.data_metadata import write_metadata
 # ייבוא ישיר של ProjectOrganizer
 try:
     from src.utils.project_organizer import ProjectOrganizer
@@ -100,6 +106,7 @@ def load_data():
             os.makedirs(feature_dir, exist_ok=True)
             logging.info(f"Saving computed features to {feature_data_path}")
             df.to_csv(feature_data_path, index=False)
+            write_metadata(df, feature_data_path, producer='main_trainer')
             
             # הגדרת אינדקס מחדש
             df.set_index('date', inplace=True)
@@ -151,6 +158,20 @@ class OptunaTrainer:
         self.X_test = self.df.iloc[test_idx:][self.feature_cols]
         self.y_test = self.df.iloc[test_idx:]['target']
         
+        # הסרת פיצ'רים כמעט-זהים (למשל וריאנטים של SMA/EMA) - מחושב על סט האימון בלבד
+        pruning_config = config['training_params'].get('redundancy_pruning', {})
+        self.redundant_feature_groups = {}
+        if pruning_config.get('enabled', False):
+            self.feature_cols, self.redundant_feature_groups = prune_redundant_features(
+                self.X_train,
+                self.feature_cols,
+                threshold=pruning_config.get('threshold', 0.95),
+                block_size=pruning_config.get('block_size', 256)
+            )
+            self.X_train = self.X_train[self.feature_cols]
+            self.X_test = self.X_test[self.feature_cols]
+            logging.info(f"Features after redundancy pruning: {len(self.feature_cols)}")
+        
         # Create TimeSeriesSplit for cross-validation
         self.tscv = TimeSeriesSplit(n_splits=self.cv_splits)
         
@@ -171,6 +192,68 @@ class OptunaTrainer:
                 self.fixed_params[param_name] = param_dict.get('fixed_value')
         
         logging.info(f"Fixed parameters (not optimized): {self.fixed_params}")
+        
+        # דירוג פיצ'רים מחושב פעם אחת ומשותף לכל הניסויים
+        self._feature_ranking = None
+        
+        # חיפוש רב-נאמנות (Successive Halving) - אופציונלי
+        fidelity_config = config['training_params'].get('multi_fidelity', {})
+        self.fidelity_scheduler = None
+        if fidelity_config.get('enabled', False):
+            scheduler = SuccessiveHalvingScheduler.from_config(fidelity_config)
+            if scheduler.worthwhile(self.n_trials):
+                self.fidelity_scheduler = scheduler
+                self.min_rung_estimators = int(fidelity_config.get('min_n_estimators', 10))
+                logging.info(f"Multi-fidelity search enabled with rung fractions: {scheduler.fractions}")
+            else:
+                logging.info(
+                    f"Multi-fidelity search skipped: n_trials={self.n_trials} is below "
+                    f"min_trials_per_rung * reduction_factor = "
+                    f"{scheduler.min_trials_per_rung * scheduler.reduction_factor}, so no trial would be pruned"
+                )
+    
+    def _rank_features(self):
+        """
+        מדרג את הפיצ'רים לפי חשיבות במודל פשוט. התוצאה נשמרת כי היא זהה בכל ניסוי.
+        """
+        if self._feature_ranking is None:
+            init_model = LGBMClassifier(
+                objective='binary',
+                verbosity=-1,
+                n_estimators=50,
+                max_depth=3,
+                learning_rate=0.1,
+                random_state=42
+            )
+            init_model.fit(self.X_train, self.y_train)
+            
+            feature_importances = dict(zip(self.feature_cols, init_model.feature_importances_))
+            ranked = sorted(feature_importances.items(), key=lambda x: x[1], reverse=True)
+            self._feature_ranking = [f[0] for f in ranked]
+        
+        return self._feature_ranking
+    
+    def _low_fidelity_score(self, params, X_train_selected, fraction):
+        """
+        מאמן מודל על החלק העדכני של נתוני האימון ועם פחות עצים, ומחזיר דיוק
+        על קטע הוולידציה האחרון (אותו קטע שמשמש את ה-fold האחרון ב-CV).
+        """
+        n_val = max(1, len(X_train_selected) // (self.cv_splits + 1))
+        train_end = len(X_train_selected) - n_val
+        n_fit = max(1, int(train_end * fraction))
+        
+        X_fit = X_train_selected.iloc[train_end - n_fit:train_end]
+        y_fit = self.y_train.iloc[train_end - n_fit:train_end]
+        X_val = X_train_selected.iloc[train_end:]
+        y_val = self.y_train.iloc[train_end:]
+        
+        rung_params = dict(params)
+        n_estimators = rung_params.get('n_estimators', 100)
+        rung_params['n_estimators'] = max(self.min_rung_estimators, int(round(n_estimators * fraction)))
+        
+        model = LGBMClassifier(**rung_params, random_state=42)
+        model.fit(X_fit, y_fit)
+        return accuracy_score(y_val, model.predict(X_val))
     
     def _get_model_params(self, trial):
         """
@@ -228,25 +311,7 @@ class OptunaTrainer:
         
         # Feature selection - use only top N features if specified
         if top_n_features is not None and len(self.feature_cols) > top_n_features:
-            # Use a simple initial model to rank features
-            # TODO: move this outside the objective function if it's slow
-            init_model = LGBMClassifier(
-                objective='binary',
-                verbosity=-1,
-                n_estimators=50,
-                max_depth=3,
-                learning_rate=0.1,
-                random_state=42
-            )
-            
-            # Fit the simple model
-            init_model.fit(self.X_train, self.y_train)
-            
-            # Get top features
-            feature_importances = dict(zip(self.feature_cols, init_model.feature_importances_))
-            top_features = sorted(feature_importances.items(), key=lambda x: x[1], reverse=True)[:top_n_features]
-            selected_features = [f[0] for f in top_features]
-            
+            selected_features = self._rank_features()[:top_n_features]
             X_train_selected = self.X_train[selected_features]
             trial.set_user_attr("selected_features", selected_features)
         else:
@@ -254,6 +319,14 @@ class OptunaTrainer:
             selected_features = self.feature_cols
             trial.set_user_attr("selected_features", selected_features)
         
+        # שלבי נאמנות נמוכה: רק ניסויים ששורדים ממשיכים ל-CV המלא ולבקטסט
+        if self.fidelity_scheduler is not None:
+            for rung, fraction in enumerate(self.fidelity_scheduler.fractions[:-1]):
+                rung_score = self._low_fidelity_score(params, X_train_selected, fraction)
+                trial.set_user_attr(f"rung_{rung}_accuracy", float(rung_score))
+                if not self.fidelity_scheduler.report(rung, rung_score):
+                    raise optuna.TrialPruned(f"Pruned at rung {rung} (fraction={fraction:.3f}, accuracy={rung_score:.4f})")
+        
         # Create and fit model
         model = LGBMClassifier(**params, random_state=42)
         
@@ -272,6 +345,8 @@ class OptunaTrainer:
         
         # Calculate mean validation score
         mean_accuracy = np.mean(cv_scores)
+        if self.fidelity_scheduler is not None:
+            self.fidelity_scheduler.report(self.fidelity_scheduler.n_rungs - 1, mean_accuracy)
         
         # Final model training on full training set
         model.fit(X_train_selected, self.y_train)
@@ -359,8 +434,23 @@ class OptunaTrainer:
                 sampler=optuna.samplers.TPESampler(n_startup_trials=self.n_startup_trials)
             )
         
+        # אתחול חם מקונפיגורציות ומדדים של הרצות קודמות
+        warm_start_config = config['training_params'].get('warm_start', {})
+        if warm_start_config.get('enabled', False):
+            try:
+                search_space = build_search_space(config.get('optuna_param_limits', {}), self.fixed_params)
+                models_dir = os.path.dirname(config['system_paths']['champion_model'])
+                seed_study(study, search_space, models_dir, max_trials=warm_start_config.get('max_seed_trials', 10))
+            except Exception as e:
+                logging.warning(f"Warm start failed, continuing with a cold study: {e}")
+        
         study.optimize(self._objective, n_trials=self.n_trials)
         
+        if self.fidelity_scheduler is not None:
+            pruned_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.PRUNED]
+            logging.info(f"Multi-fidelity search: {len(pruned_trials)}/{len(study.trials)} trials pruned early, "
+                         f"trials per rung: {self.fidelity_scheduler.summary()}")
+        
         # Get best trial
         if target_metric == 'multi_objective':
             # For multi-objective, we'll pick the trial with best profit factor
@@ -423,8 +513,13 @@ class OptunaTrainer:
         report = classification_report(self.y_test, y_pred)
         logging.info(f"Classification report:\n{report}")
         
+        # מזהה ריצה משותף לקונפיגורציית ה-champion ולסיכום האימון (analytics_store מצמיד ביניהם)
+        trained_at = datetime.now()
+        run_timestamp = trained_at.strftime('%Y%m%d_%H%M%S')
+        
         # Create final best parameters dict with all values
         best_params = {
+            'training_run_timestamp': run_timestamp,
             'model_params': final_params,
             'selected_features': selected_features,
             'feature_importances': feature_importances,
@@ -446,11 +541,14 @@ class OptunaTrainer:
             'accuracy': float(accuracy),
             'feature_importances': {str(k): float(v) for k, v in feature_importances.items()},
             'params': best_params,
-            'training_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'training_run_timestamp': run_timestamp,
+            'training_date': trained_at.strftime('%Y-%m-%d %H:%M:%S'),
             'data_start': self.df.index.min().strftime('%Y-%m-%d'),
             'data_end': self.df.index.max().strftime('%Y-%m-%d'),
             'training_samples': len(self.X_train),
             'test_samples': len(self.X_test),
+            'pruned_redundant_features': sum(len(v) for v in self.redundant_feature_groups.values()),
+            'optuna_params': dict(best_trial.params),
         }
         
         # Add backtest metrics
@@ -461,6 +559,24 @@ class OptunaTrainer:
         return final_model, scaler, best_params, metrics
 
 
+def notify_model_api(config):
+    """
+    מבקש מ-model_api לטעון את ה-champion החדש ברקע (החלפה אטומית, בלי להפסיק לשרת).
+    אם ה-API לא רץ, הוא יטען את הגרסה החדשה בהפעלה הבאה.
+    """
+    api_settings = config.get('api_settings', {})
+    host = api_settings.get('host', '127.0.0.1')
+    if host == '0.0.0.0':
+        host = '127.0.0.1'
+    url = f"http://{host}:{api_settings.get('port', 5000)}/reload"
+    try:
+        import requests
+        response = requests.post(url, timeout=2)
+        logging.info(f"Model API reload requested: {response.status_code} {response.text.strip()}")
+    except Exception as e:
+        logging.info(f"Model API not reachable at {url}, skipping hot reload: {e}")
+
+
 def main():
     try:
         logging.info("===== Model Training Started =====")
@@ -495,6 +611,14 @@ def main():
         logging.info(f"Saving champion model to {model_path}")
         joblib.dump(champion_model, model_path)
         
+        # שמירת גרסה מקומפלת של המודל לחיזוי מהיר ב-model_api
+        compiled_path = config['system_paths'].get('champion_compiled_model', 'models/champion_model_compiled.npz')
+        archive_existing_file(compiled_path)
+        try:
+            compile_model(champion_model, compiled_path)
+        except Exception as compile_error:
+            logging.warning(f"Could not compile champion model, API will use LightGBM directly: {compile_error}")
+        
         # שמירת הסקיילר
         logging.info(f"Saving feature scaler to {scaler_path}")
         joblib.dump(scaler, scaler_path)
@@ -507,6 +631,11 @@ def main():
         # שמירת סיכום אימון
         save_training_summary(metrics)
         
+        # manifest נכתב אחרון - מסמן ל-model_api שקבוצת הארטיפקטים שלמה
+        manifest_path = config['system_paths'].get('champion_manifest', 'models/champion_manifest.json')
+        write_manifest(config['system_paths'], manifest_path)
+        notify_model_api(config)
+        
         logging.info("===== Model Training Completed Successfully =====")
         
         # ארגון אוטומטי של הפרויקט לאחר סיום האימון
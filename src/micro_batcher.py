@@ -0,0 +1,142 @@
+"""
+micro_batcher.py - איחוד בקשות חיזוי מקבילות לקריאה אחת למודל
+
+בקשות שמגיעות בתוך חלון זמן קצר (max_wait_ms) או עד max_batch_size שורות
+מאוחדות למטריצה אחת, המודל נקרא פעם אחת, והתוצאות מוחזרות לכל מבקש.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import numpy as np
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces single-row predictions into batched model calls.
+
+    predict_fn(key, X) is called with a 2D matrix and must return one result row
+    per input row. Rows are only batched together when they share the same key
+    (e.g. the same model bundle), so a model swap never mixes versions in a batch.
+    """
+
+    def __init__(self, predict_fn: Callable[[Any, np.ndarray], Any], max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+        self.max_seen_batch = 0
+
+    @classmethod
+    def from_config(cls, predict_fn, api_settings: dict) -> "MicroBatcher":
+        """יוצר batcher מתוך api_settings['micro_batching']"""
+        batching_config = api_settings.get('micro_batching', {})
+        return cls(
+            predict_fn,
+            max_batch_size=int(batching_config.get('max_batch_size', 32)),
+            max_wait_ms=float(batching_config.get('max_wait_ms', 2.0))
+        )
+
+    def _ensure_started_locked(self):
+        # ה-thread נוצר בבקשה הראשונה של כל תהליך (threads לא שורדים fork של gunicorn); נקרא תחת _lock
+        if self._thread is None or self._pid != os.getpid():
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='micro-batcher',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the worker thread after it serves the rows already queued.
+        A later submit() starts a fresh thread, so micro batching can be toggled at runtime.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            if thread is None or self._pid != os.getpid():
+                return
+            # submit() מכניס שורות רק תחת _lock, ולכן כל שורה בתור הישן קודמת ל-_STOP
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def submit(self, key: Any, row: np.ndarray) -> Future:
+        """Queues one row for prediction and returns a Future of its result row."""
+        future = Future()
+        item = (key, np.asarray(row).ravel(), future)
+        with self._lock:
+            self._ensure_started_locked()
+            self._queue.put(item)
+        return future
+
+    def predict(self, key: Any, row: np.ndarray, timeout: float = 30.0):
+        """Blocking variant of submit."""
+        return self.submit(key, row).result(timeout=timeout)
+
+    def _collect(self, work_queue):
+        batch = [work_queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(work_queue.get(timeout=remaining) if remaining > 0 else work_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, work_queue):
+        stopping = False
+        while not stopping:
+            batch = self._collect(work_queue)
+            if batch[-1] is _STOP:
+                stopping = True
+                batch.pop()
+            if not batch:
+                continue
+
+            groups = {}
+            for key, row, future in batch:
+                groups.setdefault(id(key), (key, []))[1].append((row, future))
+
+            for key, items in groups.values():
+                try:
+                    results = self.predict_fn(key, np.vstack([row for row, _ in items]))
+                    for (_, future), result in zip(items, results):
+                        future.set_result(result)
+                except Exception as e:
+                    logging.error(f"Micro-batch prediction failed for {len(items)} rows: {e}")
+                    for _, future in items:
+                        future.set_exception(e)
+
+            with self._lock:
+                self.batches += 1
+                self.rows += len(batch)
+                self.max_seen_batch = max(self.max_seen_batch, len(batch))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+                "max_seen_batch": self.max_seen_batch
+            }
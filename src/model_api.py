@@ -6,22 +6,32 @@ import sys
 import os
 import logging
 import json
-import joblib
-import pandas as pd
-import numpy as np
 import traceback
-from flask import Flask, request, jsonify
+from contextlib import nullcontext
+from flask import Flask, request, jsonify, Response, g
 
 # הוספת הנתיב הראשי של הפרויקט כדי לאפשר ייבוא מ-src
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.utils import load_system_config
-from src.feature_calculator import FeatureCalculator
+from src.config_service import get_config_service
+from src.lazy_import import lazy_import, warm_imports
+from src.model_registry import ModelRegistry
+from src.micro_batcher import MicroBatcher
+from src.prediction_cache import PredictionCache, window_hash, payload_hash
+from src.bar_codec import ARROW_STREAM_MIME, is_arrow_request, decode_bars_frame, decode_bars_records
+from src.prediction_session import SessionStore
+from src.batch_prediction import select_rows, predict_stacked, encode_arrow
+from src.latency_metrics import LatencyMetrics, RequestTrace
+
+# מודולים כבדים נטענים בשימוש הראשון - השרת עולה ומשרת /status מיד
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
 
 # --- טעינת קונפיגורציה מרכזית ---
-config = load_system_config()
+config_service = get_config_service(os.path.join(BASE_DIR, 'system_config.json'))
+config = config_service.get()
 paths = config['system_paths']
 api_settings = config['api_settings']
 
@@ -36,126 +46,401 @@ logging.basicConfig(
 
 app = Flask(__name__)
 
-# --- Globals for model, scaler, and config ---
-model = None
-scaler = None
-model_config = None
-selected_features = []
+# --- Model registry: the active bundle (model, scaler, config) is swapped atomically ---
+registry = ModelRegistry(paths, model_threads=api_settings.get('serving', {}).get('model_threads'))
+sessions = SessionStore.from_config(api_settings)
+prediction_cache = PredictionCache.from_config(api_settings)
+
+# בקשות /predict מקבילות מאוחדות לקריאה אחת ל-predict_proba
+batching_enabled = api_settings.get('micro_batching', {}).get('enabled', False)
+batcher = MicroBatcher.from_config(lambda bundle, X: bundle.predictor.predict_proba(X), api_settings)
+
+# --- מדידת זמנים לפי שלב (parse, features, align, scale, predict), מיוצא ב-/metrics ---
+metrics = LatencyMetrics.from_config(api_settings, slow_log_path=os.path.join(BASE_DIR, 'logs', 'model_api_slow.log'))
+TRACED_ENDPOINTS = {'predict', 'predict_batch', 'predict_session', 'push_session_bars'}
+
+# הגדרות שאפשר להחיל בזמן ריצה
+HOT_API_SETTINGS = ('metrics', 'micro_batching')
+
+
+def _apply_config_change(new_config, old_config):
+    """מנוי של config_service: מחיל ספי מדידה ו-micro batching; שאר השינויים דורשים הפעלה מחדש"""
+    global batching_enabled
+    new_api, old_api = new_config.get('api_settings', {}), old_config.get('api_settings', {})
+    metrics_config = new_api.get('metrics', {})
+    metrics.slow_request_seconds = float(metrics_config.get('slow_request_ms', 250)) / 1000.0
+    metrics.slow_sample_rate = float(metrics_config.get('slow_sample_rate', 1.0))
+    batching_config = new_api.get('micro_batching', {})
+    batcher.max_batch_size = max(1, int(batching_config.get('max_batch_size', batcher.max_batch_size)))
+    batcher.max_wait = max(0.0, float(batching_config.get('max_wait_ms', batcher.max_wait * 1000))) / 1000.0
+    enabled = bool(batching_config.get('enabled', False))
+    if enabled != batching_enabled:
+        logging.info(f"Micro batching {'enabled' if enabled else 'disabled'} by config change")
+        batching_enabled = enabled
+        # ה-thread עולה שוב בבקשה הראשונה (submit); כיבוי מרוקן את מה שכבר בתור
+        if not enabled:
+            batcher.stop()
+
+    changed = sorted(key for key in set(new_api) | set(old_api)
+                     if key not in HOT_API_SETTINGS and new_api.get(key) != old_api.get(key))
+    if new_config.get('system_paths') != old_config.get('system_paths'):
+        changed.append('system_paths')
+    if changed:
+        logging.warning(f"Configuration changed ({', '.join(changed)}); restart the model API to apply")
+
+
+config_service.subscribe(_apply_config_change)
+
+
+def start_watchers():
+    """
+    Starts the champion-manifest watcher (hot swap) and the config file watcher.
+    Threads don't survive a fork, so every serving process calls this after it starts.
+    """
+    registry.start_manifest_watcher(float(api_settings.get('serving', {}).get('manifest_poll_seconds', 10)))
+    config_service.watch(float(api_settings.get('config_poll_seconds', 2.0)))
+
+
+@app.before_request
+def _start_trace():
+    if request.endpoint in TRACED_ENDPOINTS:
+        g.trace = RequestTrace(request.endpoint)
+
+
+@app.after_request
+def _finish_trace(response):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        metrics.record(trace, response.status_code, detail={
+            "path": request.path,
+            "content_length": request.content_length,
+            "model_version": registry.active_version
+        })
+    return response
+
+
+def _stage(name):
+    """Times a stage of the current request (no-op outside a traced endpoint)."""
+    trace = g.get('trace')
+    return trace.stage(name) if trace is not None else nullcontext()
+
+
+def _on_model_swap(bundle):
+    """Drops state derived from the previous model version."""
+    sessions.features.reset()
+    prediction_cache.clear()
+
+
+registry.subscribe(_on_model_swap)
 
 
 def load_artifacts():
-    """Loads the champion model, scaler, and configuration."""
-    global model, scaler, model_config, selected_features
-    try:
-        logging.info(f"Loading model from: {paths['champion_model']}")
-        model = joblib.load(paths['champion_model'])
-        
-        logging.info(f"Loading scaler from: {paths['champion_scaler']}")
-        scaler = joblib.load(paths['champion_scaler'])
-        
-        logging.info(f"Loading model config from: {paths['champion_config']}")
-        with open(paths['champion_config'], 'r', encoding='utf-8') as f:
-            model_config = json.load(f)
-        
-        selected_features = model_config['selected_features']
-        logging.info(f'Successfully loaded model with {len(selected_features)} features.')
-        return True
-    except Exception as e:
-        logging.error(f"FATAL: Error loading model artifacts: {e}", exc_info=True)
-        return False
+    """Loads the champion model, scaler, and configuration synchronously (startup)."""
+    return registry.load_and_swap()
 
 @app.route('/status', methods=['GET'])
 def status():
     """Checks if the model is loaded and the API is responsive."""
-    model_loaded = model is not None and model_config is not None
+    bundle = registry.active
     return jsonify({
         "status": "ok",
-        "model_loaded": model_loaded,
-        "features_count": len(selected_features) if model_loaded else 0
+        "model_loaded": bundle is not None,
+        "features_count": len(bundle.selected_features) if bundle else 0,
+        "model_version": bundle.version if bundle else None,
+        "model_registry": registry.status(),
+        "prediction_cache": prediction_cache.stats(),
+        "micro_batching": batcher.stats() if batching_enabled else None,
+        "latency_ms": metrics.summary()
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Per-stage latency histograms in the Prometheus text format."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/reload', methods=['POST'])
 def reload():
-    """Triggers a reload of the model, scaler, and config."""
+    """Loads the current champion in the background and swaps it in after a warm-up prediction."""
     logging.info("Received request to reload artifacts...")
-    if load_artifacts():
-        return jsonify({"status": "ok", "message": "Artifacts reloaded successfully."})
-    else:
-        return jsonify({"status": "error", "message": "Failed to reload artifacts."}), 500
+    started = registry.reload_async()
+    return jsonify({
+        "status": "loading" if started else "already_loading",
+        "active_version": registry.active_version
+    }), 202
+
+@app.route('/model/version', methods=['GET'])
+def get_model_version():
+    """Returns the active model version and the registry state."""
+    return jsonify(registry.status())
+
+def _active_bundle():
+    """Returns the active bundle, loading it (once, for all concurrent requests) if nothing was loaded yet."""
+    # הפעלה מהירה: אם המודל עדיין נטען ברקע, הבקשה ממתינה לאותה טעינה
+    return registry.ensure_loaded(timeout=60)
+
+
+def _bars_to_frame(bars):
+    """Converts a list of bar objects (with an ISO 'date') to a DataFrame indexed by date."""
+    historical_df = pd.DataFrame(bars)
+    # ה-agent שולח תאריך בפורמט ISO, נמיר אותו
+    historical_df['date'] = pd.to_datetime(historical_df['date'])
+    return historical_df.set_index('date').sort_index()
+
+
+def _compute_features(historical_df):
+    """Runs the full feature sweep on a bar window and returns the numeric features of every row."""
+    from src.feature_calculator import FeatureCalculator
+
+    fc = FeatureCalculator()
+    features_df, _ = fc.add_all_possible_indicators(historical_df.copy(), verbose=False)
+    return features_df.select_dtypes(include=np.number).fillna(0)
+
+
+def _compute_latest_features(historical_df):
+    """Runs the full feature sweep on a bar window and returns its last numeric row."""
+    # השורה האחרונה מכילה את הפיצ'רים העדכניים ביותר
+    return _compute_features(historical_df).iloc[[-1]]
+
+
+def _predict_from_features(bundle, latest_features):
+    """Aligns a one-row feature frame to the model, predicts, and builds the unified response."""
+    plan = bundle.alignment
+    with _stage('align'):
+        # יישור לעמודות שהמודל מכיר לפי תוכנית שנבנתה בטעינת המודל (חסר/NaN -> 0)
+        row = plan.align_row(latest_features.columns, latest_features.to_numpy(dtype=np.float64)[0])
+
+    # נירמול וחיזוי
+    with _stage('scale'):
+        X_scaled = plan.scale_rows(row[np.newaxis, :])
+    with _stage('predict'):
+        if batching_enabled:
+            prediction_proba = batcher.predict(bundle, X_scaled[0])
+        else:
+            prediction_proba = bundle.predictor.predict_proba(X_scaled)[0]
+
+    prediction = int(np.argmax(prediction_proba))
+    final_prediction_label = "Buy" if prediction == 1 else "Hold"
+
+    # קח את ערך ה-ATR העדכני ביותר מהפיצ'רים שחושבו
+    atr_col_name = next((col for col in latest_features.columns if 'ATR_' in col.upper()), None)
+    atr_value = latest_features[atr_col_name].iloc[0] if atr_col_name else None
+
+    # Unified response: prediction, ATR, risk_params, contract
+    return {
+        "prediction": final_prediction_label,
+        "probability_hold": float(prediction_proba[0]),
+        "probability_buy": float(prediction_proba[1]),
+        "atr_value": float(atr_value) if atr_value is not None and pd.notna(atr_value) else None,
+        "risk_params": bundle.config.get('risk_params', {}),
+        "contract": bundle.config.get('contract', {})
+    }
+
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    """Receives historical data, computes features, and returns a prediction."""
-    if not all([model, scaler, model_config]):
-        logging.warning("Model artifacts not loaded. Attempting automatic reload...")
-        load_artifacts()
-        if not all([model, scaler, model_config]):
-            return jsonify({"error": "Model, scaler, or config not loaded. Please check logs or /reload."}), 503
+    """
+    Receives historical data, computes features, and returns a prediction.
+    Body: JSON {"historical": [bars...]} or an Arrow IPC stream of bars (Content-Type: application/vnd.apache.arrow.stream).
+    """
+    bundle = _active_bundle()
+    if bundle is None:
+        return jsonify({"error": "Model, scaler, or config not loaded. Please check logs or /reload."}), 503
+
+    try:
+        with _stage('parse'):
+            if is_arrow_request(request):
+                payload = request.get_data()
+                try:
+                    historical_df, metadata = decode_bars_frame(payload)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                if historical_df.empty:
+                    return jsonify({"error": "Arrow payload contains no bars."}), 400
+                symbol = metadata.get('symbol')
+                last_timestamp, digest = historical_df.index[-1].isoformat(), payload_hash(payload)
+            else:
+                data = request.get_json()
+                if 'historical' not in data or not isinstance(data['historical'], list) or not data['historical']:
+                    return jsonify({"error": "Missing or invalid 'historical' data. Expecting a non-empty list of objects."}), 400
+                historical_df = None
+                symbol = data.get('symbol')
+                last_timestamp, digest = data['historical'][-1].get('date'), window_hash(data['historical'])
+
+        # חלון זהה (retry / רענון) מקבל את התוצאה מהמטמון
+        with _stage('cache'):
+            symbol = symbol or bundle.config.get('contract', {}).get('symbol')
+            cache_key = PredictionCache.make_key(symbol, last_timestamp, digest, bundle.version)
+            cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached['result'])
+
+        if historical_df is None:
+            with _stage('parse'):
+                historical_df = _bars_to_frame(data['historical'])
+        with _stage('features'):
+            latest_features = _compute_latest_features(historical_df)
+        result = _predict_from_features(bundle, latest_features)
+        prediction_cache.put(cache_key, {"features": latest_features, "result": result})
+        return jsonify(result)
+
+    except Exception as e:
+        logging.error(f"Prediction error: {e}", exc_info=True)
+        return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
+
+def _columnar_response(bundle, columns, errors):
+    """Returns the batch columns as Arrow IPC if the client asked for it, otherwise as packed JSON arrays."""
+    if ARROW_STREAM_MIME in request.headers.get('Accept', ''):
+        return Response(encode_arrow(columns, errors), mimetype=ARROW_STREAM_MIME)
+    return jsonify({
+        "columns": columns,
+        "rows": len(columns['symbol']),
+        "errors": errors,
+        "model_version": bundle.version,
+        "risk_params": bundle.config.get('risk_params', {}),
+        "contract": bundle.config.get('contract', {})
+    })
+
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Predicts many symbols and/or many dates in one call.
+    Body: {"symbols": {"SPY": [bars...], ...}, "dates": "all" | [iso dates] | null}
+    Features are computed once per symbol and the model runs once on the stacked matrix.
+    """
+    bundle = _active_bundle()
+    if bundle is None:
+        return jsonify({"error": "Model, scaler, or config not loaded. Please check logs or /reload."}), 503
+
+    try:
+        with _stage('parse'):
+            data = request.get_json() or {}
+        symbols = data.get('symbols')
+        if not isinstance(symbols, dict) or not symbols:
+            return jsonify({"error": "Missing or invalid 'symbols'. Expecting an object of symbol -> list of bars."}), 400
+        dates = data.get('dates')
+
+        frames, errors = [], {}
+        for symbol, bars in symbols.items():
+            if not isinstance(bars, list) or not bars:
+                errors[symbol] = "Expecting a non-empty list of bars."
+                continue
+            try:
+                with _stage('parse'):
+                    historical_df = _bars_to_frame(bars)
+                with _stage('features'):
+                    rows = select_rows(_compute_features(historical_df), dates)
+            except Exception as e:
+                logging.warning(f"Batch prediction: feature calculation failed for {symbol}: {e}")
+                errors[symbol] = str(e)
+                continue
+            frames.append((symbol, rows))
+
+        columns = predict_stacked(bundle, frames, stage=_stage)
+
+        if errors:
+            logging.warning(f"Batch prediction skipped {len(errors)} symbols: {list(errors)}")
+        with _stage('encode'):
+            return _columnar_response(bundle, columns, errors)
+
+    except Exception as e:
+        logging.error(f"Batch prediction error: {e}", exc_info=True)
+        return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
+
+# --- סשנים של חיזוי: חלון נרות מתגלגל בצד השרת ---
+def _session_payload():
+    """Reads a session request body (JSON or Arrow) as {"bars": [...], "reset": bool}."""
+    if is_arrow_request(request):
+        bars, metadata = decode_bars_records(request.get_data())
+        return {"bars": bars, "reset": metadata.get('reset', '').lower() == 'true'}
+    return request.get_json(silent=True) or {}
 
+@app.route('/session/<symbol>/bars', methods=['POST'])
+def push_session_bars(symbol):
+    """
+    Appends new bars to the symbol's server-side window.
+    Body: JSON {"bars": [...], "reset": false} or an Arrow IPC stream of bars (schema metadata reset=true).
+    """
     try:
-        data = request.get_json()
-        if 'historical' not in data or not isinstance(data['historical'], list) or not data['historical']:
-            return jsonify({"error": "Missing or invalid 'historical' data. Expecting a non-empty list of objects."}), 400
-        
-        historical_df = pd.DataFrame(data['historical'])
-        # ה-agent שולח תאריך בפורמט ISO, נמיר אותו
-        historical_df['date'] = pd.to_datetime(historical_df['date'])
-        historical_df.set_index('date', inplace=True)
-
-        # 1. חישוב כל הפיצ'רים עם המחשבון המאוחד
-        fc = FeatureCalculator()
-        features_df = fc.add_all_possible_indicators(historical_df.copy(), verbose=False)
-        features_df_numeric = features_df.select_dtypes(include=np.number).fillna(0)
-        
-        # 2. הכנת ה-DataFrame הסופי למודל
-        # השורה האחרונה מכילה את הפיצ'רים העדכניים ביותר
-        latest_features = features_df_numeric.iloc[[-1]]
-
-        # יישור לעמודות שהמודל מכיר, ומילוי ערכים חסרים ב-0
-        X_today = pd.DataFrame(columns=selected_features)
-        X_today = pd.concat([X_today, latest_features], sort=False)
-        X_today = X_today[selected_features].fillna(0)
-
-        # 3. נירמול וחיזוי
-        X_scaled = scaler.transform(X_today)
-        prediction_proba = model.predict_proba(X_scaled)[0]
-        
-        # החזרת תוצאה
-        prediction = int(np.argmax(prediction_proba))
-        final_prediction_label = "Buy" if prediction == 1 else "Hold"
-        
-        # קח את ערך ה-ATR העדכני ביותר מהפיצ'רים שחושבו
-        atr_col_name = next((col for col in latest_features.columns if 'ATR_' in col.upper()), None)
-        atr_value = latest_features[atr_col_name].iloc[0] if atr_col_name else None
-
-        # Unified response: prediction, ATR, risk_params, contract
-        risk_params = model_config.get('risk_params', {})
-        contract = model_config.get('contract', {})
+        with _stage('parse'):
+            data = _session_payload()
+        bars = data.get('bars')
+        if not isinstance(bars, list):
+            return jsonify({"error": "Missing or invalid 'bars'. Expecting a list of objects."}), 400
+        with _stage('push'):
+            session = sessions.push(symbol, bars, reset=bool(data.get('reset', False)))
+        last_bar = session.last_timestamp
         return jsonify({
-            "prediction": final_prediction_label,
-            "probability_hold": float(prediction_proba[0]),
-            "probability_buy": float(prediction_proba[1]),
-            "atr_value": float(atr_value) if pd.notna(atr_value) else None,
-            "risk_params": risk_params,
-            "contract": contract
+            "symbol": session.symbol,
+            "bars": len(session.bars),
+            "last_bar": last_bar.isoformat() if last_bar is not None else None
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Session push error: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
 
+@app.route('/session/<symbol>/predict', methods=['POST'])
+def predict_session(symbol):
+    """Predicts on the symbol's server-side window. New bars may be pushed in the same call."""
+    bundle = _active_bundle()
+    if bundle is None:
+        return jsonify({"error": "Model, scaler, or config not loaded. Please check logs or /reload."}), 503
+
+    try:
+        with _stage('parse'):
+            data = _session_payload()
+        with _stage('push'):
+            if data.get('bars'):
+                session = sessions.push(symbol, data['bars'])
+            else:
+                session = sessions.get(symbol, create=False)
+        if session is None or not session.bars:
+            return jsonify({"error": f"No bars in session for '{symbol}'. POST bars to /session/{symbol}/bars first."}), 404
+
+        with _stage('features'):
+            latest_features = sessions.latest_features(session, list(bundle.selected_features))
+        result = _predict_from_features(bundle, latest_features)
+        result["symbol"] = session.symbol
+        result["last_bar"] = session.last_timestamp.isoformat()
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Prediction error: {e}", exc_info=True)
+        logging.error(f"Session prediction error: {e}", exc_info=True)
         return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
 
+@app.route('/session/<symbol>', methods=['DELETE'])
+def delete_session(symbol):
+    """Drops the symbol's server-side window."""
+    return jsonify({"status": "ok", "deleted": sessions.drop(symbol)})
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    """Lists active prediction sessions."""
+    return jsonify(sessions.summary())
+
 # --- נקודת קצה חדשה: קבלת פרמטרי סיכון מהקונפיגורציה של המודל ---
 @app.route('/risk_params', methods=['GET'])
 def get_risk_params():
     try:
-        if model_config is None:
+        bundle = registry.active
+        if bundle is None:
             raise ValueError("Model config not loaded in memory.")
-        risk_params = model_config.get('risk_params', {})
-        contract = model_config.get('contract', {})
+        risk_params = bundle.config.get('risk_params', {})
+        contract = bundle.config.get('contract', {})
         return jsonify({"risk_params": risk_params, "contract": contract})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    load_artifacts()
+    if api_settings.get('fast_startup', {}).get('enabled', False):
+        # השרת עולה מיד; המודל וה-FeatureCalculator נטענים ברקע
+        registry.reload_async()
+        warm_imports('pandas', 'src.feature_calculator')
+    else:
+        load_artifacts()
+    start_watchers()
     app.run(host=api_settings['host'], port=api_settings['port'])
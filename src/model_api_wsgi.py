@@ -0,0 +1,61 @@
+"""
+model_api_wsgi.py - נקודת כניסה להרצת model_api בשרת production
+
+gunicorn (Linux):
+    gunicorn -c gunicorn_model_api.conf.py src.model_api_wsgi:app
+
+Windows (gunicorn לא נתמך) - waitress עם threads:
+    python src/model_api_wsgi.py
+
+הארטיפקטים נטענים בזמן ה-import. עם preload_app של gunicorn זה קורה פעם אחת
+בתהליך הראשי לפני ה-fork, וה-workers חולקים את הזיכרון (copy-on-write).
+"""
+
+import importlib
+import os
+import sys
+
+# הגבלת threads של OpenMP/BLAS חייבת לקרות לפני ה-import של numpy ו-LightGBM.
+# כל worker מקבל מעט threads, כדי ש-N workers לא יתחרו על אותן ליבות.
+# thread יחיד גם מונע מ-OpenMP לפתוח pool בתהליך הראשי לפני ה-fork.
+_MODEL_THREADS = os.environ.get('MODEL_API_THREADS', '1')
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, _MODEL_THREADS)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src import model_api  # noqa: E402
+from src.model_api import app, api_settings, load_artifacts, start_watchers  # noqa: E402
+
+serving_settings = api_settings.get('serving', {})
+
+if not load_artifacts():
+    # ה-API עולה גם בלי מודל; /predict ינסה לטעון שוב, ו-/reload זמין
+    model_api.logging.warning("Starting without model artifacts")
+
+# model_api מייבא את FeatureCalculator (pandas_ta) בעצלות; כאן מייבאים לפני ה-fork
+# כדי שכל ה-workers יחלקו אותו במקום שכל אחד ישלם את זמן הייבוא בבקשה הראשונה
+try:
+    importlib.import_module('src.feature_calculator')
+except Exception as e:
+    model_api.logging.warning(f"Could not preload FeatureCalculator: {e}")
+
+
+def post_fork(server, worker):
+    """gunicorn hook: threads לא שורדים fork, לכן ה-watchers (manifest, קונפיגורציה) מופעלים בכל worker."""
+    start_watchers()
+
+
+def serve():
+    """הרצה עם waitress (ל-Windows או לפריסה בתהליך יחיד)."""
+    from waitress import serve as waitress_serve
+
+    start_watchers()
+    waitress_serve(app, host=api_settings['host'], port=api_settings['port'],
+                   threads=int(serving_settings.get('threads', 8)))
+
+
+if __name__ == "__main__":
+    serve()
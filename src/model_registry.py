@@ -0,0 +1,324 @@
+"""
+model_registry.py - רישום גרסאות של מודל ה-champion והחלפה אטומית בזמן ריצה
+
+כל גרסה נטענת כ-ModelBundle בלתי ניתן לשינוי (מודל, predictor, סקיילר וקונפיגורציה).
+טעינה חדשה רצה ב-thread ברקע, עוברת חיזוי חימום, ורק אז מחליפה את ההפניה
+היחידה ל-bundle הפעיל. בקשה שכבר רצה ממשיכה עם ה-bundle שהיא קראה.
+
+main_trainer ו-ModelTrainer כותבים manifest אחרי כל הארטיפקטים, עם גרסה ו-sha256 לכל קובץ.
+כך ה-registry מזהה קבוצת קבצים שלמה ועקבית ולא טוען קידום שעדיין נכתב.
+manifest שישן מהארטיפקטים (קבצים שנכתבו בלי לעדכן אותו) נחשב לא קיים אחרי
+stale_manifest_grace שניות, כדי שכתיבה ידנית לא תחסום טעינה לתמיד.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+try:
+    from src.lazy_import import lazy_import
+    from src.fast_predictor import load_predictor, model_fingerprint
+    from src.feature_alignment import AlignmentPlan
+except ImportError:
+    from lazy_import import lazy_import
+    from fast_predictor import load_predictor, model_fingerprint
+    from feature_alignment import AlignmentPlan
+
+joblib = lazy_import('joblib')
+np = lazy_import('numpy')
+
+MANIFEST_ARTIFACTS = {
+    'model': 'champion_model',
+    'scaler': 'champion_scaler',
+    'config': 'champion_config',
+    'compiled_model': 'champion_compiled_model'
+}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(system_paths: dict, manifest_path: str) -> dict:
+    """
+    כותב manifest לארטיפקטים הקיימים של ה-champion (נקרא בסוף הקידום).
+    הכתיבה לקובץ זמני ואז os.replace, כך שקוראים רואים manifest ישן או חדש בשלמותו.
+    """
+    files = {}
+    for name, path_key in MANIFEST_ARTIFACTS.items():
+        path = system_paths.get(path_key)
+        if path and os.path.exists(path):
+            files[name] = {"path": path, "sha256": file_sha256(path)}
+
+    content_hash = hashlib.sha1(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+    manifest = {
+        "version": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{content_hash}",
+        "created_at": datetime.now().isoformat(),
+        "files": files
+    }
+
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, manifest_path)
+    logging.info(f"Wrote champion manifest {manifest['version']} to {manifest_path}")
+    return manifest
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Immutable set of artifacts that serve one model version."""
+    version: str
+    model: object
+    predictor: object
+    scaler: object
+    config: dict
+    selected_features: tuple
+    loaded_at: str
+    load_seconds: float
+    files: dict = field(default_factory=dict)
+    alignment: Optional[AlignmentPlan] = None
+
+    def summary(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            "features_count": len(self.selected_features),
+            "predictor": type(self.predictor).__name__
+        }
+
+
+class ModelRegistry:
+    """
+    Holds the active ModelBundle and swaps it atomically.
+
+    Readers take `registry.active` once per request and use only that bundle.
+    """
+
+    def __init__(self, system_paths: dict, history_size: int = 10, model_threads: Optional[int] = None,
+                 stale_manifest_grace: float = 60.0):
+        """
+        Args:
+            system_paths: system_paths מהקונפיגורציה (champion_* ו-champion_manifest)
+            history_size: מספר הגרסאות האחרונות שנשמרות בהיסטוריה
+            model_threads: מספר threads לחיזוי של LightGBM (n_jobs); None = ברירת המחדל של המודל
+            stale_manifest_grace: כמה שניות ארטיפקטים חדשים מה-manifest נחשבים קידום שעדיין נכתב
+        """
+        self.system_paths = system_paths
+        self.model_threads = model_threads
+        self.stale_manifest_grace = stale_manifest_grace
+        self.manifest_path = system_paths.get('champion_manifest')
+        self._active: Optional[ModelBundle] = None
+        self._swap_lock = threading.Lock()
+        # טעינה אחת בכל פעם (טעינה ראשונה סינכרונית, /reload, ה-watcher)
+        self._load_lock = threading.Lock()
+        self._load_thread: Optional[threading.Thread] = None
+        self._subscribers: List[Callable[[ModelBundle], None]] = []
+        self.history = deque(maxlen=history_size)
+        self.last_error: Optional[str] = None
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> Optional[ModelBundle]:
+        return self._active
+
+    @property
+    def loading(self) -> bool:
+        return self._load_thread is not None and self._load_thread.is_alive()
+
+    def subscribe(self, callback: Callable[[ModelBundle], None]):
+        """Registers a callback called with the new bundle after every swap."""
+        self._subscribers.append(callback)
+
+    def _read_manifest(self) -> Optional[dict]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        mismatched = [name for name, entry in manifest.get('files', {}).items()
+                      if not os.path.exists(entry['path']) or file_sha256(entry['path']) != entry['sha256']]
+        if not mismatched:
+            return manifest
+
+        # ארטיפקטים שנכתבו אחרי ה-manifest בלי לעדכן אותו: אחרי זמן החסד ה-manifest לא רלוונטי
+        manifest_mtime = os.path.getmtime(self.manifest_path)
+        artifact_mtimes = [os.path.getmtime(path) for path in
+                           (self.system_paths.get(key) for key in MANIFEST_ARTIFACTS.values())
+                           if path and os.path.exists(path)]
+        newest = max(artifact_mtimes, default=0.0)
+        if newest > manifest_mtime and time.time() - newest >= self.stale_manifest_grace:
+            logging.warning(f"Champion manifest {manifest.get('version')} is older than the artifacts "
+                            f"({', '.join(mismatched)} changed); loading without it")
+            return None
+        raise ValueError(f"Artifacts {', '.join(mismatched)} do not match manifest "
+                         f"{manifest.get('version')} (promotion in progress?)")
+
+    def load_bundle(self) -> ModelBundle:
+        """Loads and validates a bundle from disk. Does not touch the active bundle."""
+        start = time.perf_counter()
+        manifest = self._read_manifest()
+        files = manifest['files'] if manifest else {}
+        path_of = lambda name: files.get(name, {}).get('path') or self.system_paths.get(MANIFEST_ARTIFACTS[name])
+
+        model = joblib.load(path_of('model'))
+        if self.model_threads and hasattr(model, 'set_params'):
+            model.set_params(n_jobs=self.model_threads)
+        predictor = load_predictor(model, path_of('compiled_model'))
+        scaler = joblib.load(path_of('scaler'))
+        with open(path_of('config'), 'r', encoding='utf-8') as f:
+            model_config = json.load(f)
+
+        version = manifest['version'] if manifest else model_fingerprint(model)[:12]
+        selected_features = tuple(model_config['selected_features'])
+        bundle = ModelBundle(
+            version=version,
+            model=model,
+            predictor=predictor,
+            scaler=scaler,
+            config=model_config,
+            selected_features=selected_features,
+            loaded_at=datetime.now().isoformat(),
+            load_seconds=time.perf_counter() - start,
+            files=files,
+            alignment=AlignmentPlan(selected_features, scaler)
+        )
+        self.warm_up(bundle)
+        return bundle
+
+    @staticmethod
+    def warm_up(bundle: ModelBundle):
+        """
+        חיזוי חימום על וקטור אפסים: מוודא שהמודל, הסקיילר והקונפיגורציה תואמים
+        ומחמם את נתיב החיזוי לפני שהגרסה מקבלת תעבורה.
+        """
+        n_features = len(bundle.selected_features)
+        for name, artifact in (('model', bundle.model), ('scaler', bundle.scaler)):
+            expected = getattr(artifact, 'n_features_in_', n_features)
+            if expected != n_features:
+                raise ValueError(f"{name} expects {expected} features but config selects {n_features}")
+
+        if bundle.alignment is not None:
+            bundle.alignment.verify()
+        X = bundle.scaler.transform(np.zeros((1, n_features)))
+        proba = np.asarray(bundle.predictor.predict_proba(X))
+        if proba.shape != (1, 2) or not np.all(np.isfinite(proba)):
+            raise ValueError(f"Warm-up prediction returned invalid output with shape {proba.shape}")
+
+    def swap(self, bundle: ModelBundle):
+        """Makes the bundle active and notifies subscribers."""
+        with self._swap_lock:
+            previous = self._active
+            self._active = bundle
+            self.history.appendleft(bundle.summary())
+        logging.info(f"Model registry: active version {previous.version if previous else None} -> {bundle.version}")
+        for callback in self._subscribers:
+            try:
+                callback(bundle)
+            except Exception as e:
+                logging.warning(f"Model registry subscriber failed: {e}")
+
+    def load_and_swap(self) -> bool:
+        """Loads a new bundle and swaps it in. The active bundle keeps serving if anything fails."""
+        with self._load_lock:
+            return self._load_and_swap()
+
+    def ensure_loaded(self, timeout: Optional[float] = 60) -> Optional[ModelBundle]:
+        """
+        Returns the active bundle, loading it synchronously if nothing was loaded yet.
+        Concurrent callers wait for the same load instead of each loading the artifacts.
+        """
+        if self._active is not None:
+            return self._active
+        if not self._load_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return self._active
+        try:
+            if self._active is None:
+                logging.warning("Model artifacts not loaded. Loading synchronously...")
+                self._load_and_swap()
+        finally:
+            self._load_lock.release()
+        return self._active
+
+    def _load_and_swap(self) -> bool:
+        try:
+            bundle = self.load_bundle()
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Model registry: failed to load new version, keeping {self.active_version}: {e}",
+                          exc_info=True)
+            return False
+        if self._active is not None and bundle.version == self._active.version:
+            logging.info(f"Model registry: version {bundle.version} is already active")
+            self.last_error = None
+            return True
+        self.swap(bundle)
+        self.last_error = None
+        return True
+
+    def reload_async(self) -> bool:
+        """
+        Starts loading a new version in a background thread.
+
+        Returns:
+            False if a load is already running
+        """
+        with self._swap_lock:
+            if self.loading:
+                return False
+            self._load_thread = threading.Thread(target=self.load_and_swap, name='model-registry-load', daemon=True)
+            self._load_thread.start()
+        return True
+
+    def _manifest_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except (TypeError, OSError):
+            return None
+
+    def start_manifest_watcher(self, interval: float = 10.0):
+        """
+        בודק כל interval שניות אם ה-manifest השתנה ומפעיל טעינה ברקע.
+        נחוץ כשרצים כמה workers: בקשת /reload מגיעה רק לאחד מהם.
+        """
+        if self._watcher is not None or not self.manifest_path:
+            return
+
+        def watch():
+            last_seen = self._manifest_mtime()
+            while True:
+                time.sleep(interval)
+                current = self._manifest_mtime()
+                if current is not None and current != last_seen:
+                    last_seen = current
+                    logging.info("Model registry: champion manifest changed, reloading")
+                    self.reload_async()
+
+        self._watcher = threading.Thread(target=watch, name='model-registry-watch', daemon=True)
+        self._watcher.start()
+
+    @property
+    def active_version(self) -> Optional[str]:
+        bundle = self._active
+        return bundle.version if bundle else None
+
+    def status(self) -> dict:
+        bundle = self._active
+        return {
+            "active": bundle.summary() if bundle else None,
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "history": list(self.history)
+        }
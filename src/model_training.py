@@ -35,6 +35,8 @@ from optuna.samplers import TPESampler
 # Add parent directory to path to import other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.data_collection import load_system_config, ensure_directories
+from src.feature_selection import rank_features
+from src.model_registry import write_manifest
 
 # Configure logging
 logging.basicConfig(
@@ -95,6 +97,12 @@ class ModelTrainer:
         self.horizon = int(self.config['optuna_param_limits'].get('horizon', {}).get('fixed_value', 5))
         self.threshold = self.config['optuna_param_limits'].get('threshold', {}).get('fixed_value', 0.1)
         
+        # Fast feature selection settings
+        selection_params = self.config['training_params'].get('feature_selection', {})
+        self.mi_bins = selection_params.get('n_bins', 32)
+        self.mi_corr_threshold = selection_params.get('corr_threshold', 0.98)
+        self.feature_selection_cache = self.config['system_paths'].get('feature_selection_cache', 'data/cache/feature_selection')
+        
     def load_and_prepare_data(self):
         """
         Load feature data and prepare for model training
@@ -135,12 +143,12 @@ class ModelTrainer:
             logger.error(f"Error loading and preparing data: {str(e)}")
             return False
             
-    def select_features(self, method='mutual_info'):
+    def select_features(self, method='fast_mutual_info'):
         """
         Select top features based on feature importance
         
         Args:
-            method (str): Method for feature selection ('mutual_info' or 'f_classif')
+            method (str): Method for feature selection ('fast_mutual_info', 'mutual_info' or 'f_classif')
             
         Returns:
             list: Selected feature names
@@ -152,6 +160,24 @@ class ModelTrainer:
         feature_cols = [col for col in self.feature_data.columns if col not in exclude_cols
                         and pd.api.types.is_numeric_dtype(self.feature_data[col])]
         
+        if method == 'fast_mutual_info':
+            try:
+                scores = rank_features(
+                    self.feature_data[feature_cols],
+                    self.feature_data['target'],
+                    n_bins=self.mi_bins,
+                    corr_threshold=self.mi_corr_threshold,
+                    cache_dir=self.feature_selection_cache
+                )
+                selected_features = list(scores)[:self.top_n_features]
+                
+                logger.info(f"Selected {len(selected_features)} features: {selected_features[:5]}...")
+                self.selected_features = selected_features
+                return selected_features
+            except Exception as e:
+                logger.error(f"Error in fast feature selection: {str(e)}")
+                logger.warning("Falling back to mutual_info feature selection")
+        
         # Fill NaN values with median
         X = self.feature_data[feature_cols].fillna(self.feature_data[feature_cols].median())
         y = self.feature_data['target']
@@ -527,6 +553,10 @@ class ModelTrainer:
                 json.dump(model_config, f, indent=4)
             logger.info(f"Model configuration saved to {self.model_config_path}")
             
+            # Manifest last, so the model API sees a complete and consistent set of files
+            manifest_path = self.config['system_paths'].get('champion_manifest', 'models/champion_manifest.json')
+            write_manifest(self.config['system_paths'], manifest_path)
+            
             return True
             
         except Exception as e:
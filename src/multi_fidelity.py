@@ -0,0 +1,90 @@
+"""
+multi_fidelity.py - חיפוש היפר-פרמטרים רב-נאמנות (Successive Halving)
+
+ניסויים מוקדמים מאומנים על תת-קבוצה עדכנית של הנתונים ועם פחות סבבי boosting.
+רק ניסויים ששרדו את כל השלבים (rungs) מגיעים ל-CV המלא ולסימולציית המסחר.
+"""
+
+import threading
+from typing import Dict, List
+
+
+class SuccessiveHalvingScheduler:
+    """
+    מתזמן Successive Halving אסינכרוני (בסגנון ASHA).
+
+    כל rung מוגדר כשבר מהמשאב המלא (נתונים ו-n_estimators):
+    עם reduction_factor=3 ו-n_rungs=3 מקבלים 1/9, 1/3, 1.
+    ניסוי ממשיך ל-rung הבא רק אם התוצאה שלו נמצאת ב-1/reduction_factor
+    העליון מבין התוצאות שנרשמו באותו rung עד כה.
+    """
+
+    def __init__(self, reduction_factor: int = 3, n_rungs: int = 3, min_trials_per_rung: int = None):
+        """
+        Args:
+            reduction_factor: פקטור הצמצום בין rungs (eta)
+            n_rungs: מספר ה-rungs כולל ה-rung המלא האחרון
+            min_trials_per_rung: מספר תוצאות מינימלי ב-rung לפני שמתחילים לגזום
+        """
+        if reduction_factor < 2:
+            raise ValueError("reduction_factor must be at least 2")
+        if n_rungs < 1:
+            raise ValueError("n_rungs must be at least 1")
+
+        self.reduction_factor = reduction_factor
+        self.n_rungs = n_rungs
+        self.min_trials_per_rung = min_trials_per_rung if min_trials_per_rung is not None else reduction_factor
+        self._scores: Dict[int, List[float]] = {rung: [] for rung in range(n_rungs)}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, fidelity_config: dict) -> "SuccessiveHalvingScheduler":
+        """יוצר מתזמן מתוך training_params['multi_fidelity']"""
+        return cls(
+            reduction_factor=int(fidelity_config.get('reduction_factor', 3)),
+            n_rungs=int(fidelity_config.get('n_rungs', 3)),
+            min_trials_per_rung=fidelity_config.get('min_trials_per_rung')
+        )
+
+    @property
+    def fractions(self) -> List[float]:
+        """שבר המשאב של כל rung, מהקטן לגדול. ה-rung האחרון תמיד 1.0"""
+        return [1.0 / (self.reduction_factor ** (self.n_rungs - 1 - rung)) for rung in range(self.n_rungs)]
+
+    def is_final(self, rung: int) -> bool:
+        """האם זה ה-rung המלא (CV מלא + בקטסט)"""
+        return rung == self.n_rungs - 1
+
+    def worthwhile(self, n_trials: int) -> bool:
+        """
+        האם n_trials מספיקים כדי שגיזום יחסוך משהו. מתחת ל-min_trials_per_rung * reduction_factor
+        כמעט אף ניסוי לא נגזם, וכל ניסוי משלם על אימוני ה-rungs הנמוכים בנוסף ל-CV המלא.
+        """
+        return n_trials >= self.min_trials_per_rung * self.reduction_factor
+
+    def report(self, rung: int, score: float) -> bool:
+        """
+        רושם תוצאה של ניסוי ב-rung ומחליט אם הניסוי ממשיך.
+
+        Args:
+            rung: אינדקס ה-rung
+            score: התוצאה (גבוה יותר = טוב יותר)
+
+        Returns:
+            True אם הניסוי מקודם ל-rung הבא, False אם יש לגזום אותו
+        """
+        with self._lock:
+            scores = self._scores[rung]
+            scores.append(score)
+
+            if self.is_final(rung) or len(scores) < self.min_trials_per_rung:
+                return True
+
+            n_promoted = max(1, len(scores) // self.reduction_factor)
+            cutoff = sorted(scores, reverse=True)[n_promoted - 1]
+            return score >= cutoff
+
+    def summary(self) -> Dict[str, int]:
+        """מספר הניסויים שהגיעו לכל rung"""
+        with self._lock:
+            return {f"rung_{rung}": len(scores) for rung, scores in self._scores.items()}
@@ -0,0 +1,78 @@
+"""
+prediction_cache.py - מטמון תוצאות חיזוי לפי חלון הנרות
+
+בקשות חוזרות עם אותו חלון היסטורי (retry של ה-agent, רענון ידני) מקבלות
+את וקטור הפיצ'רים והחיזוי מהמטמון במקום לחשב מחדש את כל האינדיקטורים.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+
+def window_hash(bars: list) -> str:
+    """Content hash of a list of bar objects, independent of key order."""
+    return hashlib.sha1(json.dumps(bars, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def payload_hash(payload: bytes) -> str:
+    """Content hash of a binary (Arrow) bar payload."""
+    return hashlib.sha1(payload).hexdigest()
+
+
+class PredictionCache:
+    """
+    TTL + LRU cache keyed by (symbol, last bar timestamp, window hash, model version),
+    with hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, api_settings: dict) -> "PredictionCache":
+        """יוצר מטמון מתוך api_settings['prediction_cache']"""
+        cache_config = api_settings.get('prediction_cache', {})
+        return cls(
+            maxsize=int(cache_config.get('maxsize', 256)),
+            ttl=float(cache_config.get('ttl_seconds', 300))
+        )
+
+    @staticmethod
+    def make_key(symbol: str, last_timestamp, digest: str, model_version: str) -> tuple:
+        return (symbol, str(last_timestamp), digest, model_version)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Any):
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,240 @@
+"""
+prediction_session.py - סשנים של חיזוי עם חלון נרות מתגלגל בצד השרת
+
+במקום שה-agent ישלח 90 יום של נרות בכל מחזור, השרת מחזיק ring buffer של
+הנרות האחרונים לכל סימבול, והלקוח דוחף רק נרות חדשים.
+
+חישוב הפיצ'רים מוגבל בשני צירים:
+- רק על חלון הנרות האחרון (feature_window), לא על כל ההיסטוריה.
+- רק האינדיקטורים שמייצרים את הפיצ'רים שהמודל משתמש בהם. המיפוי אינדיקטור ->
+  עמודות נלמד מהרצה מלאה של FeatureCalculator על חלון מלא ונשמר לפי רשימת הפיצ'רים.
+התוצאה של השורה האחרונה נשמרת עד שמגיע נר חדש.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from src.lazy_import import lazy_import
+except ImportError:
+    from lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class SymbolSession:
+    """Ring buffer of recent bars for one symbol, plus the cached latest feature row."""
+
+    def __init__(self, symbol: str, max_bars: int):
+        self.symbol = symbol
+        self.bars = deque(maxlen=max_bars)
+        self.version = 0
+        self.last_access = time.time()
+        self.lock = threading.Lock()
+        self.cached_key = None
+        self.cached_features = None
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        return self.bars[-1][0] if self.bars else None
+
+    def push(self, bars: List[dict]) -> int:
+        """
+        מוסיף נרות לחלון. נר עם אותו תאריך כמו האחרון מחליף אותו (נר שעדיין נבנה),
+        ונרות ישנים יותר מהאחרון נזרקים.
+
+        Returns:
+            מספר הנרות שנוספו או עודכנו
+        """
+        parsed = []
+        for bar in bars:
+            missing = [col for col in ['date'] + BAR_COLUMNS if col not in bar]
+            if missing:
+                raise ValueError(f"Bar is missing fields: {missing}")
+            parsed.append((pd.Timestamp(bar['date']), {k: v for k, v in bar.items() if k != 'date'}))
+        parsed.sort(key=lambda item: item[0])
+
+        changed = 0
+        with self.lock:
+            for ts, values in parsed:
+                last = self.last_timestamp
+                if last is not None and ts < last:
+                    continue
+                if last is not None and ts == last:
+                    self.bars[-1] = (ts, values)
+                else:
+                    self.bars.append((ts, values))
+                changed += 1
+            if changed:
+                self.version += 1
+            self.last_access = time.time()
+        return changed
+
+    def frame(self, n_bars: Optional[int] = None) -> pd.DataFrame:
+        """DataFrame of the last n_bars bars (all bars if None), indexed by date."""
+        with self.lock:
+            bars = list(self.bars)
+        if n_bars:
+            bars = bars[-n_bars:]
+        df = pd.DataFrame([values for _, values in bars], index=pd.DatetimeIndex([ts for ts, _ in bars], name='date'))
+        return df
+
+
+class IncrementalFeatureComputer:
+    """
+    Computes the latest feature row for a bar window, restricted to the indicators
+    that produce the model's selected features.
+    """
+
+    def __init__(self, feature_window: int = 250, calculator=None):
+        self.feature_window = feature_window
+        self.calculator = calculator
+        # feature set -> (אינדיקטורים, פיצ'רים שגם הרצה מלאה לא מייצרת)
+        self._plans: Dict[tuple, Tuple[List[str], frozenset]] = {}
+        self._lock = threading.Lock()
+
+    def _calculator(self):
+        if self.calculator is None:
+            try:
+                from src.feature_calculator import FeatureCalculator
+            except ImportError:
+                from feature_calculator import FeatureCalculator
+            self.calculator = FeatureCalculator()
+        return self.calculator
+
+    def _plan_for(self, selected_features: List[str], columns_by_indicator: Dict[str, List[str]]) -> List[str]:
+        needed = set(selected_features)
+        # ATR תמיד נדרש לתשובה (atr_value), גם אם אינו פיצ'ר של המודל
+        return [name for name, cols in columns_by_indicator.items()
+                if needed.intersection(cols) or any('ATR_' in col.upper() for col in cols)]
+
+    def latest_features(self, df: pd.DataFrame, selected_features: List[str]) -> pd.DataFrame:
+        """
+        Returns the numeric features of the last row of df (one-row DataFrame).
+
+        The first call for a feature set runs the full sweep and learns the plan. The
+        plan is cached only once the window holds feature_window bars: on a shorter
+        window long-period indicators produce no columns and would be left out.
+        A cached plan that no longer produces a selected feature is re-learned.
+        """
+        window = df.iloc[-self.feature_window:] if self.feature_window else df
+        key = tuple(selected_features)
+        fc = self._calculator()
+
+        with self._lock:
+            cached = self._plans.get(key)
+        features_df = None
+        if cached is not None:
+            plan, unavailable = cached
+            features_df, _ = fc.add_all_possible_indicators(window.copy(), verbose=False, indicator_names=plan)
+            if any(f not in features_df.columns and f not in unavailable for f in selected_features):
+                logging.info("Session feature plan no longer covers the selected features, re-learning it")
+                features_df = None
+
+        if features_df is None:
+            features_df, stats = fc.add_all_possible_indicators(window.copy(), verbose=False)
+            plan = self._plan_for(selected_features, stats.get('columns_by_indicator', {}))
+            missing = [f for f in selected_features if f not in features_df.columns]
+            if missing:
+                logging.warning(f"{len(missing)} selected features were not produced from {len(window)} bars "
+                                f"and will be filled with 0: {missing[:10]}")
+            if not self.feature_window or len(window) >= self.feature_window:
+                with self._lock:
+                    self._plans[key] = (plan, frozenset(missing))
+                logging.info(f"Session feature plan: {len(plan)} indicators for {len(selected_features)} features")
+
+        return features_df.select_dtypes(include=np.number).fillna(0).iloc[[-1]]
+
+    def reset(self):
+        """Drops learned plans (e.g. after a model reload)."""
+        with self._lock:
+            self._plans.clear()
+
+
+class SessionStore:
+    """
+    Per-symbol prediction sessions. Sessions idle longer than idle_ttl seconds are
+    evicted, and at most max_symbols are kept (least recently used goes first).
+    """
+
+    def __init__(self, max_bars: int = 300, feature_window: int = 250, max_symbols: int = 50, idle_ttl: float = 86400,
+                 calculator=None):
+        self.max_bars = max_bars
+        self.max_symbols = max_symbols
+        self.idle_ttl = idle_ttl
+        self.features = IncrementalFeatureComputer(feature_window, calculator)
+        self._sessions: Dict[str, SymbolSession] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, api_settings: dict) -> "SessionStore":
+        """יוצר מאגר סשנים מתוך api_settings['prediction_sessions']"""
+        session_config = api_settings.get('prediction_sessions', {})
+        return cls(
+            max_bars=int(session_config.get('max_bars', 300)),
+            feature_window=int(session_config.get('feature_window', 250)),
+            max_symbols=int(session_config.get('max_symbols', 50)),
+            idle_ttl=float(session_config.get('idle_ttl_seconds', 86400))
+        )
+
+    def _evict(self):
+        now = time.time()
+        for symbol, session in list(self._sessions.items()):
+            if now - session.last_access > self.idle_ttl:
+                del self._sessions[symbol]
+        while len(self._sessions) > self.max_symbols:
+            oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+            del self._sessions[oldest.symbol]
+
+    def get(self, symbol: str, create: bool = True) -> Optional[SymbolSession]:
+        symbol = symbol.upper()
+        with self._lock:
+            session = self._sessions.get(symbol)
+            if session is None and create:
+                session = SymbolSession(symbol, self.max_bars)
+                self._sessions[symbol] = session
+                self._evict()
+            return session
+
+    def drop(self, symbol: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(symbol.upper(), None) is not None
+
+    def push(self, symbol: str, bars: List[dict], reset: bool = False) -> SymbolSession:
+        if reset:
+            self.drop(symbol)
+        session = self.get(symbol)
+        session.push(bars)
+        return session
+
+    def latest_features(self, session: SymbolSession, selected_features: List[str]) -> pd.DataFrame:
+        """
+        Latest feature row for the session. Cached until a new bar arrives or the
+        feature set changes.
+        """
+        key = (session.version, tuple(selected_features))
+        if session.cached_key == key:
+            session.last_access = time.time()
+            return session.cached_features
+        features = self.features.latest_features(session.frame(), selected_features)
+        session.cached_key = key
+        session.cached_features = features
+        return features
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                symbol: {
+                    "bars": len(session.bars),
+                    "last_bar": session.last_timestamp.isoformat() if session.last_timestamp is not None else None
+                }
+                for symbol, session in self._sessions.items()
+            }
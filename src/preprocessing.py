@@ -21,6 +21,7 @@ import sys
 # Add parent directory to path to import data_collection
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.data_collection import load_system_config, ensure_directories
+from src.data_metadata import write_metadata
 
 # Configure logging
 logging.basicConfig(
@@ -311,6 +312,7 @@ class DataPreprocessor:
         try:
             os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
             df_base_features.to_csv(self.processed_data_path)
+            write_metadata(df_base_features, self.processed_data_path, producer='preprocessing')
             logger.info(f"Processed data saved to {self.processed_data_path}")
         except Exception as e:
             logger.error(f"Error saving processed data: {str(e)}")
@@ -322,6 +324,7 @@ class DataPreprocessor:
         try:
             os.makedirs(os.path.dirname(self.feature_data_path), exist_ok=True)
             df_with_indicators.to_csv(self.feature_data_path)
+            write_metadata(df_with_indicators, self.feature_data_path, producer='preprocessing')
             logger.info(f"Feature data saved to {self.feature_data_path}")
         except Exception as e:
             logger.error(f"Error saving feature data: {str(e)}")
@@ -26,7 +26,8 @@ class ProcessManager:
         אתחול מנהל התהליכים
         """
         self.processes: Dict[str, Dict[str, Any]] = {}
-        self.lock = threading.Lock()
+        # RLock: get_all_processes / start_process קוראים למתודות שנועלות בעצמן
+        self.lock = threading.RLock()
         
     def start_process(self, 
                      process_id: str, 
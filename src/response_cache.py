@@ -0,0 +1,101 @@
+"""
+response_cache.py - ETag ומטמון תשובות לנתיבי קריאה של api_server
+
+לכל נתיב יש "גרסה" זולה לחישוב: mtime/גודל של הקבצים שהוא קורא, או מונה השינויים
+של קובץ SQLite. ה-ETag נגזר מהגרסה, כך שבקשה עם If-None-Match תואם מקבלת 304
+בלי לקרוא את הקבצים ובלי לסדר JSON. גוף התשובה נשמר בזיכרון לכל גרסה ומחושב מחדש
+רק כשהגרסה משתנה (או אחרי invalidate).
+"""
+
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+# offset של "file change counter" בכותרת קובץ SQLite (4 בתים, big-endian)
+SQLITE_CHANGE_COUNTER_OFFSET = 24
+
+
+def _stat_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_version(*paths: str) -> tuple:
+    """(mtime_ns, size) per path; None for a missing file."""
+    return tuple(_stat_signature(path) for path in paths)
+
+
+def sqlite_version(db_path: str) -> tuple:
+    """
+    Change counter from the SQLite header plus the WAL file signature.
+    The header counter is bumped by every commit in rollback-journal mode; in WAL mode
+    commits only grow the -wal file, so its signature is part of the version.
+    """
+    try:
+        with open(db_path, 'rb') as f:
+            f.seek(SQLITE_CHANGE_COUNTER_OFFSET)
+            counter = int.from_bytes(f.read(4), 'big')
+    except OSError:
+        return (None,)
+    return (counter, _stat_signature(db_path), _stat_signature(db_path + '-wal'))
+
+
+def make_etag(key: str, version) -> str:
+    """Strong (quoted) ETag derived from the endpoint key and its version."""
+    return '"' + hashlib.sha1(f"{key}:{version!r}".encode('utf-8')).hexdigest()[:20] + '"'
+
+
+class ResponseCache:
+    """
+    Memoizes serialized responses per (key, version), with hit/miss/304 counters.
+    compute() runs outside the lock; concurrent misses of the same key may compute twice.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[object, str, bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def etag(self, key: str, version) -> str:
+        return make_etag(key, version)
+
+    def get(self, key: str, version, compute: Callable[[], bytes]) -> Tuple[str, bytes]:
+        """(etag, body) for the current version; compute() is called only on a version change."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        body = compute()
+        etag = make_etag(key, version)
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+        return etag, body
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified
+            }
@@ -1,149 +1,142 @@
 """
 routes/analysis.py - נתיבי ניתוח וסיכום
 
-נתיבים הקשורים לסיכומי אימון, בדיקות אחוריות ואופטימיזציה
+נתיבים הקשורים לסיכומי אימון, בדיקות אחוריות ואופטימיזציה.
+סיכומי האימון, המועמדים והבדיקות האחוריות מוגשים מ-AnalyticsStore (src/analytics_store.py),
+עם דפדוף, מיון ואגרגציה בצד השרת. נתוני הדפדוף מוחזרים בכותרות X-Total-Count / X-Page / X-Page-Size
+כך שגוף התשובה נשאר רשימה כמו קודם.
 """
 
-from flask import Blueprint, jsonify, send_from_directory
+from flask import Blueprint, jsonify, request
 import logging
 import os
-import json
 from datetime import datetime, timedelta
 import random
 
+from src.analytics_store import AnalyticsStore
+
 analysis_bp = Blueprint('analysis', __name__, url_prefix='/api/analysis')
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+# backtester.save_to_database כותב לתיקיית העבודה, שהיא שורש הפרויקט
+BACKTEST_DB_PATH = os.path.join(BASE_DIR, 'spy_strategy_optimization.db')
+STORE_PATH = os.path.join(BASE_DIR, 'data', 'analytics.sqlite')
+
+_store = None
+
+
+def get_analytics_store():
+    """יוצר את המאגר בשימוש הראשון"""
+    global _store
+    if _store is None:
+        _store = AnalyticsStore(STORE_PATH, MODELS_DIR, BACKTEST_DB_PATH)
+    return _store
+
+
+def _refreshed_store():
+    store = get_analytics_store()
+    store.refresh(max_age=5.0)
+    return store
+
+
+def _paged_response(result):
+    response = jsonify(result['items'])
+    response.headers['X-Total-Count'] = str(result['total'])
+    response.headers['X-Page'] = str(result['page'])
+    response.headers['X-Page-Size'] = str(result['page_size'])
+    return response
+
+
+def _page_args():
+    """Query params: sort, order (asc/desc), page, page_size (עד 500), since, until"""
+    return {
+        "sort": request.args.get('sort'),
+        "order": request.args.get('order', 'desc'),
+        "page": request.args.get('page', default=1, type=int),
+        "page_size": request.args.get('page_size', default=50, type=int),
+        "since": request.args.get('since'),
+        "until": request.args.get('until')
+    }
+
+
+def _aggregate(table, default_metric):
+    try:
+        result = _refreshed_store().best_per_period(
+            table,
+            metric=request.args.get('metric', default_metric),
+            period=request.args.get('period', 'week'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            strategy=request.args.get('strategy')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
 @analysis_bp.route('/training_summaries', methods=['GET'])
 def get_training_summaries():
-    """מחזיר סיכומי אימון של מודלים"""
-    
-    # מידע לדוגמה על סיכומי אימון
-    summaries = []
-    
-    # יצירת 5 סיכומי אימון לדוגמה
-    for i in range(5):
-        days_ago = i * 2
-        train_date = datetime.now() - timedelta(days=days_ago)
-        accuracy = random.uniform(0.65, 0.85)
-        f1 = random.uniform(0.60, 0.80)
-        
-        summary = {
-            "id": f"train_{train_date.strftime('%Y%m%d')}_{i}",
-            "model_type": "lightgbm",
-            "version": f"v{3+i//2}.{i%3}",
-            "train_date": train_date.isoformat(),
-            "train_duration_seconds": random.randint(600, 3600),
-            "accuracy": accuracy,
-            "f1_score": f1,
-            "precision": random.uniform(0.65, 0.85),
-            "recall": random.uniform(0.60, 0.85),
-            "feature_count": random.randint(30, 50),
-            "hyperparameters": {
-                "learning_rate": 0.05,
-                "max_depth": 5,
-                "n_estimators": 200,
-                "colsample_bytree": 0.8
-            },
-            "training_dataset": {
-                "start_date": (train_date - timedelta(days=365)).strftime("%Y-%m-%d"),
-                "end_date": train_date.strftime("%Y-%m-%d"),
-                "symbol": "SPY",
-                "samples": random.randint(100000, 500000)
-            },
-            "validation_stats": {
-                "confusion_matrix": [
-                    [random.randint(300, 500), random.randint(50, 150)],
-                    [random.randint(50, 150), random.randint(300, 500)]
-                ],
-                "roc_auc": random.uniform(0.65, 0.90)
-            },
-            "is_champion": i == 0
-        }
-        
-        summaries.append(summary)
-    
-    return jsonify(summaries)
+    """מחזיר סיכומי אימון של מודלים (ברירת מחדל: החדש ביותר קודם)"""
+    try:
+        result = _refreshed_store().page('training_runs', **_page_args())
+    except Exception as e:
+        logging.error(f"Training summaries query failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    for run in result['items']:
+        # הדשבורד משתמש ב-file_ts להרצת בקטסט / מחיקה של המודל
+        run['file_ts'] = run['run_key']
+    return _paged_response(result)
+
+
+@analysis_bp.route('/training_summaries/aggregate', methods=['GET'])
+def get_training_aggregate():
+    """הריצה הטובה ביותר לכל תקופה: ?metric=test_accuracy&period=week|day|month"""
+    return _aggregate('training_runs', 'test_accuracy')
+
+
+@analysis_bp.route('/candidates', methods=['GET'])
+def get_candidates():
+    """מחזיר קונפיגורציות של מודלים מועמדים"""
+    try:
+        result = _refreshed_store().page('candidates', **_page_args())
+    except Exception as e:
+        logging.error(f"Candidates query failed: {e}")
+        return jsonify({"error": str(e)}), 500
+    return _paged_response(result)
+
 
 @analysis_bp.route('/backtests', methods=['GET'])
 def get_backtest_list():
-    """מחזיר רשימת בדיקות אחוריות"""
-    
-    # מידע לדוגמה על בדיקות אחוריות
-    backtests = []
-    
-    # יצירת 10 בדיקות אחוריות לדוגמה
-    for i in range(10):
-        days_ago = i 
-        test_date = datetime.now() - timedelta(days=days_ago)
-        profit = random.uniform(-15, 25)
-        
-        backtest = {
-            "id": f"backtest_{test_date.strftime('%Y%m%d')}_{i}",
-            "file_name": f"backtest_{test_date.strftime('%Y%m%d')}_{i}.json",
-            "model_version": f"v{3+i//3}.{i%3}",
-            "test_date": test_date.isoformat(),
-            "symbol": "SPY",
-            "period": "1d",
-            "start_date": (test_date - timedelta(days=180)).strftime("%Y-%m-%d"),
-            "end_date": test_date.strftime("%Y-%m-%d"),
-            "total_trades": random.randint(20, 100),
-            "win_rate": random.uniform(0.4, 0.7),
-            "profit_percent": profit,
-            "max_drawdown": random.uniform(-15, -5),
-            "sharpe_ratio": random.uniform(0.5, 2.5),
-            "is_champion": i == 0
-        }
-        
-        backtests.append(backtest)
-    
-    return jsonify(backtests)
+    """מחזיר רשימת בדיקות אחוריות (?strategy= תומך ב-*)"""
+    try:
+        result = _refreshed_store().page('backtests', strategy=request.args.get('strategy'), **_page_args())
+    except Exception as e:
+        logging.error(f"Backtests query failed: {e}")
+        return jsonify({"error": str(e)}), 500
 
-@analysis_bp.route('/backtests/summary_champion.json', methods=['GET'])
-def get_champion_backtest():
-    """מחזיר מידע על בדיקה אחורית של המודל האלוף"""
-    
-    # מידע לדוגמה על בדיקה אחורית של המודל האלוף
-    test_date = datetime.now() - timedelta(days=1)
-    
-    champion = {
-        "id": f"backtest_champion_{test_date.strftime('%Y%m%d')}",
-        "model_version": "v3.2",
-        "test_date": test_date.isoformat(),
-        "symbol": "SPY",
-        "period": "1d",
-        "start_date": (test_date - timedelta(days=180)).strftime("%Y-%m-%d"),
-        "end_date": test_date.strftime("%Y-%m-%d"),
-        "total_trades": 68,
-        "win_rate": 0.65,
-        "profit_percent": 18.7,
-        "max_drawdown": -8.3,
-        "sharpe_ratio": 1.8,
-        "trades": [
-            # לדוגמה, 10 עסקאות
-            *[{
-                "entry_date": (test_date - timedelta(days=180-i*5)).isoformat(),
-                "exit_date": (test_date - timedelta(days=180-i*5-2)).isoformat(),
-                "position": "LONG" if random.random() > 0.4 else "SHORT",
-                "entry_price": random.uniform(350, 450),
-                "exit_price": random.uniform(350, 450),
-                "profit_percent": random.uniform(-5, 8),
-                "duration_days": 2
-            } for i in range(10)]
-        ],
-        "equity_curve": [
-            # לדוגמה, נקודות בעקומת הון
-            *[{
-                "date": (test_date - timedelta(days=180-i*10)).isoformat(),
-                "equity": 10000 * (1 + random.uniform(-0.15, 0.3))
-            } for i in range(19)]
-        ],
-        "monthly_returns": {
-            f"{(test_date - timedelta(days=30*i)).strftime('%Y-%m')}": random.uniform(-8, 12)
-            for i in range(1, 7)
-        }
-    }
-    
-    return jsonify(champion)
+    for backtest in result['items']:
+        backtest['file_name'] = f"summary_{backtest['strategy_name']}.json"
+    return _paged_response(result)
+
+
+@analysis_bp.route('/backtests/aggregate', methods=['GET'])
+def get_backtest_aggregate():
+    """הבדיקה הטובה ביותר לכל תקופה: ?metric=sharpe_ratio&period=week|day|month&strategy="""
+    return _aggregate('backtests', 'sharpe_ratio')
+
+
+@analysis_bp.route('/backtests/summary_<path:strategy_name>.json', methods=['GET'])
+def get_backtest_summary(strategy_name):
+    """מחזיר את הבדיקה האחורית האחרונה של אסטרטגיה (summary_champion.json, summary_candidate_<ts>.json)"""
+    backtest = _refreshed_store().latest_backtest(strategy_name)
+    if backtest is None:
+        return jsonify({
+            "error": "not_found",
+            "message": f"No backtest results for '{strategy_name}'"
+        }), 404
+    return jsonify(backtest)
 
 @analysis_bp.route('/optuna', methods=['GET'])
 def get_optuna_data():
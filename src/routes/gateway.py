@@ -12,6 +12,8 @@ import json
 from dotenv import load_dotenv
 from pathlib import Path
 
+from src.config_service import get_config_service
+
 # יצירת Blueprint עבור ניהול Gateway
 gateway_bp = Blueprint('gateway', __name__, url_prefix='/api/gateway')
 
@@ -32,13 +34,7 @@ except ImportError:
 def load_system_config():
     """טוען את קובץ תצורת המערכת"""
     try:
-        config_path = Path('system_config.json')
-        if not config_path.exists():
-            logging.error(f"Config file not found at {config_path}")
-            return {}
-            
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_config_service('system_config.json').get()
     except Exception as e:
         logging.error(f"Error loading system config: {e}")
         return {}
@@ -1,79 +1,125 @@
 """
 routes/health.py - נתיבי בריאות המערכת
 
-נתיבים הקשורים למצב בריאות רכיבי המערכת השונים
+נתיבים הקשורים למצב בריאות רכיבי המערכת השונים.
+הנתונים נדגמים ברקע ע"י HealthMonitor (src/health_monitor.py); הנתיבים רק קוראים
+את הדגימה האחרונה וסדרות הזמן מהזיכרון.
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import logging
 import os
-import json
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+
+from src.config_service import get_config_service
+from src.health_monitor import HealthMonitor
+from src.process_manager import process_manager
 
 health_bp = Blueprint('health', __name__, url_prefix='/api')
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_VERSION = "1.0.0"
+
+_monitor = None
+
+
+def _load_config():
+    try:
+        return get_config_service(os.path.join(BASE_DIR, 'system_config.json')).get()
+    except Exception as e:
+        logging.error(f"Error loading system config: {e}")
+        return {}
+
+
+def get_health_monitor():
+    """יוצר את המנטר בשימוש הראשון ומפעיל את thread הדגימה"""
+    global _monitor
+    if _monitor is None:
+        _monitor = HealthMonitor(BASE_DIR, _load_config(), process_manager=process_manager)
+        # נתיבים ו-ibkr_settings מתעדכנים בדגימה הבאה אחרי שינוי בקובץ
+        get_config_service(os.path.join(BASE_DIR, 'system_config.json')).subscribe(
+            lambda new, old: setattr(_monitor, 'config', new))
+        _monitor.start()
+    return _monitor
+
+
+def _format_uptime(seconds):
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
 @health_bp.route('/health', methods=['GET'])
 def get_health():
     """בדיקת בריאות בסיסית לשרת API"""
+    snapshot = get_health_monitor().snapshot()
     return jsonify({
-        "status": "healthy",
+        "status": snapshot['status'],
         "timestamp": datetime.now().isoformat(),
-        "uptime": "7:23:15",  # מידע סטטי לדוגמה
-        "api_version": "1.0.0"
+        "uptime": _format_uptime(snapshot['uptime_seconds']),
+        "uptime_seconds": snapshot['uptime_seconds'],
+        "api_version": API_VERSION,
+        "components": {name: result.get('status') for name, result in snapshot['components'].items()}
     })
 
+
+@health_bp.route('/health/details', methods=['GET'])
+def get_health_details():
+    """הדגימה האחרונה המלאה של כל הרכיבים"""
+    return jsonify(get_health_monitor().snapshot())
+
+
+@health_bp.route('/health/history', methods=['GET'])
+def get_health_history():
+    """סדרות זמן: ?series=data.max_age_hours,gateway.connected&since=<unix time>"""
+    names = [name.strip() for name in request.args.get('series', '').split(',') if name.strip()]
+    return jsonify(get_health_monitor().get_series(names or None, since=request.args.get('since', type=float)))
+
+
 @health_bp.route('/data_health', methods=['GET'])
 def get_data_health():
     """מחזיר מידע על בריאות מערכת איסוף ועיבוד הנתונים"""
-    
-    # מידע לדוגמה על בריאות הנתונים
-    last_update = datetime.now() - timedelta(minutes=random.randint(5, 120))
-    
+    components = get_health_monitor().snapshot()['components']
+    data = components.get('data', {})
+    gateway = components.get('gateway', {})
+    files = data.get('files', {})
+    last_bars = [f['last_bar'] for f in files.values() if f.get('last_bar')]
+
     return jsonify({
-        "status": "healthy",
-        "lastDataUpdate": last_update.isoformat(),
-        "dataPoints": random.randint(1000, 10000),
-        "latestSymbol": "SPY",
-        "dataSourceStatus": "connected",
-        "errors": [],
-        "warnings": ["API rate limit at 80%"],
-        "processingQueue": random.randint(0, 10),
-        "dataConsistencyScore": random.uniform(95, 100),
+        "status": data.get('status', 'unknown'),
+        "lastDataUpdate": max(last_bars) if last_bars else None,
+        "dataPoints": sum(f.get('rows') or 0 for f in files.values()),
+        "latestSymbol": _load_config().get('contract', {}).get('symbol', 'SPY'),
+        "dataSourceStatus": "connected" if gateway.get('connected') else "disconnected",
+        "errors": data.get('errors', []) + gateway.get('errors', []),
+        "warnings": data.get('warnings', []),
         "details": {
-            "lastFullRefresh": (datetime.now() - timedelta(hours=12)).isoformat(),
-            "connectedSources": ["yfinance", "alpha_vantage"],
-            "pendingJobs": random.randint(0, 5)
+            "files": files,
+            "maxAgeHours": data.get('max_age_hours'),
+            "checkedAt": data.get('checked_at'),
+            "gateway": gateway
         }
     })
 
+
 @health_bp.route('/model_health', methods=['GET'])
 def get_model_health():
     """מחזיר מידע על בריאות מודל המכונה"""
-    
-    # מידע לדוגמה על בריאות המודל
-    last_train = datetime.now() - timedelta(hours=random.randint(1, 48))
-    
+    model = get_health_monitor().snapshot()['components'].get('model', {})
+    latency = model.get('prediction_latency_ms', {})
+
     return jsonify({
-        "status": "healthy",
-        "currentModel": "lightgbm_v3.2",
-        "lastTrained": last_train.isoformat(),
-        "accuracy": random.uniform(0.65, 0.85),
-        "f1Score": random.uniform(0.60, 0.80),
-        "precision": random.uniform(0.65, 0.85),
-        "recall": random.uniform(0.60, 0.85),
-        "featureCount": random.randint(30, 50),
-        "errors": [],
-        "warnings": [],
-        "inferenceLatency": random.uniform(0.1, 2.5),
+        "status": model.get('status', 'unknown'),
+        "currentModel": model.get('model_version'),
+        "lastTrained": model.get('trained_at'),
+        "modelAgeDays": model.get('age_days'),
+        "featureCount": model.get('feature_count'),
+        "errors": model.get('errors', []),
+        "warnings": model.get('warnings', []),
+        "inferenceLatency": latency.get('p50_ms'),
         "details": {
-            "hyperparameters": {
-                "learning_rate": 0.05,
-                "max_depth": 5,
-                "n_estimators": 200
-            },
-            "lastEvaluation": (datetime.now() - timedelta(hours=2)).isoformat(),
-            "stabilityScore": random.uniform(90, 99),
-            "driftDetected": False
+            "apiReachable": model.get('api_reachable'),
+            "predictionLatencyMs": latency,
+            "checkedAt": model.get('checked_at')
         }
     })
@@ -9,20 +9,16 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from src.config_service import get_config_service, validate_config
+
 # יצירת Blueprint עבור נתיבי מערכת
 system_bp = Blueprint('system', __name__, url_prefix='/api/system')
 
 # טעינת קובץ תצורת המערכת
 def load_system_config():
-    """טוען את קובץ תצורת המערכת"""
+    """טוען עותק של תצורת המערכת (הנתיבים כאן משנים אותו לפני שליחה/שמירה)"""
     try:
-        config_path = Path('system_config.json')
-        if not config_path.exists():
-            logging.error(f"Config file not found at {config_path}")
-            return {}
-            
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_config_service('system_config.json').copy()
     except Exception as e:
         logging.error(f"Error loading system config: {e}")
         return {}
@@ -206,9 +202,14 @@ def update_system_config():
         
         update_dict(config, updates)
         
+        errors = validate_config(config)
+        if errors:
+            return jsonify({"status": "error", "message": "Invalid configuration", "errors": errors}), 400
+        
         # שמירת התצורה המעודכנת
         with open('system_config.json', 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
+        get_config_service('system_config.json').invalidate()
         
         return jsonify({"status": "success", "message": "Configuration updated"})
     except Exception as e:
@@ -7,6 +7,13 @@ import os
 import logging
 import sys
 
+# הוספת הנתיב הראשי של הפרויקט כדי לאפשר ייבוא מ-src
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.data_metadata import write_metadata
+
 # הגדרת לוגינג
 logging.basicConfig(
     level=logging.INFO,
@@ -55,6 +62,7 @@ def preprocess_data():
         # שמירת הקובץ המאוחד
         logging.info(f"Saving merged data to {out_path}")
         merged_df.to_csv(out_path, index=False)
+        write_metadata(merged_df, out_path, producer='run_preprocessing')
         logging.info(f"Successfully saved {len(merged_df)} rows to {out_path}")
         
         # תמצית סטטיסטית
@@ -0,0 +1,204 @@
+"""
+status_broadcaster.py - שידור סטטוס ב-Socket.IO לפי שינויים בלבד
+
+משימת רקע אחת מחשבת את הסטטוס (מצב ה-agent, תהליכים, קובצי נתונים) בקצב קבוע,
+או מוקדם יותר כשקובץ במעקב משתנה, משווה לתמונה הקודמת ומשדרת לכל המנויים
+רק את השדות שהשתנו. מספר הלקוחות לא משפיע על כמות העבודה בשרת.
+
+פרוטוקול:
+- לקוח שולח 'subscribe_status' ומקבל 'status_update' עם התמונה המלאה האחרונה.
+- אחר כך מגיעים אירועי 'status_diff': {"version", "server_time", "changes"}.
+  changes מקונן כמו הסטטוס; מפתח שנמחק מופיע עם הערך None.
+- 'unsubscribe_status' (או ניתוק) מפסיק את השידור ללקוח.
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+STATUS_ROOM = 'status_subscribers'
+
+
+def diff_state(old: Optional[dict], new: dict) -> dict:
+    """Changed keys of new relative to old (recursive for nested dicts); removed keys map to None."""
+    if not isinstance(old, dict):
+        return copy.deepcopy(new)
+    changes = {}
+    for key, value in new.items():
+        if key not in old:
+            changes[key] = copy.deepcopy(value)
+        elif old[key] != value:
+            if isinstance(old[key], dict) and isinstance(value, dict):
+                changes[key] = diff_state(old[key], value)
+            else:
+                changes[key] = copy.deepcopy(value)
+    for key in old:
+        if key not in new:
+            changes[key] = None
+    return changes
+
+
+class StatusBroadcaster:
+    """
+    Computes the status once per tick and pushes diffs to the subscribers room.
+
+    socketio is a flask_socketio.SocketIO instance (emit / start_background_task / sleep).
+    sources maps a top-level status key to a function returning its current value.
+    """
+
+    def __init__(self, socketio, sources: Dict[str, Callable[[], object]], interval: float = 2.0,
+                 room: str = STATUS_ROOM, watch_paths: Iterable[str] = (), min_gap: float = 0.5):
+        self.socketio = socketio
+        self.sources = sources
+        self.interval = interval
+        self.min_gap = min(min_gap, interval)
+        self.room = room
+        self.watch_paths = [os.path.abspath(p) for p in watch_paths]
+        self.snapshot: Optional[dict] = None
+        self.snapshot_at = 0.0
+        self.version = 0
+        self.subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._started = False
+        self._observer = None
+        self.ticks = 0
+        self.last_tick_seconds: Optional[float] = None
+
+    # --- מנויים ---
+    def subscribe(self, sid: str) -> dict:
+        """
+        Registers sid and returns the full snapshot to send it. The snapshot is taken after
+        registering, so every later change reaches the new subscriber as a diff.
+        """
+        with self._lock:
+            self.subscribers.add(sid)
+        self.start()
+        self._wake.set()
+        return self.current()
+
+    def unsubscribe(self, sid: str):
+        with self._lock:
+            self.subscribers.discard(sid)
+
+    def current(self) -> dict:
+        """
+        Latest full snapshot. Recomputed only if older than one interval, so any
+        number of clients asking within an interval share one computation.
+        """
+        if self.snapshot is None or time.monotonic() - self.snapshot_at > self.interval:
+            self.tick()
+        with self._lock:
+            version, snapshot = self.version, self.snapshot
+        return {"version": version, "server_time": self._server_time(), "status": snapshot}
+
+    # --- חישוב ושידור ---
+    @staticmethod
+    def _server_time():
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def compute(self) -> dict:
+        status = {}
+        for name, source in self.sources.items():
+            try:
+                status[name] = source()
+            except Exception as e:
+                logging.error(f"Status broadcaster: source '{name}' failed: {e}")
+                status[name] = {'error': str(e)}
+        return status
+
+    def tick(self, emit: bool = True) -> dict:
+        """
+        Computes the status once; emits the diff to the room if anything changed and someone is
+        subscribed when the new snapshot is committed. Returns the diff.
+        """
+        start = time.perf_counter()
+        status = self.compute()
+        with self._lock:
+            changes = diff_state(self.snapshot, status)
+            if changes:
+                self.snapshot = status
+                self.version += 1
+            self.snapshot_at = time.monotonic()
+            version = self.version
+            # ההחלטה נעשית תחת אותו lock כמו subscribe(): מנוי חדש מקבל את השינוי בתמונה או כ-diff
+            emit = emit and bool(self.subscribers)
+        self.ticks += 1
+        self.last_tick_seconds = time.perf_counter() - start
+
+        if changes and emit:
+            self.socketio.emit('status_diff', {
+                "version": version,
+                "server_time": self._server_time(),
+                "changes": changes
+            }, to=self.room)
+        return changes
+
+    def trigger(self):
+        """Requests an immediate tick (e.g. from a file-change event)."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                has_subscribers = bool(self.subscribers)
+            # בלי מנויים אין טעם לחשב; התמונה תחושב בבקשה הבאה
+            if not has_subscribers:
+                continue
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Status broadcaster tick failed: {e}")
+            # אירועי קבצים תכופים (לוג שנכתב כל הזמן) מאוחדים לטיק אחד לכל היותר פעם ב-min_gap
+            self.socketio.sleep(self.min_gap)
+
+    def _start_watcher(self):
+        if not self.watch_paths:
+            return
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+
+        broadcaster = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                broadcaster.trigger()
+
+        observer = Observer()
+        observer.daemon = True
+        for path in self.watch_paths:
+            try:
+                observer.schedule(_Handler(), path, recursive=False)
+            except OSError as e:
+                logging.warning(f"Status broadcaster: cannot watch {path}: {e}")
+        observer.start()
+        self._observer = observer
+
+    def start(self):
+        """Starts the single background task (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._start_watcher()
+        self.socketio.start_background_task(self._run)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = len(self.subscribers)
+        return {
+            "subscribers": subscribers,
+            "version": self.version,
+            "ticks": self.ticks,
+            "interval_seconds": self.interval,
+            "last_tick_ms": round(self.last_tick_seconds * 1000, 2) if self.last_tick_seconds is not None else None
+        }
@@ -4,6 +4,11 @@ from datetime import datetime
 import logging
 import json
 
+try:
+    from src.config_service import ConfigValidationError, get_config_service, validate_config
+except ImportError:
+    from config_service import ConfigValidationError, get_config_service, validate_config
+
 
 def archive_existing_file(filepath):
     """
@@ -28,35 +33,19 @@ def load_system_config():
     """
     Loads the main system configuration file.
     
+    The file is parsed and validated once per process and re-read only when its
+    mtime changes (see config_service.py). The returned dict is shared - do not
+    modify it; use get_config_service().copy() to build a modified config.
+    
     Returns:
         dict: Configuration data from system_config.json
         
     Raises:
         FileNotFoundError: If the configuration file is missing
         json.JSONDecodeError: If the configuration file has invalid JSON
+        ConfigValidationError: If the configuration does not match the schema
     """
-    config_path = 'system_config.json'
-    try:
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"Configuration file not found: {config_path}")
-            
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-        
-        # Basic validation of required sections
-        required_sections = ['training_params', 'backtest_params', 'contract', 'api_settings']
-        missing_sections = [section for section in required_sections if section not in config_data]
-        
-        if missing_sections:
-            logging.warning(f"Configuration is missing required sections: {', '.join(missing_sections)}")
-        
-        return config_data
-    except json.JSONDecodeError as e:
-        logging.error(f"Invalid JSON in configuration file: {str(e)}")
-        raise
-    except Exception as e:
-        logging.error(f"Error loading configuration: {str(e)}")
-        raise
+    return get_config_service('system_config.json').get()
 
 
 def save_system_config(config_data):
@@ -68,10 +57,15 @@ def save_system_config(config_data):
         
     Raises:
         TypeError: If config_data is not a dictionary
+        ConfigValidationError: If config_data does not match the schema
         IOError: If there's an error writing to the file
     """
     if not isinstance(config_data, dict):
         raise TypeError("Configuration data must be a dictionary")
+    
+    errors = validate_config(config_data)
+    if errors:
+        raise ConfigValidationError("Invalid configuration: " + "; ".join(errors))
         
     config_path = 'system_config.json'
     
@@ -82,6 +76,7 @@ def save_system_config(config_data):
     try:
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config_data, f, indent=2, ensure_ascii=False)
+        get_config_service(config_path).invalidate()
         logging.info(f"Configuration saved successfully to {config_path}")
     except IOError as e:
         logging.error(f"Failed to write configuration file: {str(e)}")
@@ -101,8 +96,7 @@ def get_system_path(path_key):
     Returns:
         הנתיב המלא
     """
-    config = load_system_config()
-    paths = config.get('system_paths', {})
+    paths = get_config_service('system_config.json').section('system_paths')
     
     if path_key not in paths:
         # אם המפתח לא קיים, החזר ערך ברירת מחדל לפי המפתח
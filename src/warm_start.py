@@ -0,0 +1,144 @@
+"""
+warm_start.py - אתחול חם של מחקרי Optuna מתוך הרצות אימון קודמות
+
+קורא את קונפיגורציות המודלים (candidate / champion) ואת סיכומי האימון השמורים,
+ומכניס את הפרמטרים שלהם לתור של ה-study (enqueue_trial) כדי שירוצו ראשונים.
+המדדים שנרשמו בהרצות הקודמות לא מועתקים: הם חושבו על חלון נתונים אחר, ולכן כל
+ניסוי כזה מוערך מחדש על הנתונים הנוכחיים (כולל בחירת הפיצ'רים ומדדי ה-backtest שלו).
+"""
+
+import glob
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+import optuna
+from optuna.distributions import FloatDistribution, IntDistribution
+
+# פרמטרים של הסימולציה שה-objective מציע כ-float רגיל
+SIM_PARAMS = ['threshold', 'stop_loss_pct', 'take_profit_pct', 'risk_per_trade']
+
+
+def build_search_space(param_limits: Dict[str, dict], fixed_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    בונה את מרחב החיפוש של OptunaTrainer מתוך optuna_param_limits.
+    חייב להתאים להצעות ב-_get_model_params וב-_objective.
+    """
+    space = {}
+    for name, limits in param_limits.items():
+        if name in fixed_params or not limits.get('optimize', True):
+            continue
+        if name == 'learning_rate':
+            space[name] = FloatDistribution(limits.get('min', 0.001), limits.get('max', 0.1), log=True)
+        elif name == 'n_estimators':
+            space[name] = IntDistribution(limits.get('min', 50), limits.get('max', 300))
+        elif name == 'max_depth':
+            space[name] = IntDistribution(limits.get('min', 3), limits.get('max', 10))
+        elif name == 'top_n_features':
+            space[name] = IntDistribution(limits.get('min', 20), limits.get('max', 100))
+        elif name in SIM_PARAMS:
+            space[name] = FloatDistribution(limits.get('min'), limits.get('max'))
+    return space
+
+
+def _params_from_model_config(model_config: dict) -> dict:
+    """מחלץ פרמטרים מקונפיגורציית מודל - גם בפורמט הישן (params) וגם בחדש (model_params + sim_params)"""
+    if 'params' in model_config and isinstance(model_config['params'], dict):
+        nested = model_config['params']
+        if 'model_params' in nested or 'sim_params' in nested:
+            model_config = nested
+        else:
+            return dict(nested)
+
+    params = {}
+    params.update(model_config.get('model_params', {}))
+    params.update(model_config.get('sim_params', {}))
+    if 'top_n_features' not in params and model_config.get('selected_features'):
+        params['top_n_features'] = len(model_config['selected_features'])
+    return params
+
+
+def load_historical_trials(models_dir: str) -> List[Dict[str, Any]]:
+    """
+    אוסף פרמטרים מהרצות קודמות, מהחדש לישן.
+
+    Returns:
+        רשימת מילונים עם המפתחות params, source ו-mtime
+    """
+    records = []
+
+    summary_paths = [os.path.join(models_dir, 'training_summary.json')]
+    summary_paths += glob.glob(os.path.join(models_dir, 'archive', 'training_summary.json.*'))
+    config_paths = [os.path.join(models_dir, 'champion_model_config.json')]
+    config_paths += glob.glob(os.path.join(models_dir, 'candidate_model_config_*.json'))
+
+    for path in summary_paths + config_paths:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.warning(f"Warm start: skipping unreadable file {path}: {e}")
+            continue
+
+        if 'optuna_params' in data:
+            params = dict(data['optuna_params'])
+        elif 'best_params' in data:
+            params = dict(data['best_params'])
+        else:
+            params = _params_from_model_config(data)
+
+        if params:
+            records.append({
+                'params': params,
+                'source': path,
+                'mtime': os.path.getmtime(path)
+            })
+
+    records.sort(key=lambda r: r['mtime'], reverse=True)
+    return records
+
+
+def _clip_to_space(params: dict, search_space: Dict[str, Any]) -> dict:
+    """משאיר רק פרמטרים ממרחב החיפוש הנוכחי, חתוכים לגבולות שלו"""
+    clipped = {}
+    for name, dist in search_space.items():
+        value = params.get(name)
+        if not isinstance(value, (int, float)):
+            continue
+        value = min(max(value, dist.low), dist.high)
+        clipped[name] = int(round(value)) if isinstance(dist, IntDistribution) else float(value)
+    return clipped
+
+
+def seed_study(study: optuna.Study, search_space: Dict[str, Any], models_dir: str, max_trials: int = 10) -> int:
+    """
+    מכניס לתור של ה-study ניסויים מהרצות קודמות, עם ערכים חתוכים לגבולות מרחב החיפוש.
+    פרמטרים שחסרים ברשומה נדגמים ע"י Optuna כרגיל.
+
+    Returns:
+        מספר הניסויים שנכנסו לתור
+    """
+    if not search_space:
+        return 0
+
+    seen = set()
+    seeded = 0
+
+    for record in load_historical_trials(models_dir):
+        if seeded >= max_trials:
+            break
+
+        params = _clip_to_space(record['params'], search_space)
+        key = tuple(sorted(params.items()))
+        if not params or key in seen:
+            continue
+        seen.add(key)
+
+        study.enqueue_trial(params, user_attrs={'warm_start_source': record['source']}, skip_if_exists=True)
+        seeded += 1
+
+    logging.info(f"Warm start: enqueued {seeded} historical trials from {models_dir}")
+    return seeded
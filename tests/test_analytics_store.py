@@ -0,0 +1,141 @@
+import sys
+import json
+import pathlib
+import sqlite3
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from analytics_store import AnalyticsStore
+
+
+def _write_summary(path, run_ts, accuracy):
+    path.write_text(json.dumps({
+        "timestamp": "ignored",
+        "training_run_timestamp": run_ts,
+        "optuna_study_name": f"study_{run_ts}",
+        "test_accuracy": accuracy,
+        "classification_report": {"macro avg": {"f1-score": accuracy - 0.1, "precision": 0.5, "recall": 0.5}},
+        "best_params": {"num_leaves": 31},
+        "selected_features_list": ["a", "b", "c"]
+    }), encoding='utf-8')
+
+
+def _main_trainer_run(models, trained_at, accuracy, sharpe, with_run_id=True):
+    """
+    best_params ו-metrics במבנה ש-OptunaTrainer.run_optimization מחזיר; הסיכום נכתב כמו
+    save_training_summary והקונפיגורציה כמו ב-main(). ריצות שנשמרו לפני שנוסף
+    training_run_timestamp (with_run_id=False) מזוהות לפי training_date והפרמטרים.
+    """
+    run_ts = trained_at.replace('-', '').replace(' ', '_').replace(':', '')
+    best_params = {
+        'model_params': {'learning_rate': 0.05, 'max_depth': 5, 'n_estimators': 120 + int(accuracy * 100)},
+        'selected_features': ['RSI_14', 'MACD_12_26_9', 'ATRr_14'],
+        'feature_importances': {'RSI_14': 40, 'MACD_12_26_9': 35, 'ATRr_14': 25},
+        'accuracy': accuracy,
+        'sim_params': {'threshold': 0.6, 'stop_loss_pct': 1.5}
+    }
+    if with_run_id:
+        best_params = {'training_run_timestamp': run_ts, **best_params}
+    metrics = {
+        'accuracy': accuracy,
+        'feature_importances': {k: float(v) for k, v in best_params['feature_importances'].items()},
+        'params': best_params,
+        'training_date': trained_at,
+        'data_start': '2020-01-02',
+        'data_end': '2024-12-31',
+        'training_samples': 900,
+        'test_samples': 100,
+        'pruned_redundant_features': 12,
+        'optuna_params': {'learning_rate': 0.05, 'max_depth': 5},
+        'total_return': 0.12,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': -0.08,
+        'win_rate': 0.55,
+        'num_trades': 42.0,
+        'benchmark_return': 0.1
+    }
+    if with_run_id:
+        metrics['training_run_timestamp'] = run_ts
+    return best_params, json.dumps(metrics, indent=4, ensure_ascii=False)
+
+
+def _make_backtest_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS strategy_results (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                 "run_timestamp TEXT, strategy_name TEXT, total_return REAL, sharpe_ratio REAL, max_drawdown REAL)")
+    conn.executemany("INSERT INTO strategy_results (run_timestamp, strategy_name, total_return, sharpe_ratio, "
+                     "max_drawdown) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def test_training_runs_and_champion_flag(tmp_path):
+    models = tmp_path / 'models'
+    (models / 'archive').mkdir(parents=True)
+    _write_summary(models / 'archive' / 'training_summary.json.20250101_000000', '20250101_090000', 0.61)
+    _write_summary(models / 'training_summary.json', '20250108_090000', 0.64)
+    (models / 'candidate_model_config_20250108_090000.json').write_text(json.dumps(
+        {"training_run_timestamp": "20250108_090000", "selected_features": ["a"], "params": {}, "risk_params": {}}))
+    (models / 'champion_model_config.json').write_text(json.dumps({"training_run_timestamp": "20250101_090000"}))
+
+    store = AnalyticsStore(str(tmp_path / 'a.sqlite'), str(models))
+    assert store.refresh() == {'training_runs': 2, 'candidates': 1, 'backtests': 0}
+    assert store.refresh() == {'training_runs': 0, 'candidates': 0, 'backtests': 0}
+
+    page = store.page('training_runs', sort='test_accuracy', order='asc')
+    assert page['total'] == 2
+    assert [r['run_key'] for r in page['items']] == ['20250101_090000', '20250108_090000']
+    assert [r['is_champion'] for r in page['items']] == [True, False]
+    assert page['items'][0]['timestamp'] == '2025-01-01 09:00:00'
+    assert page['items'][0]['params'] == {"num_leaves": 31}
+    assert store.page('candidates')['items'][0]['is_champion'] is False
+
+
+def test_incremental_backtests_paging_and_weekly_best(tmp_path):
+    db = tmp_path / 'spy_strategy_optimization.db'
+    _make_backtest_db(db, [
+        ('2025-01-06 10:00:00', 'champion', 0.05, 1.2, -0.1),
+        ('2025-01-07 10:00:00', 'candidate_a', 0.08, 1.9, -0.2),
+        ('2025-01-14 10:00:00', 'candidate_b', 0.02, 0.7, -0.05),
+    ])
+    store = AnalyticsStore(str(tmp_path / 'a.sqlite'), str(tmp_path / 'models'), str(db))
+    assert store.refresh()['backtests'] == 3
+    _make_backtest_db(db, [('2025-01-15 10:00:00', 'champion', 0.04, 1.1, -0.08)])
+    assert store.refresh()['backtests'] == 1
+
+    page = store.page('backtests', sort='sharpe_ratio', page=2, page_size=3)
+    assert page['total'] == 4 and [r['sharpe_ratio'] for r in page['items']] == [0.7]
+    assert store.page('backtests', strategy='candidate_*')['total'] == 2
+    assert store.latest_backtest('champion')['run_timestamp'] == '2025-01-15 10:00:00'
+
+    weekly = store.best_per_period('backtests', 'sharpe_ratio', period='week')
+    assert [(w['period'], w['best'], w['runs']) for w in weekly] == [('2025-W02', 1.1, 2), ('2025-W01', 1.9, 2)]
+    assert weekly[1]['best_run']['strategy_name'] == 'candidate_a'
+
+
+def test_main_trainer_summaries_are_mapped_and_champion_matched(tmp_path):
+    models = tmp_path / 'models'
+    (models / 'archive').mkdir(parents=True)
+    old_params, old_summary = _main_trainer_run(models, '2025-02-03 10:00:00', 0.58, 0.9, with_run_id=False)
+    new_params, new_summary = _main_trainer_run(models, '2025-02-10 11:30:00', 0.62, 1.3)
+    (models / 'archive' / 'training_summary.json.20250210_113000').write_text(old_summary, encoding='utf-8')
+    (models / 'training_summary.json').write_text(new_summary, encoding='utf-8')
+    champion = models / 'champion_model_config.json'
+    champion.write_text(json.dumps(old_params, indent=4, ensure_ascii=False), encoding='utf-8')
+
+    store = AnalyticsStore(str(tmp_path / 'a.sqlite'), str(models))
+    store.refresh()
+    runs = store.page('training_runs', sort='sharpe_ratio')['items']
+    assert [r['run_key'] for r in runs] == ['20250210_113000', '20250203_100000']
+    latest = runs[0]
+    assert latest['timestamp'] == '2025-02-10 11:30:00' and latest['test_accuracy'] == 0.62
+    assert (latest['sharpe_ratio'], latest['total_return'], latest['num_trades']) == (1.3, 0.12, 42)
+    assert (latest['data_start'], latest['data_end'], latest['feature_count']) == ('2020-01-02', '2024-12-31', 3)
+    assert latest['params'] == new_params
+    # ריצה ישנה בלי מזהה: champion לפי הפרמטרים
+    assert [r['is_champion'] for r in runs] == [False, True]
+
+    champion.write_text(json.dumps(new_params, indent=4, ensure_ascii=False), encoding='utf-8')
+    store.refresh()
+    assert [r['is_champion'] for r in store.page('training_runs', sort='sharpe_ratio')['items']] == [True, False]
+    weekly = store.best_per_period('training_runs', 'test_accuracy', period='week')
+    assert [(w['period'], w['best']) for w in weekly] == [('2025-W06', 0.62), ('2025-W05', 0.58)]
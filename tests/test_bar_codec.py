@@ -0,0 +1,37 @@
+import pytest
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+from bar_codec import encode_bars, decode_bars_frame, decode_bars_records
+
+
+BARS = [
+    {"date": "2024-01-02T00:00:00", "open": 470.1, "high": 472.0, "low": 468.5, "close": 471.3, "volume": 81000000},
+    {"date": "2024-01-03T00:00:00", "open": 471.0, "high": 471.9, "low": 466.2, "close": 467.0, "volume": 95000000},
+]
+
+
+def test_round_trip_matches_json_frame():
+    df, metadata = decode_bars_frame(encode_bars(BARS, symbol="SPY"))
+
+    expected = pd.DataFrame(BARS)
+    expected['date'] = pd.to_datetime(expected['date'])
+    expected = expected.set_index('date').astype(float)
+
+    pd.testing.assert_frame_equal(df, expected, check_freq=False)
+    assert metadata == {"symbol": "SPY"}
+
+
+def test_records_keep_dates_for_session_pushes():
+    records, metadata = decode_bars_records(encode_bars(BARS, reset="true"))
+
+    assert [pd.Timestamp(r['date']) for r in records] == [pd.Timestamp(b['date']) for b in BARS]
+    assert metadata['reset'] == "true"
+
+
+def test_invalid_payload_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_bars_frame(b"not arrow")
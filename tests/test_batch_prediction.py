@@ -0,0 +1,72 @@
+import pytest
+import sys
+import json
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+from contextlib import nullcontext
+from types import SimpleNamespace
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from batch_prediction import encode_arrow, predict_stacked, select_rows
+from feature_alignment import AlignmentPlan
+
+FEATURES = ['rsi', 'ATR_14']
+
+
+def _bundle():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    return SimpleNamespace(alignment=AlignmentPlan(FEATURES, scaler), predictor=model)
+
+
+def _features(rsi, start='2024-01-01'):
+    index = pd.date_range(start, periods=len(rsi), name='date')
+    return pd.DataFrame({'ATR_14': np.arange(len(rsi), dtype=float), 'rsi': rsi, 'close': 100.0}, index=index)
+
+
+def test_select_rows_latest_all_and_requested_dates():
+    features = _features([1.0, 2.0, 3.0])
+    assert list(select_rows(features, None)['rsi']) == [3.0]
+    assert list(select_rows(features, 'all')['rsi']) == [1.0, 2.0, 3.0]
+    assert list(select_rows(features, ['2024-01-02', '2030-01-01'])['rsi']) == [2.0]
+
+
+def test_stacked_prediction_matches_per_row_prediction():
+    bundle = _bundle()
+    spy, qqq = _features([2.0, -2.0]), _features([-3.0], start='2024-02-01').drop(columns='ATR_14')
+
+    stages = []
+
+    def stage(name):
+        stages.append(name)
+        return nullcontext()
+
+    columns = predict_stacked(bundle, [('SPY', spy), ('QQQ', qqq), ('IWM', spy.iloc[0:0])], stage=stage)
+
+    assert stages == ['align', 'scale', 'predict']
+    assert columns['symbol'] == ['SPY', 'SPY', 'QQQ']
+    assert columns['date'] == ['2024-01-01T00:00:00', '2024-01-02T00:00:00', '2024-02-01T00:00:00']
+    assert columns['prediction'] == ['Buy', 'Hold', 'Hold']
+    # עמודת ATR חסרה אצל QQQ -> None, לא 0
+    assert columns['atr_value'] == [0.0, 1.0, None]
+    for i, row in enumerate([spy.iloc[[0]], spy.iloc[[1]], qqq]):
+        X = bundle.alignment.transform_row(row.columns, row.to_numpy(dtype=float)[0])
+        assert columns['probability_buy'][i] == pytest.approx(bundle.predictor.predict_proba(X)[0, 1])
+
+
+def test_empty_batch_and_arrow_encoding_keep_errors():
+    pa = pytest.importorskip("pyarrow")
+    columns = predict_stacked(_bundle(), [])
+    assert columns == {'symbol': [], 'date': [], 'prediction': [], 'probability_buy': [], 'atr_value': []}
+
+    columns = predict_stacked(_bundle(), [('SPY', _features([1.0]))])
+    table = pa.ipc.open_stream(pa.py_buffer(encode_arrow(columns, {'BAD': 'no bars'}))).read_all()
+    assert table.to_pydict() == columns
+    assert json.loads(table.schema.metadata[b'errors']) == {'BAD': 'no bars'}
@@ -0,0 +1,61 @@
+import sys
+import json
+import os
+import pathlib
+import pytest
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from config_service import ConfigService, ConfigValidationError, validate_config
+
+
+def _write(path, data, mtime_ns):
+    path.write_text(json.dumps(data) if isinstance(data, dict) else data, encoding='utf-8')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+BASE = {
+    "training_params": {"n_trials": 2}, "backtest_params": {}, "contract": {"symbol": "SPY"},
+    "api_settings": {"host": "0.0.0.0", "port": 5000, "metrics": {"slow_request_ms": 250}},
+    "agent_settings": {"TEST_MODE_ENABLED": "true"}
+}
+
+
+def test_parses_once_and_reloads_on_mtime_change(tmp_path):
+    path = tmp_path / 'system_config.json'
+    _write(path, BASE, 1_000_000_000)
+    service = ConfigService(str(path))
+    changes = []
+    service.subscribe(lambda new, old: changes.append((old['api_settings']['port'], new['api_settings']['port'])))
+
+    first = service.get()
+    assert service.get() is first and service.loads == 1
+    assert service.get_int('api_settings.port') == 5000
+    assert service.get_float('api_settings.metrics.slow_request_ms') == 250.0
+    assert service.get_bool('agent_settings.TEST_MODE_ENABLED') is True
+    assert service.get_str('missing.key', 'x') == 'x' and service.section('contract') == {"symbol": "SPY"}
+
+    _write(path, {**BASE, "api_settings": {"port": 5001}}, 2_000_000_000)
+    assert service.get_int('api_settings.port') == 5001
+    assert service.loads == 2 and changes == [(5000, 5001)]
+
+
+def test_invalid_file_keeps_last_good_config(tmp_path):
+    path = tmp_path / 'system_config.json'
+    _write(path, BASE, 1_000_000_000)
+    service = ConfigService(str(path))
+    service.get()
+
+    _write(path, '{"api_settings": ', 2_000_000_000)
+    assert service.reload() is False and service.get_int('api_settings.port') == 5000
+    assert service.last_error
+
+    _write(path, {**BASE, "api_settings": {"port": "not a port"}}, 3_000_000_000)
+    assert service.reload() is False and service.get_int('api_settings.port') == 5000
+    assert 'api_settings.port' in service.last_error
+
+    assert validate_config({"ibkr_settings": {"port": 70000}, "system_paths": {"logs_dir": 1}}) == [
+        'ibkr_settings.port: 70000 is greater than the maximum of 65535',
+        "system_paths.logs_dir: 1 is not of type 'string'"
+    ]
+    with pytest.raises(ConfigValidationError):
+        ConfigService(str(path)).get()
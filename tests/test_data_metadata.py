@@ -0,0 +1,53 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+import os
+
+import pandas as pd
+
+from data_metadata import DataMetadataCache, read_metadata, sidecar_path, write_metadata
+
+
+def _write_csv(path, rows, index=False):
+    df = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=rows),
+        'close': range(rows)
+    })
+    if index:
+        df = df.set_index('date')
+    df.to_csv(path, index=index)
+    return df
+
+
+def test_producer_sidecar_describes_file(tmp_path):
+    path = str(tmp_path / 'spy.csv')
+    df = _write_csv(path, 5, index=True)
+    write_metadata(df, path, producer='test')
+
+    metadata = read_metadata(path)
+    assert metadata['rows'] == 5
+    assert metadata['min_date'].startswith('2024-01-01') and metadata['max_date'].startswith('2024-01-05')
+    assert [c['name'] for c in metadata['columns']] == ['date', 'close']
+    assert metadata['producer'] == 'test'
+
+
+def test_cache_rescans_when_file_changes(tmp_path):
+    path = str(tmp_path / 'spy.csv')
+    write_metadata(_write_csv(path, 3), path)
+    cache = DataMetadataCache()
+    assert cache.get(path)['rows'] == 3
+
+    # כתיבה בלי sidecar חדש: ה-sidecar הישן לא תקף יותר והקובץ נסרק מחדש
+    _write_csv(path, 7)
+    os.utime(path, ns=(1, 1))
+    metadata = cache.get(path)
+    assert metadata['rows'] == 7 and metadata['producer'] == 'scan'
+    assert read_metadata(path)['rows'] == 7
+
+
+def test_missing_file_returns_none(tmp_path):
+    cache = DataMetadataCache()
+    path = str(tmp_path / 'missing.csv')
+    assert cache.get(path) is None
+    assert not os.path.exists(sidecar_path(path))
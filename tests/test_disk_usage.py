@@ -0,0 +1,40 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from disk_usage import DiskUsageIndexer
+
+
+def _indexer(tmp_path):
+    (tmp_path / 'data' / 'raw').mkdir(parents=True)
+    (tmp_path / 'data' / 'raw' / 'a.csv').write_bytes(b'x' * 100)
+    (tmp_path / 'data' / 'b.csv').write_bytes(b'x' * 50)
+    indexer = DiskUsageIndexer(['data', 'archive'], base_dir=str(tmp_path), rescan_interval=0)
+    indexer.rescan()
+    return indexer
+
+
+def test_initial_scan_counts_files_and_missing_folders(tmp_path):
+    indexer = _indexer(tmp_path)
+    usage = indexer.usage()
+    assert usage['data']['file_count'] == 2
+    assert indexer._totals['data'] == 150
+    assert usage['archive'] == {'size_mb': 0, 'file_count': 0, 'exists': False}
+
+
+def test_events_update_totals_incrementally(tmp_path):
+    indexer = _indexer(tmp_path)
+    new_file = tmp_path / 'data' / 'c.csv'
+    new_file.write_bytes(b'x' * 10)
+    indexer.handle_event('created', str(new_file))
+    (tmp_path / 'data' / 'b.csv').write_bytes(b'x' * 5)
+    indexer.handle_event('modified', str(tmp_path / 'data' / 'b.csv'))
+    assert indexer._totals['data'] == 115 and len(indexer._files['data']) == 3
+
+    moved = tmp_path / 'data' / 'raw' / 'c.csv'
+    new_file.rename(moved)
+    indexer.handle_event('moved', str(new_file), dest_path=str(moved))
+    assert indexer._totals['data'] == 115
+
+    indexer.handle_event('deleted', str(tmp_path / 'data' / 'raw'), is_directory=True)
+    assert indexer._totals['data'] == 5 and len(indexer._files['data']) == 1
@@ -0,0 +1,71 @@
+import pytest
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+np = pytest.importorskip("numpy")
+lightgbm = pytest.importorskip("lightgbm")
+from fast_predictor import CompiledTreeEnsemble, FastPathPredictor, load_predictor
+
+
+def _training_data(n=2000, n_features=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, n_features))
+    y = (X[:, 0] + 0.5 * X[:, 1] - 0.3 * X[:, 2] + rng.standard_normal(n) * 0.5 > 0).astype(int)
+    return X, y
+
+
+def test_parity_with_lightgbm_including_missing_values():
+    X, y = _training_data()
+    X[::5, 0] = np.nan
+    X[::7, 3] = np.nan
+    model = lightgbm.LGBMClassifier(n_estimators=80, max_depth=6, learning_rate=0.1, verbosity=-1, random_state=42)
+    model.fit(X, y)
+
+    compiled = CompiledTreeEnsemble.from_lightgbm(model)
+    X_test, _ = _training_data(n=500, seed=1)
+    X_test[::3, 0] = np.nan
+    X_test[::4, 5] = np.nan
+
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X_test), model.predict(X_test))
+
+
+def test_parity_with_zero_as_missing():
+    X, y = _training_data()
+    X[::4, 1] = 0.0
+    model = lightgbm.LGBMClassifier(n_estimators=40, zero_as_missing=True, verbosity=-1, random_state=42)
+    model.fit(X, y)
+
+    compiled = CompiledTreeEnsemble.from_lightgbm(model)
+    X_test, _ = _training_data(n=300, seed=2)
+    X_test[::2, 1] = 0.0
+    X_test[::5, 2] = np.nan
+
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), rtol=1e-9, atol=1e-12)
+
+
+def test_single_row_and_save_load_roundtrip(tmp_path):
+    X, y = _training_data()
+    model = lightgbm.LGBMClassifier(n_estimators=30, verbosity=-1, random_state=42)
+    model.fit(X, y)
+
+    path = tmp_path / "compiled.npz"
+    CompiledTreeEnsemble.from_lightgbm(model).save(str(path))
+    predictor = load_predictor(model, str(path))
+
+    assert isinstance(predictor, FastPathPredictor)
+    np.testing.assert_allclose(predictor.compiled.predict_proba(X[0]), model.predict_proba(X[:1]), rtol=1e-9)
+    np.testing.assert_allclose(predictor.predict_proba(X[:200]), model.predict_proba(X[:200]), rtol=1e-9)
+
+
+def test_load_predictor_falls_back_on_mismatch(tmp_path):
+    X, y = _training_data()
+    model_a = lightgbm.LGBMClassifier(n_estimators=10, verbosity=-1, random_state=1).fit(X, y)
+    model_b = lightgbm.LGBMClassifier(n_estimators=20, verbosity=-1, random_state=2).fit(X, y)
+
+    path = tmp_path / "compiled.npz"
+    CompiledTreeEnsemble.from_lightgbm(model_a).save(str(path))
+
+    assert load_predictor(model_b, str(path)) is model_b
+    assert load_predictor(model_b, str(tmp_path / "missing.npz")) is model_b
@@ -0,0 +1,46 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from feature_alignment import AlignmentPlan
+
+
+def _fitted_plan():
+    features = ['rsi', 'macd', 'atr']
+    scaler = StandardScaler().fit(np.random.default_rng(1).normal(size=(50, 3)) * [1, 5, 0])
+    return features, scaler, AlignmentPlan(features, scaler)
+
+
+def test_transform_row_matches_pandas_alignment_and_scaler():
+    features, scaler, plan = _fitted_plan()
+    latest = pd.DataFrame([[np.nan, 7.0, 2.0, 1.5]], columns=['atr', 'extra', 'rsi', 'close'])
+
+    expected = scaler.transform(pd.concat([pd.DataFrame(columns=features), latest], sort=False)[features].fillna(0))
+    result = plan.transform_row(latest.columns, latest.to_numpy(dtype=float)[0])
+
+    assert result.shape == (1, 3)
+    np.testing.assert_allclose(result, expected)
+
+
+def test_align_matrix_and_cached_layout():
+    features, scaler, plan = _fitted_plan()
+    columns = ['macd', 'rsi']
+    aligned = plan.align(columns, np.array([[1.0, 2.0], [np.nan, 4.0]]))
+
+    np.testing.assert_array_equal(aligned, [[2.0, 1.0, 0.0], [4.0, 0.0, 0.0]])
+    assert plan.layout(columns) is plan.layout(list(columns))
+    plan.verify()
+
+
+def test_scaler_without_arrays_falls_back_to_transform():
+    class DoublingScaler:
+        def transform(self, X):
+            return np.asarray(X) * 2
+
+    plan = AlignmentPlan(['a', 'b'], DoublingScaler())
+    assert not plan.vectorized
+    np.testing.assert_array_equal(plan.transform_row(['b'], [3.0]), [[0.0, 6.0]])
@@ -0,0 +1,75 @@
+import sys
+import pathlib
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+import feature_selection
+from feature_selection import histogram_mutual_info, rank_features
+from sklearn.feature_selection import mutual_info_classif
+
+
+def _synthetic(n=4000, n_noise=8, seed=0):
+    rng = np.random.default_rng(seed)
+    strong = rng.normal(size=n)
+    weak = rng.normal(size=n)
+    y = (strong + 0.5 * weak + 0.3 * rng.normal(size=n) > 0).astype(int)
+    columns = {'strong': strong, 'weak': weak}
+    columns.update({f'noise_{i}': rng.normal(size=n) for i in range(n_noise)})
+    return pd.DataFrame(columns), pd.Series(y)
+
+
+def test_histogram_mi_ranking_agrees_with_sklearn():
+    X, y = _synthetic()
+    fast = histogram_mutual_info(X.to_numpy(), y, n_bins=32, n_jobs=1, block_size=4)
+    reference = mutual_info_classif(X, y, random_state=0)
+
+    assert list(X.columns[np.argsort(-fast)[:2]]) == ['strong', 'weak']
+    assert list(X.columns[np.argsort(-reference)[:2]]) == ['strong', 'weak']
+    # רעש: ערכים קרובים לאפס בשתי השיטות, ומתחת לעמודות המידעיות
+    assert fast[2:].max() < 0.02 < fast[1]
+    assert abs(fast[0] - reference[0]) < 0.1
+
+
+def test_rank_cache_hits_on_same_data_and_misses_on_change(tmp_path, monkeypatch):
+    X, y = _synthetic(n=500, n_noise=3)
+    calls = []
+    original = feature_selection.histogram_mutual_info
+    monkeypatch.setattr(feature_selection, 'histogram_mutual_info',
+                        lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+
+    first = rank_features(X, y, cache_dir=str(tmp_path), n_jobs=1)
+    assert next(iter(first)) == 'strong' and len(calls) == 1
+    assert rank_features(X, y, cache_dir=str(tmp_path), n_jobs=1) == first and len(calls) == 1
+
+    changed = X.copy()
+    changed.iloc[0, 0] += 1.0
+    rank_features(changed, y, cache_dir=str(tmp_path), n_jobs=1)
+    rank_features(X, y, n_bins=16, cache_dir=str(tmp_path), n_jobs=1)
+    assert len(calls) == 3 and len(list(tmp_path.glob('mi_*.json'))) == 3
+
+
+def test_prune_keeps_one_documented_representative_per_group_across_blocks():
+    rng = np.random.default_rng(1)
+    n = 1000
+    a, b = rng.normal(size=n), rng.normal(size=n)
+    columns = {f'free_{i}': rng.normal(size=n) for i in range(6)}
+    a_missing = a.copy()
+    a_missing[:5] = np.nan
+    columns.update({
+        'a_missing': a_missing,
+        'b': b,
+        'a': a,
+        'b_negated': -b,
+        'a_near': a + 0.01 * rng.normal(size=n)
+    })
+    df = pd.DataFrame(columns)
+    feature_cols = ['a_missing', 'free_0', 'b', 'free_1', 'free_2', 'a', 'free_3', 'b_negated',
+                    'free_4', 'free_5', 'a_near']
+
+    # block_size=4: כל קבוצה משתרעת על פני כמה בלוקים
+    kept, dropped = feature_selection.prune_redundant_features(df, feature_cols, threshold=0.95, block_size=4)
+
+    # a: הכי מעט ערכים חסרים מנצח; b: שוויון -> הראשון ב-feature_cols
+    assert dropped == {'a': ['a_missing', 'a_near'], 'b': ['b_negated']}
+    assert kept == ['free_0', 'b', 'free_1', 'free_2', 'a', 'free_3', 'free_4', 'free_5']
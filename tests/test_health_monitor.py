@@ -0,0 +1,73 @@
+import sys
+import json
+import pathlib
+import socket
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from health_monitor import HealthMonitor, TimeSeries, worst_status
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class _Processes:
+    def get_all_processes(self):
+        return [{"id": "agent", "status": "running", "exit_code": None},
+                {"id": "trainer", "status": "stopped", "exit_code": 1}]
+
+
+def test_ring_buffer_and_status_order():
+    series = TimeSeries(3)
+    for i in range(5):
+        series.append(i, at=float(i))
+    assert series.since() == [[2.0, 2], [3.0, 3], [4.0, 4]]
+    assert series.since(3.0) == [[4.0, 4]]
+    assert worst_status(['healthy', 'warning']) == 'warning'
+    assert worst_status(['warning', 'error', 'healthy']) == 'error'
+
+
+def test_sample_reads_real_signals(tmp_path):
+    raw = tmp_path / 'data' / 'raw'
+    raw.mkdir(parents=True)
+    (raw / 'SPY_ibkr.csv').write_text("date,close\n2020-01-02,320.1\n2020-01-03,321.5\n")
+    (raw / 'VIX_ibkr.csv').write_text("date,close\n2099-01-03,14.0\n")
+    models = tmp_path / 'models'
+    models.mkdir()
+    (models / 'champion_model.pkl').write_bytes(b'model')
+    (models / 'champion_model_config.json').write_text(json.dumps({"selected_features": ["a", "b"]}))
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(8)
+    config = {"ibkr_settings": {"host": "127.0.0.1", "port": listener.getsockname()[1]},
+              "api_settings": {"health": {"history": 2}}}
+    status = {"model_loaded": True, "model_version": "v7",
+              "latency_ms": {"predict": {"total": {"p50_ms": 3.0, "p99_ms": 900.0}}}}
+    monitor = HealthMonitor(str(tmp_path), config, process_manager=_Processes(),
+                            http_get=lambda url, timeout: _Response(status))
+    try:
+        for _ in range(3):
+            monitor.sample()
+    finally:
+        listener.close()
+
+    snapshot = monitor.snapshot()
+    components = snapshot['components']
+    assert components['data']['status'] == 'warning'
+    assert components['data']['files']['SPY_ibkr.csv']['last_bar'].startswith('2020-01-03')
+    assert components['model']['model_version'] == 'v7' and components['model']['feature_count'] == 2
+    assert components['model']['status'] == 'warning'  # p99 above slow_request_ms
+    assert components['processes']['running'] == 1 and components['processes']['warnings']
+    assert components['gateway']['connected'] is True
+    assert snapshot['status'] == 'warning' and snapshot['samples'] == 3
+
+    history = monitor.get_series(['gateway.connected', 'model.predict_p50_ms'])
+    assert [v for _, v in history['gateway.connected']] == [1, 1]
+    assert [v for _, v in history['model.predict_p50_ms']] == [3.0, 3.0]
@@ -0,0 +1,112 @@
+import pytest
+import sys
+import logging
+import pathlib
+import threading
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from job_runner import JobNotCancellable, JobRunner
+
+
+def _wait(runner, job_id, states=('succeeded', 'failed', 'cancelled'), timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = runner.get(job_id)
+        if job['status'] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {runner.get(job_id)['status']}")
+
+
+def test_queue_progress_cancel_and_results(tmp_path):
+    events = []
+    runner = JobRunner(str(tmp_path / 'jobs.sqlite'), max_workers=1, event_interval=0,
+                       on_event=lambda name, job: events.append((job['id'], job['status'], job['message'])))
+    release = threading.Event()
+    logger = logging.getLogger('collector')
+    logger.setLevel(logging.INFO)
+
+    def blocking(ctx):
+        logger.info("fetched SPY")
+        release.wait(5)
+        ctx.progress(0.5, "halfway")
+        return {'rows': 10}
+
+    try:
+        first = runner.submit('collect', blocking)
+        assert runner.submit('collect', blocking)['id'] == first['id']  # exclusive per kind
+        queued = runner.submit('backtest', lambda ctx: {'status': 'error', 'message': 'no model'})
+        _wait(runner, first['id'], states=('running',))
+        assert runner.cancel(queued['id'])['status'] == 'cancelled'
+
+        release.set()
+        done = _wait(runner, first['id'])
+        assert done['status'] == 'succeeded' and done['result'] == {'rows': 10} and done['progress'] == 1.0
+        assert (first['id'], 'running', 'fetched SPY') in events
+
+        failed = runner.submit('backtest', lambda ctx: {'status': 'error', 'message': 'no model'})
+        assert _wait(runner, failed['id'])['error'] == 'no model'
+        assert [j['status'] for j in runner.list()] == ['failed', 'cancelled', 'succeeded']
+    finally:
+        runner.shutdown(wait=True)
+
+
+def test_running_job_stops_at_checkpoint_and_restart_marks_interrupted(tmp_path):
+    db = str(tmp_path / 'jobs.sqlite')
+    runner = JobRunner(db, max_workers=1)
+    started = threading.Event()
+
+    def loop(ctx):
+        started.set()
+        for i in range(500):
+            ctx.progress(i / 500)
+            time.sleep(0.01)
+
+    try:
+        job = runner.submit('preprocess', loop)
+        started.wait(5)
+        runner.cancel(job['id'])
+        assert _wait(runner, job['id'])['status'] == 'cancelled'
+
+        hanging = runner.submit('collect', lambda ctx: time.sleep(0.5))
+        _wait(runner, hanging['id'], states=('running',))
+        # שרת חדש על אותו DB: המשימה שלא הסתיימה מסומנת interrupted
+        restarted = JobRunner(db)
+        assert restarted.get(hanging['id'])['status'] == 'interrupted'
+        restarted.shutdown()
+    finally:
+        runner.shutdown(wait=True)
+
+
+def test_running_job_without_checkpoints_refuses_cancel_and_records_its_outcome(tmp_path):
+    runner = JobRunner(str(tmp_path / 'jobs.sqlite'), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    written = tmp_path / 'SPY_ibkr.csv'
+
+    def collect(ctx):
+        ctx.progress(0.0, "Data collection started")
+        started.set()
+        release.wait(5)
+        written.write_text('date,close')
+        return {'status': 'success'}
+
+    try:
+        job = runner.submit('collect', collect, cancellable=False)
+        started.wait(5)
+        with pytest.raises(JobNotCancellable):
+            runner.cancel(job['id'])
+        release.set()
+        # הקובץ נכתב, ולכן המשימה לא נרשמת כמבוטלת
+        assert _wait(runner, job['id'])['status'] == 'succeeded' and written.exists()
+
+        # ביטול שמגיע אחרי נקודת הבדיקה האחרונה של משימה שיתופית: גם היא נרשמת לפי מה שקרה
+        started.clear()
+        release.clear()
+        cooperative = runner.submit('backtest', lambda ctx: (ctx.progress(0.0), started.set(), release.wait(5)))
+        started.wait(5)
+        runner.cancel(cooperative['id'])
+        release.set()
+        assert _wait(runner, cooperative['id'])['status'] == 'succeeded'
+    finally:
+        runner.shutdown(wait=True)
@@ -0,0 +1,38 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from latency_metrics import LatencyMetrics, RequestTrace
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = LatencyMetrics(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.5, 5.0):
+        metrics.observe('predict', 'features', seconds)
+
+    text = metrics.render_prometheus()
+    assert 'model_api_stage_seconds_bucket{endpoint="predict",stage="features",le="0.01"} 1' in text
+    assert 'model_api_stage_seconds_bucket{endpoint="predict",stage="features",le="1.0"} 3' in text
+    assert 'model_api_stage_seconds_bucket{endpoint="predict",stage="features",le="+Inf"} 4' in text
+    assert 'model_api_stage_seconds_count{endpoint="predict",stage="features"} 4' in text
+
+
+def test_record_adds_total_and_logs_slow_requests(caplog):
+    metrics = LatencyMetrics(slow_request_ms=0, slow_sample_rate=1.0)
+    trace = RequestTrace('predict')
+    with trace.stage('parse'):
+        pass
+
+    with caplog.at_level('WARNING', logger='model_api.slow_requests'):
+        metrics.record(trace, 200, detail={"path": "/predict"})
+
+    assert set(metrics.summary()['predict']) == {'parse', 'total'}
+    assert 'model_api_requests_total{endpoint="predict",status="200"} 1' in metrics.render_prometheus()
+    assert '"stages_ms": {"parse"' in caplog.text
+
+
+def test_rolling_window_keeps_only_recent_observations():
+    metrics = LatencyMetrics(window=2)
+    for seconds in (1.0, 0.001, 0.001):
+        metrics.observe('predict', 'predict', seconds)
+    assert metrics.summary()['predict']['predict']['p99_ms'] == 1.0
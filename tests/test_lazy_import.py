@@ -0,0 +1,25 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from lazy_import import lazy_import
+
+
+def test_module_runs_on_first_attribute_access(tmp_path, monkeypatch):
+    (tmp_path / 'slow_module_for_test.py').write_text("import sys\nsys.slow_module_loaded = True\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delattr(sys, 'slow_module_loaded', raising=False)
+
+    try:
+        module = lazy_import('slow_module_for_test')
+        assert not hasattr(sys, 'slow_module_loaded')
+
+        assert module.VALUE == 42
+        assert sys.slow_module_loaded is True
+    finally:
+        sys.modules.pop('slow_module_for_test', None)
+
+
+def test_already_imported_module_is_returned_as_is():
+    import json
+    assert lazy_import('json') is json
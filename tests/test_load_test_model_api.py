@@ -0,0 +1,69 @@
+import pytest
+import sys
+import json
+import pathlib
+import threading
+from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
+
+pytest.importorskip("requests")
+np = pytest.importorskip("numpy")
+from scripts.load_test_model_api import percentile, run, synthetic_bars
+
+
+class _PredictHandler(BaseHTTPRequestHandler):
+    bodies = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.lock:
+            self.bodies.append((self.path, body))
+            count = len(self.bodies)
+        # כל בקשה שלישית נכשלת
+        status = 500 if count % 3 == 0 else 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"prediction": "Hold"}')
+
+    def log_message(self, *args):
+        pass
+
+
+def _args(url, **overrides):
+    args = dict(url=url, endpoint='predict', requests=12, concurrency=4, warmup=0, bars=20, symbols=2,
+                symbol='SPY', allow_cache=False, binary=False, timeout=5)
+    args.update(overrides)
+    return Namespace(**args)
+
+
+def test_report_counts_errors_and_perturbs_windows():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PredictHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _PredictHandler.bodies = []
+        report = run(_args(f"http://127.0.0.1:{server.server_port}"))
+    finally:
+        server.shutdown()
+
+    assert report['requests'] == 12 and report['errors'] == 4
+    latency = report['latency_ms']
+    assert 0 < latency['p50'] <= latency['p90'] <= latency['p99'] <= latency['max']
+    # בלי --allow-cache כל בקשה שולחת חלון שונה מעט, כדי לעקוף את מטמון התוצאות
+    closes = {body['historical'][-1]['close'] for _, body in _PredictHandler.bodies}
+    assert len(closes) == 12 and all(path == '/predict' for path, _ in _PredictHandler.bodies)
+
+
+def test_unreachable_server_is_reported_as_errors_not_raised():
+    report = run(_args("http://127.0.0.1:9", requests=3, concurrency=2, timeout=1))
+    assert report['errors'] == 3 and report['requests_per_second'] > 0
+
+
+def test_percentile_and_synthetic_bars():
+    assert percentile([], 50) != percentile([], 50)  # nan
+    assert percentile([1, 2, 3, 4, 5], 50) == 3 and percentile([1, 2, 3, 4, 5], 99) == 5
+    bars = synthetic_bars(5)
+    assert [bar['date'][:10] for bar in bars] == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+    assert all(bar['low'] <= bar['close'] <= bar['high'] for bar in bars)
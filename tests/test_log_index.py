@@ -0,0 +1,82 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from log_index import LogIndexer, parse_line
+
+
+def test_parse_line_formats():
+    assert parse_line("[2024-01-02 10:00:00,123] [ERROR] boom") == ('2024-01-02 10:00:00.123', 'ERROR', 'boom')
+    assert parse_line("2024-01-02 10:00:00,5 INFO started") == ('2024-01-02 10:00:00.5', 'INFO', 'started')
+    assert parse_line("  File \"x.py\", line 3") == (None, None, "  File \"x.py\", line 3")
+
+
+def test_incremental_index_and_filtered_search(tmp_path):
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    log_file = logs / 'api_server.log'
+    log_file.write_text(
+        "[2024-01-01 09:00:00,000] [INFO] server started\n"
+        "[2024-01-02 09:00:00,000] [ERROR] order rejected\n"
+        "Traceback line\n", encoding='utf-8')
+    indexer = LogIndexer(str(logs), str(tmp_path / 'index.sqlite'))
+    assert indexer.update() == 3
+
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write("[2024-01-03 09:00:00,000] [ERROR] order filled late\n")
+    assert indexer.update() == 1
+    assert indexer.update() == 0
+
+    errors = indexer.search(levels=['error'])
+    assert [e['message'] for e in errors] == ['order filled late', 'Traceback line', 'order rejected']
+    assert [e['message'] for e in indexer.search(text='order', since='2024-01-03')] == ['order filled late']
+    assert indexer.search(text='started', filename='api_server.log')[0]['line'] == 1
+    assert len(indexer.search(limit=2)) == 2 and indexer.search(before_id=2)[0]['id'] == 1
+
+
+def test_truncated_file_is_reindexed(tmp_path):
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    (logs / 'a.log').write_text("2024-01-01 00:00:00 INFO one\n" * 50, encoding='utf-8')
+    indexer = LogIndexer(str(logs), str(tmp_path / 'index.sqlite'))
+    indexer.update()
+
+    (logs / 'a.log').write_text("2024-02-01 00:00:00 WARNING two\n", encoding='utf-8')
+    indexer.update()
+    assert [e['message'] for e in indexer.search()] == ['two']
+    assert indexer.list_files()[0]['indexed_lines'] == 1
+
+
+def test_refresh_never_waits_for_running_pass_and_chunks_commit(tmp_path, monkeypatch):
+    import log_index
+
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    (logs / 'big.log').write_text(
+        ''.join(f"[2024-01-01 09:00:{i:02d},000] [INFO] line {i}\n" for i in range(40)), encoding='utf-8')
+    indexer = LogIndexer(str(logs), str(tmp_path / 'index.sqlite'), batch_bytes=256)
+
+    # המעבר הראשון "רץ" ב-thread אחר: refresh חוזר מיד ומגיש את מה שיש
+    indexer._write_lock.acquire()
+    indexer.refresh(max_age=0)
+    assert indexer.search() == [] and not indexer.initial_pass_done.is_set()
+    indexer._write_lock.release()
+
+    # שגיאת קריאה באמצע הקובץ: הבלוקים שכבר נכתבו נשמרים, והמעבר הבא ממשיך מהם בלי כפילויות
+    original, calls = log_index.read_since, []
+
+    def failing_read(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise OSError("disk hiccup")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(log_index, 'read_since', failing_read)
+    indexer.update()
+    indexed = indexer.list_files()[0]['indexed_lines']
+    assert 0 < indexed < 40 and len(indexer.search(limit=100)) == indexed
+
+    monkeypatch.setattr(log_index, 'read_since', original)
+    assert indexer.update() == 40 - indexed
+    assert indexer.initial_pass_done.is_set()
+    assert sorted(e['message'] for e in indexer.search(limit=100)) == sorted(f"line {i}" for i in range(40))
@@ -0,0 +1,63 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+import pytest
+
+from log_reader import read_since, tail, tail_lines
+
+
+@pytest.mark.parametrize('trailing_newline', [True, False])
+def test_tail_lines_matches_readlines(tmp_path, trailing_newline):
+    path = tmp_path / 'app.log'
+    text = ''.join(f"line {i} {'x' * (i % 7)}\n" for i in range(500))
+    path.write_text(text if trailing_newline else text.rstrip('\n'), encoding='utf-8')
+
+    expected = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    for n in (1, 3, 120, 500, 800):
+        assert tail_lines(str(path), n, block_size=37) == expected[-n:]
+    assert tail_lines(str(path), 0) == []
+
+
+def test_read_since_returns_only_new_complete_lines(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text("a\nb\n", encoding='utf-8')
+    offset = tail(str(path), 10)['offset']
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("c\npartial")
+    result = read_since(str(path), offset)
+    assert result['lines'] == ["c\n"] and not result['reset']
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(" line\n")
+    result = read_since(str(path), result['offset'])
+    assert result['lines'] == ["partial line\n"]
+    assert read_since(str(path), result['offset'])['lines'] == []
+
+
+def test_read_since_resets_after_truncation(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text("old\n" * 100, encoding='utf-8')
+    offset = tail(str(path), 1)['offset']
+    path.write_text("new\n", encoding='utf-8')
+
+    result = read_since(str(path), offset)
+    assert result == {"lines": ["new\n"], "offset": 4, "reset": True}
+
+
+def test_tail_offset_stops_before_partial_last_line(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text("a\nb\nc\nhalf", encoding='utf-8')
+
+    result = tail(str(path), 2)
+    assert result == {"lines": ["b\n", "c\n"], "offset": 6}
+    assert tail_lines(str(path), 2) == ["c\n", "half"]
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(" done\nd\n")
+    assert read_since(str(path), result['offset'])['lines'] == ["half done\n", "d\n"]
+    assert tail(str(path), 1) == {"lines": ["d\n"], "offset": path.stat().st_size}
+
+    path.write_text("only partial", encoding='utf-8')
+    assert tail(str(path), 5) == {"lines": [], "offset": 0}
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import pathlib
+import threading
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+np = pytest.importorskip("numpy")
+from micro_batcher import MicroBatcher
+
+
+def _run_concurrently(batcher, key, rows):
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict(key, rows[i], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(rows))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array([results[i] for i in range(len(rows))])
+
+
+def test_concurrent_requests_are_coalesced_and_fanned_back():
+    batch_sizes = []
+
+    def predict_fn(key, X):
+        batch_sizes.append(len(X))
+        return X.sum(axis=1, keepdims=True) * key
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=20)
+    rows = np.random.default_rng(0).random((40, 5))
+
+    results = _run_concurrently(batcher, 2.0, rows)
+
+    np.testing.assert_allclose(results.ravel(), rows.sum(axis=1) * 2.0)
+    assert max(batch_sizes) <= 8
+    assert len(batch_sizes) < len(rows)
+    assert batcher.stats()['rows'] == len(rows)
+
+
+def test_rows_with_different_keys_are_not_mixed():
+    seen = []
+
+    def predict_fn(key, X):
+        seen.append(key)
+        return np.full((len(X), 1), key)
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=16, max_wait_ms=20)
+    futures = [batcher.submit(key, np.zeros(3)) for key in (1.0, 2.0, 1.0, 2.0)]
+
+    assert [f.result(timeout=5)[0] for f in futures] == [1.0, 2.0, 1.0, 2.0]
+
+
+def test_errors_reach_every_caller():
+    batcher = MicroBatcher(lambda key, X: 1 / 0, max_wait_ms=0)
+    with pytest.raises(ZeroDivisionError):
+        batcher.predict(None, np.zeros(3), timeout=5)
+
+
+def test_stop_drains_queue_and_submit_restarts():
+    batcher = MicroBatcher(lambda key, X: X * key, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(3.0, np.ones(2)) for _ in range(6)]
+    batcher.stop()
+
+    assert not batcher.running
+    assert all(f.result(timeout=5).tolist() == [3.0, 3.0] for f in futures)
+
+    # הפעלה מחדש (למשל enabled חזר ל-true ב-config) יוצרת thread חדש
+    assert batcher.predict(2.0, np.ones(2), timeout=5).tolist() == [2.0, 2.0]
+    assert batcher.running and batcher.stats()['rows'] == 7
+    batcher.stop()
+    batcher.stop()
+
+
+
+def test_submit_racing_stop_is_always_served(monkeypatch):
+    import micro_batcher
+    in_put, release = threading.Event(), threading.Event()
+
+    class SlowPutQueue(micro_batcher.queue.Queue):
+        def put(self, item, *args, **kwargs):
+            # השורה נתקעת באמצע ההכנסה לתור בדיוק כש-stop() רץ
+            if item is not micro_batcher._STOP and not in_put.is_set():
+                in_put.set()
+                release.wait(5)
+            super().put(item, *args, **kwargs)
+
+    monkeypatch.setattr(micro_batcher.queue, 'Queue', SlowPutQueue)
+    batcher = MicroBatcher(lambda key, X: X * key, max_wait_ms=0)
+    futures = []
+    submitter = threading.Thread(target=lambda: futures.append(batcher.submit(1.0, np.ones(1))))
+    submitter.start()
+    assert in_put.wait(5)
+    stopper = threading.Thread(target=batcher.stop)
+    stopper.start()
+    stopper.join(0.2)
+    release.set()
+    submitter.join(5)
+    stopper.join(5)
+
+    assert futures[0].result(timeout=5).tolist() == [1.0]
+    assert not batcher.running
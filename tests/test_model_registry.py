@@ -0,0 +1,113 @@
+import pytest
+import sys
+import json
+import os
+import pathlib
+import threading
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+np = pytest.importorskip("numpy")
+joblib = pytest.importorskip("joblib")
+lightgbm = pytest.importorskip("lightgbm")
+from sklearn.preprocessing import StandardScaler
+
+import model_registry
+from model_registry import ModelRegistry, write_manifest
+
+
+def _write_champion(tmp_path, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    model = lightgbm.LGBMClassifier(n_estimators=5 + seed, verbosity=-1).fit(X, y)
+    paths = {
+        'champion_model': str(tmp_path / 'champion_model.pkl'),
+        'champion_scaler': str(tmp_path / 'champion_scaler.pkl'),
+        'champion_config': str(tmp_path / 'champion_model_config.json'),
+        'champion_manifest': str(tmp_path / 'champion_manifest.json')
+    }
+    joblib.dump(model, paths['champion_model'])
+    joblib.dump(StandardScaler().fit(X), paths['champion_scaler'])
+    with open(paths['champion_config'], 'w', encoding='utf-8') as f:
+        json.dump({"selected_features": ["a", "b", "c"]}, f)
+    return paths
+
+
+def _age(paths, seconds):
+    """Shifts the artifacts' mtime into the past, keeping the manifest's mtime relative to them."""
+    for key in ('champion_model', 'champion_scaler', 'champion_config', 'champion_manifest'):
+        if os.path.exists(paths[key]):
+            mtime = os.path.getmtime(paths[key]) - seconds
+            os.utime(paths[key], (mtime, mtime))
+
+
+def test_manifest_swap_and_mismatch_keeps_active_version(tmp_path):
+    paths = _write_champion(tmp_path)
+    manifest = write_manifest(paths, paths['champion_manifest'])
+    registry = ModelRegistry(paths)
+    swaps = []
+    registry.subscribe(lambda bundle: swaps.append(bundle.version))
+
+    assert registry.load_and_swap() and registry.active_version == manifest['version']
+
+    # קידום באמצע: מודל חדש כבר נכתב, ה-manifest עוד לא
+    _write_champion(tmp_path, seed=1)
+    assert not registry.load_and_swap()
+    assert registry.active_version == manifest['version'] and 'do not match manifest' in registry.last_error
+
+    new_manifest = write_manifest(paths, paths['champion_manifest'])
+    assert registry.load_and_swap() and registry.active_version == new_manifest['version']
+    assert swaps == [manifest['version'], new_manifest['version']]
+    assert [entry['version'] for entry in registry.status()['history']] == swaps[::-1]
+
+
+def test_stale_manifest_is_ignored_after_grace_period(tmp_path):
+    paths = _write_champion(tmp_path)
+    write_manifest(paths, paths['champion_manifest'])
+    _age(paths, 600)
+    # כתיבה ידנית של ה-champion בלי לעדכן את ה-manifest
+    manifest_mtime = os.path.getmtime(paths['champion_manifest'])
+    _write_champion(tmp_path, seed=2)
+    for key in ('champion_model', 'champion_scaler', 'champion_config'):
+        os.utime(paths[key], (manifest_mtime + 60, manifest_mtime + 60))
+
+    registry = ModelRegistry(paths, stale_manifest_grace=30)
+    assert registry.load_and_swap()
+    bundle = registry.active
+    assert bundle.files == {} and bundle.model.n_estimators == 7
+    assert bundle.version == model_registry.model_fingerprint(bundle.model)[:12]
+
+    # אותו מצב, אבל הכתיבה טרייה: עדיין נחשב קידום שבאמצע
+    fresh = ModelRegistry(paths, stale_manifest_grace=1e9)
+    assert not fresh.load_and_swap() and fresh.active is None
+
+
+def test_concurrent_first_requests_share_one_load(tmp_path, monkeypatch):
+    paths = _write_champion(tmp_path)
+    registry = ModelRegistry(paths)
+    loads = []
+    original = registry.load_bundle
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.1)
+        return original()
+
+    monkeypatch.setattr(registry, 'load_bundle', slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.ensure_loaded(timeout=10))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len(results) == 5 and all(bundle is registry.active for bundle in results)
+
+
+def test_model_threads_caps_lightgbm_n_jobs(tmp_path):
+    paths = _write_champion(tmp_path)
+    assert ModelRegistry(paths, model_threads=1).load_bundle().model.get_params()['n_jobs'] == 1
+    default_jobs = joblib.load(paths['champion_model']).get_params()['n_jobs']
+    assert ModelRegistry(paths).load_bundle().model.get_params()['n_jobs'] == default_jobs
@@ -0,0 +1,44 @@
+import pytest
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+from multi_fidelity import SuccessiveHalvingScheduler
+
+
+def test_rung_fractions():
+    scheduler = SuccessiveHalvingScheduler(reduction_factor=3, n_rungs=3)
+    assert scheduler.fractions == pytest.approx([1 / 9, 1 / 3, 1.0])
+    assert scheduler.is_final(2)
+    assert not scheduler.is_final(0)
+
+
+def test_promotes_until_min_trials_then_prunes_bottom():
+    scheduler = SuccessiveHalvingScheduler(reduction_factor=3, n_rungs=2, min_trials_per_rung=3)
+    # Not enough history yet - everything is promoted
+    assert scheduler.report(0, 0.50)
+    assert scheduler.report(0, 0.60)
+    # Third score is below the top third of [0.50, 0.60, 0.40]
+    assert not scheduler.report(0, 0.40)
+    # A new best score is always promoted
+    assert scheduler.report(0, 0.70)
+
+
+def test_final_rung_never_prunes():
+    scheduler = SuccessiveHalvingScheduler(reduction_factor=2, n_rungs=2, min_trials_per_rung=1)
+    for score in [0.9, 0.8, 0.1]:
+        assert scheduler.report(1, score)
+    assert scheduler.summary() == {"rung_0": 0, "rung_1": 3}
+
+
+def test_from_config_defaults():
+    scheduler = SuccessiveHalvingScheduler.from_config({})
+    assert scheduler.reduction_factor == 3
+    assert scheduler.n_rungs == 3
+    assert scheduler.min_trials_per_rung == 3
+
+
+def test_worthwhile_needs_enough_trials_to_fill_a_rung():
+    scheduler = SuccessiveHalvingScheduler(reduction_factor=3, n_rungs=3, min_trials_per_rung=3)
+    assert not scheduler.worthwhile(2)
+    assert not scheduler.worthwhile(8)
+    assert scheduler.worthwhile(9)
@@ -0,0 +1,43 @@
+import sys
+import time
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from prediction_cache import PredictionCache, payload_hash, window_hash
+
+BARS = [{"date": "2024-01-02", "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 100}]
+
+
+def test_same_window_hits_and_changed_window_or_model_misses():
+    cache = PredictionCache.from_config({"prediction_cache": {"maxsize": 8, "ttl_seconds": 60}})
+    key = PredictionCache.make_key('SPY', '2024-01-02', window_hash(BARS), 'v1')
+    assert cache.get(key) is None
+    cache.put(key, {"result": {"prediction": "Buy"}})
+
+    # אותו חלון, סדר מפתחות אחר -> אותו hash
+    reordered = [dict(reversed(list(BARS[0].items())))]
+    assert cache.get(PredictionCache.make_key('SPY', '2024-01-02', window_hash(reordered), 'v1')) == {
+        "result": {"prediction": "Buy"}}
+
+    changed = [dict(BARS[0], close=1.6)]
+    assert cache.get(PredictionCache.make_key('SPY', '2024-01-02', window_hash(changed), 'v1')) is None
+    assert cache.get(PredictionCache.make_key('SPY', '2024-01-02', window_hash(BARS), 'v2')) is None
+    assert payload_hash(b'arrow') != payload_hash(b'arrow2')
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size'], stats['maxsize']) == (1, 3, 1, 8)
+    assert stats['hit_rate'] == 0.25
+
+
+def test_entries_expire_evict_and_clear():
+    cache = PredictionCache(maxsize=2, ttl=0.05)
+    cache.put('a', 1)
+    time.sleep(0.1)
+    assert cache.get('a') is None
+
+    cache = PredictionCache(maxsize=2, ttl=60)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key)
+    assert cache.get('a') is None and cache.get('c') == 'c'
+    cache.clear()
+    assert cache.get('c') is None and cache.stats()['size'] == 0
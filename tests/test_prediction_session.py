@@ -0,0 +1,106 @@
+import pytest
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+from prediction_session import IncrementalFeatureComputer, SessionStore
+
+
+class RollingCalculator:
+    """FeatureCalculator-shaped: an indicator adds no columns while the window is shorter than its length."""
+
+    LENGTHS = {'SMA': 5, 'LONG': 20, 'ATR': 3}
+
+    def __init__(self):
+        self.calls = []
+
+    def add_all_possible_indicators(self, df, verbose=False, indicator_names=None):
+        self.calls.append(indicator_names)
+        out = df.copy()
+        columns_by_indicator = {}
+        for name in indicator_names if indicator_names is not None else list(self.LENGTHS):
+            length = self.LENGTHS[name]
+            if len(df) < length:
+                continue
+            col = f"{name}_{length}"
+            out[col] = df['close'].rolling(length).mean() + (df['high'] - df['low']).rolling(length).mean()
+            columns_by_indicator[name] = [col]
+        return out, {'columns_by_indicator': columns_by_indicator}
+
+
+def _bars(n, start='2024-01-01'):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    return [
+        {'date': str(ts.date()), 'open': c, 'high': c + 1, 'low': c - 1, 'close': c, 'volume': 1000 + i}
+        for i, (ts, c) in enumerate(zip(pd.date_range(start, periods=n), close))
+    ]
+
+
+def test_session_push_replaces_open_bar_and_caches_until_new_bar():
+    store = SessionStore(max_bars=30, feature_window=25, calculator=RollingCalculator())
+    bars = _bars(40)
+    session = store.push('spy', bars[:35])
+    assert store.get('SPY') is session and len(session.bars) == 30
+
+    # נר עם אותו תאריך מחליף את האחרון; נר ישן יותר נזרק
+    assert session.push([dict(bars[34], close=1.0), bars[0]]) == 1
+    assert session.frame()['close'].iloc[-1] == 1.0 and len(session.bars) == 30
+
+    selected = ['SMA_5', 'LONG_20']
+    first = store.latest_features(session, selected)
+    assert store.latest_features(session, selected) is first
+    session.push([bars[35]])
+    assert store.latest_features(session, selected) is not first
+
+
+def test_short_first_window_does_not_pin_plan_and_incremental_matches_full():
+    calculator = RollingCalculator()
+    computer = IncrementalFeatureComputer(feature_window=25, calculator=calculator)
+    selected = ['SMA_5', 'LONG_20']
+    session = SessionStore(max_bars=60).get('SPY')
+    session.push(_bars(10))
+
+    # חלון קצר: LONG לא מחושב, והתוכנית לא נשמרת
+    assert 'LONG_20' not in computer.latest_features(session.frame(), selected).columns
+    assert computer._plans == {}
+
+    session.push(_bars(60)[10:])
+    for n_bars in (30, 45, 60):
+        df = session.frame().iloc[:n_bars]
+        incremental = computer.latest_features(df, selected)
+        full, _ = RollingCalculator().add_all_possible_indicators(df.iloc[-25:].copy())
+        expected = full.select_dtypes(include=np.number).fillna(0).iloc[[-1]]
+        pd.testing.assert_frame_equal(incremental[selected], expected[selected])
+    assert computer._plans[tuple(selected)] == (['SMA', 'LONG', 'ATR'], frozenset())
+    assert calculator.calls[-1] == ['SMA', 'LONG', 'ATR']
+
+
+def test_cached_plan_missing_a_selected_feature_is_relearned():
+    calculator = RollingCalculator()
+    computer = IncrementalFeatureComputer(feature_window=25, calculator=calculator)
+    selected = ['SMA_5', 'LONG_20']
+    computer._plans[tuple(selected)] = (['SMA'], frozenset())
+    df = pd.DataFrame(_bars(30)).set_index('date')
+
+    row = computer.latest_features(df, selected)
+    assert row['LONG_20'].iloc[0] != 0
+    assert calculator.calls == [['SMA'], None]
+    assert computer._plans[tuple(selected)][0] == ['SMA', 'LONG', 'ATR']
+
+
+def test_incremental_matches_full_feature_calculator():
+    pytest.importorskip("pandas_ta")
+    from feature_calculator import FeatureCalculator
+
+    df = pd.DataFrame(_bars(300)).set_index('date')
+    full, _ = FeatureCalculator().add_all_possible_indicators(df.iloc[-250:].copy(), verbose=False)
+    full = full.select_dtypes(include=np.number).fillna(0).iloc[[-1]]
+    selected = [col for col in full.columns if col not in ('open', 'high', 'low', 'close', 'volume')][:40]
+
+    computer = IncrementalFeatureComputer(feature_window=250)
+    computer.latest_features(df.iloc[:-1], selected)
+    incremental = computer.latest_features(df, selected)
+    pd.testing.assert_frame_equal(incremental[selected], full[selected])
@@ -0,0 +1,49 @@
+import sys
+import os
+import pathlib
+import sqlite3
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from response_cache import ResponseCache, file_version, sqlite_version
+
+
+def test_versions_follow_file_and_db_changes(tmp_path):
+    path = tmp_path / 'config.json'
+    missing = str(tmp_path / 'missing.json')
+    path.write_text('{}')
+    before = file_version(str(path), missing)
+    assert before[1] is None and file_version(str(path), missing) == before
+    path.write_text('{"a": 1}')
+    os.utime(path, ns=(1, 1))
+    assert file_version(str(path), missing) != before
+
+    db = str(tmp_path / 'results.db')
+    assert sqlite_version(db) == (None,)
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    v1 = sqlite_version(db)
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    assert sqlite_version(db)[0] == v1[0] + 1
+
+
+def test_cache_computes_once_per_version():
+    cache = ResponseCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b'{"n": %d}' % len(calls)
+
+    etag1, body1 = cache.get('model', (1,), compute)
+    assert cache.get('model', (1,), compute) == (etag1, body1)
+    etag2, body2 = cache.get('model', (2,), compute)
+    assert len(calls) == 2 and etag2 != etag1 and body2 == b'{"n": 2}'
+    assert cache.etag('model', (2,)) == etag2
+
+    cache.invalidate('model')
+    cache.get('model', (2,), compute)
+    assert len(calls) == 3
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 3, "not_modified": 0}
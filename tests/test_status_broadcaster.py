@@ -0,0 +1,63 @@
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from status_broadcaster import StatusBroadcaster, diff_state
+
+
+class RecordingSocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, to=None):
+        self.emitted.append((event, data, to))
+
+
+def test_diff_state_returns_only_changed_fields():
+    old = {'agent': {'status': 'running', 'pnl': 1}, 'data': {'rows': 10}, 'gone': 1}
+    new = {'agent': {'status': 'running', 'pnl': 2}, 'data': {'rows': 10}, 'processes': []}
+    assert diff_state(old, new) == {'agent': {'pnl': 2}, 'processes': [], 'gone': None}
+    assert diff_state(new, new) == {}
+
+
+def test_tick_computes_once_and_emits_only_changes():
+    calls = {'n': 0}
+
+    def agent():
+        calls['n'] += 1
+        return {'status': 'running', 'tick': calls['n'] // 2}
+
+    socketio = RecordingSocketIO()
+    broadcaster = StatusBroadcaster(socketio, {'agent': agent, 'data': lambda: {'rows': 5}}, interval=60)
+
+    first = broadcaster.current()
+    for _ in range(10):
+        assert broadcaster.current() == {**first, 'server_time': broadcaster.current()['server_time']}
+    assert calls['n'] == 1
+
+    broadcaster.subscribers.add('sid-1')
+    assert broadcaster.tick() == {'agent': {'tick': 1}}
+    assert broadcaster.tick() == {}
+    assert [e[0] for e in socketio.emitted] == ['status_diff']
+    assert socketio.emitted[0][1]['version'] == 2 and socketio.emitted[0][2] == broadcaster.room
+
+
+def test_subscriber_registered_mid_tick_receives_the_diff():
+    socketio = RecordingSocketIO()
+    calls = {'n': 0}
+
+    def data():
+        calls['n'] += 1
+        if calls['n'] == 2:
+            # subscribe_status של לקוח חדש נרשם בזמן ש-get_status של לקוח אחר מחשב תמונה
+            # (התמונה שהלקוח החדש יקבל עוד ישנה)
+            broadcaster.subscribers.add('sid-1')
+        return {'rows': calls['n']}
+
+    broadcaster = StatusBroadcaster(socketio, {'data': data}, interval=0)
+    broadcaster.start = lambda: None
+    assert broadcaster.current()['version'] == 1 and not socketio.emitted
+
+    broadcaster.current()
+    assert [(e[1]['version'], e[1]['changes']) for e in socketio.emitted] == [(2, {'data': {'rows': 2}})]
+    assert broadcaster.subscribe('sid-2')['status'] == {'data': {'rows': 3}}
@@ -0,0 +1,78 @@
+import sys
+import json
+import os
+import pathlib
+import optuna
+from optuna.distributions import IntDistribution
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from warm_start import build_search_space, seed_study
+
+LIMITS = {
+    "learning_rate": {"min": 0.01, "max": 0.1},
+    "max_depth": {"min": 3, "max": 8},
+    "top_n_features": {"min": 5, "max": 20},
+    "threshold": {"min": 0.5, "max": 0.8}
+}
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def _run(study, space):
+    evaluated = []
+
+    def objective(trial):
+        params = {
+            name: (trial.suggest_int(name, dist.low, dist.high) if isinstance(dist, IntDistribution)
+                   else trial.suggest_float(name, dist.low, dist.high, log=dist.log))
+            for name, dist in space.items()
+        }
+        evaluated.append(params)
+        trial.set_user_attr('selected_features', [f"f{i}" for i in range(params['top_n_features'])])
+        return params['max_depth']
+
+    study.optimize(objective, n_trials=3)
+    return evaluated
+
+
+def test_complete_runs_are_re_evaluated_not_copied(tmp_path):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    space = build_search_space(LIMITS, fixed_params={})
+    # סיכום עם מדדים מחלון נתונים ישן: לא אמור להיכנס כניסוי שהושלם
+    _write(tmp_path / 'training_summary.json', {
+        "optuna_params": {"learning_rate": 0.05, "max_depth": 4, "top_n_features": 10, "threshold": 0.6},
+        "objective_values": [99.0]
+    }, 2_000)
+    study = optuna.create_study(direction='maximize')
+
+    assert seed_study(study, space, str(tmp_path)) == 1
+    assert [t.state for t in study.trials] == [optuna.trial.TrialState.WAITING]
+
+    evaluated = _run(study, space)
+    assert evaluated[0] == {"learning_rate": 0.05, "max_depth": 4, "top_n_features": 10, "threshold": 0.6}
+    seeded = study.trials[0]
+    assert seeded.values == [4.0] and seeded.user_attrs['selected_features'] == [f"f{i}" for i in range(10)]
+    assert seeded.user_attrs['warm_start_source'].endswith('training_summary.json')
+
+
+def test_partial_and_out_of_range_configs_are_clipped_and_deduplicated(tmp_path):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    space = build_search_space(LIMITS, fixed_params={})
+    _write(tmp_path / 'champion_model_config.json', {
+        "model_params": {"learning_rate": 0.5, "max_depth": 12},
+        "sim_params": {"threshold": 0.7},
+        "selected_features": [f"f{i}" for i in range(7)]
+    }, 1_000)
+    # אותם ערכים אחרי חיתוך - נכנס לתור פעם אחת בלבד
+    _write(tmp_path / 'candidate_model_config_1.json', {
+        "params": {"learning_rate": 0.1, "max_depth": 8, "threshold": 0.7, "top_n_features": 7}
+    }, 500)
+    study = optuna.create_study(direction='maximize')
+
+    assert seed_study(study, space, str(tmp_path)) == 1
+    evaluated = _run(study, space)
+    assert evaluated[0] == {"learning_rate": 0.1, "max_depth": 8, "top_n_features": 7, "threshold": 0.7}
+    assert len(study.trials) == 3